@@ -32,3 +32,8 @@ resource "google_project_iam_member" "sa_secret_accessor" {
   member  = "serviceAccount:${google_service_account.sa.email}"
 }
 
+resource "google_storage_bucket_iam_member" "sa_cache_object_admin" {
+  bucket = google_storage_bucket.release_cache.name
+  role   = "roles/storage.objectAdmin"
+  member = "serviceAccount:${google_service_account.sa.email}"
+}
@@ -7,6 +7,15 @@ data "google_compute_default_service_account" "default" {
 }
 
 
+# persists checkpoints and caches between executions and scheduler
+# retries; mounted into the job at /mnt/release-cache
+resource "google_storage_bucket" "release_cache" {
+  name                        = var.cache_bucket
+  location                    = var.region
+  uniform_bucket_level_access = true
+}
+
+
 resource "google_cloud_run_v2_job" "default" {
   name     = var.cloud_run_name
   location = var.region
@@ -30,7 +39,44 @@ resource "google_cloud_run_v2_job" "default" {
                 }
               }
             }
+           env {
+             name  = "HTAN_CHECKPOINT_DIR"
+             value = "/mnt/release-cache/checkpoints"
+            }
+           env {
+             name  = "HTAN_MANIFEST_CACHE"
+             value = "/mnt/release-cache/manifests"
+            }
+           env {
+             name  = "HTAN_FILEVIEW_CACHE"
+             value = "/mnt/release-cache/fileview"
+            }
+           env {
+             name  = "HTAN_FILE_HANDLE_CACHE"
+             value = "/mnt/release-cache/file_handles.parquet"
+            }
+           env {
+             name  = "HTAN_HASH_CACHE"
+             value = "/mnt/release-cache/hashes.json"
+            }
+           env {
+             name  = "HTAN_DESCRIPTION_CACHE"
+             value = "/mnt/release-cache/descriptions.csv"
+            }
+           volume_mounts {
+             name       = "release-cache"
+             mount_path = "/mnt/release-cache"
+            }
+        }
+        volumes {
+          name = "release-cache"
+          gcs {
+            bucket    = google_storage_bucket.release_cache.name
+            read_only = false
+          }
         }
+        # Cloud Storage volumes need the second generation environment
+        execution_environment = "EXECUTION_ENVIRONMENT_GEN2"
         timeout = "2700s"
         service_account = "${google_service_account.sa.email}"
     }
@@ -40,7 +86,10 @@ resource "google_cloud_run_v2_job" "default" {
       launch_stage,
     ]
   }
-  depends_on = [resource.google_service_account.sa]
+  depends_on = [
+    resource.google_service_account.sa,
+    resource.google_storage_bucket_iam_member.sa_cache_object_admin
+  ]
 }
 
 
@@ -1,31 +1,59 @@
 import synapseclient
+import argparse
 import json
+import os
 
-def make_public(synid, syn):
-    print(synid)
-    registered = syn.getPermissions(synid, '273948') == ['DOWNLOAD','READ']
-    if registered:
-        pass
-    else:
-        syn.setPermissions(synid,'273948',['DOWNLOAD','READ'])
-    public = syn.getPermissions(synid, 'PUBLIC') == ['READ']
-    if public:
-        pass
-    else:
-        syn.setPermissions(synid, principalId = 'PUBLIC', accessType = ['READ'])
+from validation.permissions import AclPublisher
 
-def main():
+def main(args, syn=None):
 
-    syn = synapseclient.Synapse()
-    syn.login()
+    if syn is None:
+        syn = synapseclient.Synapse()
+        syn.login()
 
-    f = json.load(open('release4/synapse_public_entities.json'))
+    with open(args.entities, 'r') as f:
+        entity_ids = json.load(f)
+
+    journal = args.journal or os.path.splitext(args.entities)[0] + '_acl_journal.jsonl'
+    publisher = AclPublisher(syn, journal, workers=args.workers, rate=args.rate)
+
+    plan = publisher.plan(entity_ids)
+    print(publisher.report(plan).to_string())
+
+    if args.report:
+        plan.to_csv(args.report, index=False)
+
+    if args.dry_run:
+        return plan
+
+    return publisher.apply(plan)
 
-    for j in f:
-        make_public(j,syn)
 
-        
 if __name__ == "__main__":
 
-	main()
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('-e', '--entities',
+        default='release4/synapse_public_entities.json',
+        help = 'JSON list of Synapse IDs of entities to make public')
+
+    parser.add_argument('--journal',
+        help = 'Progress journal; entities done in an earlier run are skipped. '
+            'Defaults to <entities>_acl_journal.jsonl')
+
+    parser.add_argument('--dry-run',
+        action='store_true',
+        help = 'Report the permission changes needed without making them')
+
+    parser.add_argument('--report',
+        help = 'Write the planned changes per entity and principal to this CSV')
+
+    parser.add_argument('--workers', type=int,
+        help = 'Concurrent Synapse calls (default HTAN_SYNAPSE_WORKERS or 8)')
+
+    parser.add_argument('--rate', type=float, default=10,
+        help = 'Maximum Synapse calls per second')
+
+    args = parser.parse_args()
 
+    main(args)
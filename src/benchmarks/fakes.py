@@ -0,0 +1,387 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import pandas as pd
+
+from collections import Counter
+from types import SimpleNamespace
+
+
+class FakeSynapse:
+    """
+    In-process stand-in for the synapseclient.Synapse methods used by
+    the release job, serving SyntheticData. latency adds a fixed delay
+    to every call to model network round trips
+    """
+
+    fileHandleEndpoint = 'https://file.synapse.invalid/file/v1'
+
+    def __init__(self, data, latency=0.0, renamed_rate=0.01):
+        self.data = data
+        self.renamed_rate = renamed_rate
+        self.latency = latency
+        self.calls = Counter()
+        self.queries = []
+        self._lock = threading.Lock()
+
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+    def tableQuery(self, query):
+        self._call('tableQuery')
+        self.queries.append(query)
+
+        if 'synapse_storage_manifest' in query:
+            view = self.data.manifest_view()
+        else:
+            view = self.data.fileview()
+
+        if "type = 'file'" in query:
+            view = view[view['type'] == 'file']
+
+        suffix = re.search(r"name LIKE '%([^%']+)'", query)
+        if suffix:
+            view = view[view['name'].str.endswith(suffix.group(1))]
+
+        watermark = re.search(r'modifiedOn >= (\d+)', query)
+        if watermark:
+            view = view[view['modifiedOn'] >= int(watermark.group(1))]
+
+        columns = re.match(r'\s*SELECT (.*?) FROM', query, re.S).group(1).strip()
+        if columns != '*':
+            view = view.reindex(columns=[c.strip() for c in columns.split(',')])
+
+        return SimpleNamespace(asDataFrame=lambda: view.copy())
+
+
+    def get(self, entity, downloadFile=True, downloadLocation=None, ifcollision=None):
+        self._call('get')
+
+        if entity in self.data.projects:
+            return SimpleNamespace(id=entity, name=self.data.projects[entity])
+
+        manifest = self.data.manifests[entity]
+        if downloadFile:
+            os.makedirs(downloadLocation, exist_ok=True)
+            manifest.to_csv(os.path.join(downloadLocation, 'manifest.csv'), index=False)
+
+        return SimpleNamespace(id=entity, versionNumber=1)
+
+
+    def getChildren(self, parent, includeTypes=None):
+        self._call('getChildren')
+        return iter(self.data.children.get(parent, []))
+
+
+    def restPOST(self, uri, body=None, endpoint=None):
+        """
+        POST /fileHandle/batch. File handles are named after their
+        entity, except for a `renamed_rate` fraction whose alias differs
+        """
+        self._call('restPOST')
+
+        results = []
+        for requested in json.loads(body)['requestedFiles']:
+            entity_id = requested['associateObjectId']
+            name = entity_id + '.dat'
+
+            bucket = int(hashlib.md5(entity_id.encode()).hexdigest(), 16) % 10000
+            alias = 'renamed_' + name if bucket < self.renamed_rate * 10000 else name
+
+            results.append({
+                'fileHandleId': requested['fileHandleId'],
+                'fileHandle': {
+                    'id': requested['fileHandleId'],
+                    'fileName': alias,
+                    'key': 'htan-bucket/%s/%s' % (requested['fileHandleId'], name),
+                    'contentMd5': hashlib.md5(name.encode()).hexdigest(),
+                    'contentSize': 1024
+                }
+            })
+
+        return {'requestedFiles': results}
+
+
+class FakePermissions:
+    """
+    In-process stand-in for synapseclient.Synapse.getPermissions and
+    setPermissions. Each entity starts out public with probability
+    `public_rate`; a `fail_rate` fraction of calls raises, as throttled
+    requests do
+    """
+
+    def __init__(self, public_rate=0.5, fail_rate=0.0, latency=0.0):
+        self.public_rate = public_rate
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.acl = {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+
+    def _call(self, name, entity, principalId):
+        with self._lock:
+            self.calls[name] += 1
+            attempt = self.calls[name]
+        if self.latency:
+            time.sleep(self.latency)
+
+        key = '%s:%s:%d' % (entity, principalId, attempt)
+        if int(hashlib.md5(key.encode()).hexdigest(), 16) % 10000 < self.fail_rate * 10000:
+            raise RuntimeError('429 Too Many Requests')
+
+
+    def _initial(self, entity, principalId):
+        bucket = int(hashlib.md5(entity.encode()).hexdigest(), 16) % 10000
+        if bucket >= self.public_rate * 10000:
+            return []
+        return ['DOWNLOAD', 'READ'] if principalId == '273948' else ['READ']
+
+
+    def getPermissions(self, entity, principalId=None):
+        self._call('getPermissions', entity, principalId)
+        with self._lock:
+            return list(self.acl.get((entity, principalId),
+                self._initial(entity, principalId)))
+
+
+    def setPermissions(self, entity, principalId=None, accessType=None):
+        self._call('setPermissions', entity, principalId)
+        with self._lock:
+            self.acl[(entity, principalId)] = list(accessType)
+
+
+class FakeJira:
+    """
+    In-process stand-in for the jira.JIRA methods used to file release
+    tickets. Issues are kept by key; latency adds a fixed delay to
+    every call
+    """
+
+    def __init__(self, latency=0.0, project='HTAN'):
+        self.latency = latency
+        self.project = project
+        self.issues = {}
+        self.links = []
+        self.attachments = {}
+        self.queries = []
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+    def create_customer_request(self, fields=None):
+        self._call('create_customer_request')
+        with self._lock:
+            key = 'HTAN-%d' % (sum(self.calls.values()) + 1)
+            self.issues[key] = dict(fields['requestFieldValues'])
+        return SimpleNamespace(key=key)
+
+
+    def service_desk(self, id):
+        self._call('service_desk')
+        return SimpleNamespace(id=id, projectKey=self.project)
+
+
+    def search_issues(self, jql_str, maxResults=50, fields=None):
+        self._call('search_issues')
+        self.queries.append(jql_str)
+
+        project = re.search(r'project = "([^"]*)"', jql_str)
+        if project and project.group(1) != self.project:
+            return []
+
+        # text search matches the phrase anywhere in the summary
+        phrase = re.search(r'summary ~ "\\"(.*)\\""', jql_str).group(1)
+        with self._lock:
+            return [SimpleNamespace(key=key, fields=SimpleNamespace(summary=i['summary']))
+                for key, i in self.issues.items() if phrase in i['summary']]
+
+
+    def add_attachment(self, issue=None, attachment=None):
+        self._call('add_attachment')
+        with self._lock:
+            self.attachments.setdefault(issue, []).append(os.path.basename(attachment))
+
+
+    def create_issue_link(self, type=None, inwardIssue=None, outwardIssue=None):
+        self._call('create_issue_link')
+        with self._lock:
+            self.links.append((type, inwardIssue, outwardIssue))
+
+
+    def issue(self, id, fields=None):
+        self._call('issue')
+        with self._lock:
+            links = [SimpleNamespace(outwardIssue=SimpleNamespace(key=outward))
+                for _, inward, outward in self.links if inward == id]
+        return SimpleNamespace(key=id, fields=SimpleNamespace(issuelinks=links))
+
+
+class DuckDBEngine:
+    """
+    Local stand-in for validation.promotion.BigQueryEngine. Datasets
+    are DuckDB schemas; statements in BigQuery syntax run unchanged
+    apart from table names and parameter markers
+    """
+
+    def __init__(self, tables=None):
+        import duckdb
+
+        self.con = duckdb.connect()
+        self.descriptions = {}
+        self.calls = Counter()
+
+        for name, data in (tables or {}).items():
+            self.load(*name.split('.'), data)
+
+
+    def table(self, dataset, table):
+        self.con.execute('CREATE SCHEMA IF NOT EXISTS "%s"' % dataset)
+        return '"%s"."%s"' % (dataset, table)
+
+
+    def execute(self, sql, params=None):
+        self.calls['execute'] += 1
+        self.con.execute(re.sub(r'@(\w+)', r'$\1', sql), params or {})
+
+
+    def query(self, sql, params=None):
+        self.calls['query'] += 1
+        return self.con.execute(re.sub(r'@(\w+)', r'$\1', sql), params or {}).df()
+
+
+    def load(self, dataset, table, data):
+        self.calls['load'] += 1
+        self.con.register('_load', data)
+        self.con.execute('CREATE OR REPLACE TABLE %s AS SELECT * FROM _load'
+            % self.table(dataset, table))
+        self.con.unregister('_load')
+
+
+    def copy(self, dataset, source, destination):
+        self.calls['copy'] += 1
+        self.con.execute('CREATE OR REPLACE TABLE %s AS SELECT * FROM %s' % (
+            self.table(dataset, destination), self.table(dataset, source)))
+        self.descriptions[(dataset, destination)] = self.descriptions.get((dataset, source))
+
+
+    def describe(self, dataset, table, descriptions):
+        columns = self.con.execute('SELECT * FROM %s LIMIT 0'
+            % self.table(dataset, table)).df().columns
+        self.descriptions[(dataset, table)] = {c: descriptions.get(c) for c in columns}
+
+
+    def fetch(self, dataset, table):
+        return self.con.execute('SELECT * FROM %s' % self.table(dataset, table)).df()
+
+
+class FakeJob:
+
+    def __init__(self, data=None):
+        self._data = data
+        self.output_rows = None if data is None else len(data)
+
+
+    def result(self):
+        return self
+
+    def to_dataframe(self):
+        return self._data.copy()
+
+
+class FakeBigQuery:
+    """
+    In-process stand-in for google.cloud.bigquery.Client. Queries return
+    the first table whose key appears in the SQL text, and loaded data
+    frames are kept in `loaded` by table ID
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.loaded = {}
+        self.calls = Counter()
+
+
+    def query(self, query, job_config=None):
+        self.calls['query'] += 1
+
+        for key, table in self.tables.items():
+            if key in query:
+                return FakeJob(table)
+
+        raise KeyError('No synthetic table for query: %s' % query)
+
+
+    def load_table_from_dataframe(self, data, table_id, job_config=None):
+        self.calls['load_table_from_dataframe'] += 1
+        self.loaded[table_id] = data
+        return FakeJob(data)
+
+
+class FakeFileStore:
+    """
+    Local stand-in for validation.hashing.SynapseFileStore. File contents
+    are generated from the entity ID; for a `corrupt_rate` fraction of
+    files the recorded MD5 does not match the contents
+    """
+
+    def __init__(self, size=64 * 1024, corrupt_rate=0.01, chunk_size=16 * 1024):
+        self.size = size
+        self.corrupt_rate = corrupt_rate
+        self.chunk_size = chunk_size
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+
+    def _content(self, entity_id):
+        seed = entity_id.encode()
+        return (seed * (self.size // len(seed) + 1))[:self.size]
+
+
+    def _corrupt(self, entity_id):
+        bucket = int(hashlib.md5(entity_id.encode()).hexdigest(), 16) % 10000
+        return bucket < self.corrupt_rate * 10000
+
+
+    def handles(self, entity_ids):
+        with self._lock:
+            self.calls['handles'] += 1
+
+        records = []
+        for entity_id in entity_ids:
+            md5 = hashlib.md5(self._content(entity_id)).hexdigest()
+            if self._corrupt(entity_id):
+                md5 = hashlib.md5(md5.encode()).hexdigest()
+            records.append({
+                'entityId': entity_id,
+                'fileHandleId': 'fh' + entity_id[3:],
+                'contentMd5': md5,
+                'contentSize': self.size
+            })
+
+        return pd.DataFrame(records,
+            columns=['entityId', 'fileHandleId', 'contentMd5', 'contentSize'])
+
+
+    def stream(self, entity_id, file_handle_id):
+        with self._lock:
+            self.calls['stream'] += 1
+
+        content = self._content(entity_id)
+        for i in range(0, len(content), self.chunk_size):
+            yield content[i:i + self.chunk_size]
@@ -0,0 +1,177 @@
+"""
+Time the release pipeline stages on synthetic HTAN-scale data.
+
+Run from src/:
+
+    python -m benchmarks.run --scales 1 10 100
+
+Each scale multiplies the number of manifests and biospecimens per
+center. Synapse and BigQuery are replaced with in-process fakes, so no
+credentials or network access are needed.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import yaml
+import pandas as pd
+
+from benchmarks.fakes import FakeSynapse, FakeBigQuery, FakeFileStore
+from benchmarks.synthetic import generate
+from validation.get_manifests import GetManifests
+from validation.manifest_store import ManifestStore
+from validation.list_files import FullFileList, GetParentIds
+from validation.file_validation import entity_exists, htan_id_regex, basename_regex
+from validation.file_validation import htan_id_unique, adjacent_bios, unique_bios, unique_demographics
+from validation.file_validation import parents_exist, get_channel_files, check_hash, check_alias
+from validation.file_validation import file_name_unique
+from validation.generate_release_lists import bq_release_lists
+from validation.provenance import ProvenanceIndex
+from validation.fileview import FileviewSnapshot, FileviewReplica, manifest_rows
+from validation.descriptions import DescriptionCatalog
+from validation.bq_loader import BigQueryLoader
+from validation.synapse_paths import SynapsePathResolver
+from validation.hashing import HashVerifier, HashCache
+from validation.file_handles import FileHandleFetcher
+
+
+def timed(results, scale, name, func, *args):
+    """
+    Run func, record its wall time and output size, and return its result
+    """
+
+    start = time.time()
+    out = func(*args)
+    seconds = time.time() - start
+
+    rows = out
+    if isinstance(out, tuple):
+        rows = out[0]
+    if isinstance(rows, (pd.DataFrame, dict, list, set)):
+        rows = len(rows)
+    else:
+        rows = None
+
+    results.append({'scale': scale, 'stage': name, 'seconds': round(seconds, 3), 'rows': rows})
+    print('  %-24s %9.3fs  %s' % (name, seconds, '' if rows is None else '%d rows' % rows))
+
+    return out
+
+
+def run_scale(config, scale, args, results):
+
+    print('Scale %sx' % scale)
+
+    data = timed(results, scale, 'generate', generate, config, scale,
+        args.manifests, args.files, args.biospecimens)
+
+    syn = FakeSynapse(data, latency=args.latency)
+    client = FakeBigQuery(data.tables())
+    center_map = config['centers']
+    schema = data.schema()
+
+    workdir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    try:
+        replica = FileviewReplica(syn, os.path.join(workdir, 'fileview'))
+        fileview_rows = timed(results, scale, 'FileviewReplica (full)', replica.refresh)
+        timed(results, scale, 'FileviewReplica (incr)', replica.refresh)
+        manifests = manifest_rows(fileview_rows)
+
+        store = ManifestStore(os.path.join(workdir, 'store'))
+        meta_map, extra_cols = timed(results, scale, 'GetManifests (cold)',
+            GetManifests, syn, center_map, store, schema, None, manifests)
+        timed(results, scale, 'GetManifests (warm)', GetManifests, syn, center_map,
+            ManifestStore(os.path.join(workdir, 'store')), schema, None, manifests)
+    finally:
+        os.chdir(cwd)
+
+    id_prov = pd.DataFrame(data.id_prov)
+    fileview = FileviewSnapshot(fileview_rows)
+
+    prov_index = timed(results, scale, 'ProvenanceIndex', ProvenanceIndex, id_prov)
+    parent_ids = timed(results, scale, 'GetParentIds', GetParentIds, meta_map)
+    file_list = timed(results, scale, 'FullFileList', FullFileList, meta_map, config['files'])
+
+    released = client.tables['released.entities']['entityId']
+    releasable = file_list[~file_list['entityId'].isin(released)]
+
+    timed(results, scale, 'htan_id_unique', htan_id_unique, file_list, releasable)
+    timed(results, scale, 'htan_id_regex', htan_id_regex, releasable)
+    timed(results, scale, 'basename_regex', basename_regex, releasable)
+    timed(results, scale, 'entity_exists', entity_exists, fileview, releasable)
+    timed(results, scale, 'adjacent_bios', adjacent_bios, meta_map, prov_index)
+    timed(results, scale, 'unique_bios', unique_bios, meta_map, prov_index)
+    timed(results, scale, 'unique_demographics', unique_demographics, meta_map, prov_index)
+    timed(results, scale, 'parents_exist', parents_exist, releasable, parent_ids)
+
+    timed(results, scale, 'file_name_unique', file_name_unique, file_list, releasable)
+
+    handle_cache = os.path.join(workdir, 'file_handles.parquet')
+    timed(results, scale, 'check_alias (cold)', check_alias,
+        FileHandleFetcher(syn, fileview_rows, handle_cache), releasable)
+    timed(results, scale, 'check_alias (warm)', check_alias,
+        FileHandleFetcher(syn, fileview_rows, handle_cache), releasable)
+
+    hash_cache = os.path.join(workdir, 'hashes.json')
+    timed(results, scale, 'check_hash (cold)', check_hash, syn, releasable,
+        HashVerifier(FakeFileStore(), HashCache(hash_cache)))
+    timed(results, scale, 'check_hash (warm)', check_hash, syn, releasable,
+        HashVerifier(FakeFileStore(), HashCache(hash_cache)))
+
+    resolver = SynapsePathResolver(syn)
+    img_new = releasable[releasable['Component'] == 'ImagingLevel2']
+    timed(results, scale, 'get_channel_files', get_channel_files,
+        syn, img_new, meta_map['ImagingLevel2'], center_map, resolver)
+
+    loader = BigQueryLoader(client)
+    timed(results, scale, 'bq_release_lists', bq_release_lists, client, syn, fileview,
+        center_map, releasable.copy(), meta_map, id_prov, config['clinical_attributes'],
+        config['biospecimen_attributes'], resolver,
+        DescriptionCatalog(schema, schema.iloc[:0]), loader)
+    loader.wait()
+
+    print('  Synapse calls: %s' % dict(syn.calls))
+    print('')
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+
+    parser.add_argument('--scales', nargs='+', type=float, default=[1, 10, 100],
+        help='Volume multipliers to benchmark')
+    parser.add_argument('--manifests', type=int, default=20,
+        help='Assay manifests per center at 1x')
+    parser.add_argument('--files', type=int, default=100,
+        help='Files per assay manifest')
+    parser.add_argument('--biospecimens', type=int, default=500,
+        help='Biospecimens per center at 1x')
+    parser.add_argument('--latency', type=float, default=0.0,
+        help='Simulated seconds of latency per Synapse call')
+    parser.add_argument('--output', default=None,
+        help='Write results to this CSV file')
+
+    args = parser.parse_args()
+
+    with open(os.path.join(os.path.dirname(__file__), '..', 'config.yaml'), 'r') as file:
+        config = yaml.safe_load(file)
+
+    results = []
+    for scale in args.scales:
+        run_scale(config, scale, args, results)
+
+    results = pd.DataFrame(results)
+    print(results.pivot(index='stage', columns='scale', values='seconds').to_string())
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,262 @@
+import random
+import uuid
+import pandas as pd
+
+
+ASSAY_COMPONENTS = [
+    'ScRNA-seqLevel1',
+    'ScRNA-seqLevel2',
+    'BulkWESLevel1',
+    'ImagingLevel2'
+]
+
+FILE_FORMATS = {
+    'ScRNA-seqLevel1': 'fastq',
+    'ScRNA-seqLevel2': 'bam',
+    'BulkWESLevel1': 'fastq',
+    'ImagingLevel2': 'OME-TIFF'
+}
+
+
+class SyntheticData:
+    """
+    Synthetic HTAN inputs: manifests and fileview rows for every center
+    project, the HTAN fileview, id_provenance, Synapse folder tree and
+    the BigQuery tables read by the release job
+    """
+
+    def __init__(self):
+        self.projects = {}
+        self.manifests = {}
+        self.manifest_rows = []
+        self.files = []
+        self.id_prov = []
+        self.children = {}
+        self.released = []
+        self.imaging = []
+        self._next_id = 60000000
+
+
+    def syn_id(self):
+        self._next_id += 1
+        return 'syn%d' % self._next_id
+
+
+    def add_manifest(self, project_id, data):
+        manifest_id = self.syn_id()
+        self.manifests[manifest_id] = pd.DataFrame(data)
+        self.manifest_rows.append({
+            'id': manifest_id,
+            'name': 'synapse_storage_manifest.csv',
+            'type': 'file',
+            'parentId': self.syn_id(),
+            'projectId': project_id,
+            'createdOn': 1700000000000,
+            'modifiedOn': 1700000000000 + len(self.manifest_rows),
+            'currentVersion': 1,
+            'etag': str(uuid.uuid4())
+        })
+
+
+    def fileview(self):
+        """
+        Fileview rows of all manifests and data files
+        """
+
+        files = pd.DataFrame(self.files).reindex(columns=['id', 'currentVersion', 'name'])
+        files = files.assign(name=files['name'].fillna(files['id'] + '.dat'), type='file',
+            createdOn=1700000000000, modifiedOn=1700000000000, etag=files['id'],
+            dataFileHandleId=files['id'].str[3:].astype(int))
+
+        return pd.concat([self.manifest_view(), files], ignore_index=True)
+
+
+    def manifest_view(self):
+        return pd.DataFrame(self.manifest_rows)
+
+
+    def schema(self):
+        """
+        Data model covering every generated manifest column
+        """
+
+        attributes = sorted(set(
+            c for m in self.manifests.values() for c in m.columns
+        ) - {'entityId', 'Id', 'Uuid'})
+
+        return pd.DataFrame({
+            'Attribute': attributes,
+            'Description': ['%s description' % a for a in attributes]
+        })
+
+
+    def tables(self):
+        """
+        BigQuery tables, keyed by a substring of their table reference
+        """
+
+        released = pd.DataFrame(self.released, columns=[
+            'entityId', 'Data_Release', 'Id', 'type', 'CDS_Release',
+            'IDC_Release', 'Component', 'channel_metadata_version',
+            'channel_metadata_synapseId'
+        ])
+
+        return {
+            'id_provenance.upstream_ids': pd.DataFrame(self.id_prov),
+            'released.entities': released,
+            'released.metadata': pd.DataFrame({'Manifest_Id': []}),
+            'metadata.data-model': self.schema(),
+            'combined_assays.ImagingLevel2': pd.DataFrame(self.imaging)
+        }
+
+
+def generate(config, scale=1, manifests_per_center=20, files_per_manifest=100,
+    biospecimens_per_center=500, duplicate_rate=0.01, error_rate=0.01,
+    released_rate=0.2, seed=0):
+    """
+    Build synthetic inputs for all centers in config. scale multiplies the
+    number of manifests and biospecimens per center; duplicate_rate and
+    error_rate control how many records should fail validation checks
+    """
+
+    rng = random.Random(seed)
+    data = SyntheticData()
+
+    n_manifests = max(1, int(manifests_per_center * scale))
+    n_bios = max(2, int(biospecimens_per_center * scale))
+
+    for center, info in config['centers'].items():
+
+        prefix = info['center_id'].upper()
+        project_id = info['synapse_id']
+        data.projects[project_id] = center
+
+        # participants and biospecimens
+        participants = ['%s_%d' % (prefix, p) for p in range(1, n_bios // 5 + 2)]
+        bios = []
+        for b in range(1, n_bios + 1):
+            participant = rng.choice(participants)
+            bios.append({
+                'HTAN Biospecimen ID': '%s_%d' % (participant, b),
+                'HTAN Parent ID': participant,
+                'Adjacent Biospecimen IDs': None,
+                'Component': 'Biospecimen'
+            })
+
+        bios_ids = [b['HTAN Biospecimen ID'] for b in bios]
+        for b in rng.sample(bios, max(1, n_bios // 10)):
+            adjacent = rng.sample(bios_ids, 2)
+            if rng.random() < error_rate * 10:
+                adjacent.append('%s_0_%d' % (prefix, rng.randint(1, 10**6)))
+            b['Adjacent Biospecimen IDs'] = ', '.join(adjacent)
+
+        dup_bios = [dict(b) for b in rng.sample(bios, int(n_bios * duplicate_rate))]
+        n_bios_manifests = max(1, n_manifests // 10)
+        for i in range(n_bios_manifests):
+            data.add_manifest(project_id, bios[i::n_bios_manifests])
+        if dup_bios:
+            data.add_manifest(project_id, dup_bios)
+
+        data.add_manifest(project_id, [{
+            'HTAN Biospecimen ID': '%s_SRRS_%d' % (prefix, i),
+            'HTAN Parent ID': participants[0],
+            'Component': 'SRRSBiospecimen'
+        } for i in range(1, 3)])
+
+        # clinical manifests
+        demographics = [{'HTAN Participant ID': p, 'Component': 'Demographics'}
+            for p in participants]
+        demographics += [dict(d) for d in
+            rng.sample(demographics, int(len(participants) * duplicate_rate))]
+        data.add_manifest(project_id, demographics)
+
+        for clinical in config['clinical_attributes']:
+            if clinical != 'Demographics':
+                data.add_manifest(project_id, [{
+                    'HTAN Participant ID': p, 'Component': clinical
+                } for p in rng.sample(participants, max(1, len(participants) // 4))])
+
+        # channel metadata files in a folder of the center project
+        channel_folder = data.syn_id()
+        data.children[project_id] = [
+            {'name': 'channels', 'id': channel_folder, 'type': 'org.sagebionetworks.repo.model.Folder'}
+        ]
+        data.children[channel_folder] = []
+        for i in range(max(1, n_manifests // 4)):
+            channel_id = data.syn_id()
+            data.children[channel_folder].append({
+                'name': 'channels_%d.csv' % i, 'id': channel_id,
+                'type': 'org.sagebionetworks.repo.model.FileEntity', 'versionNumber': 1
+            })
+            data.files.append({'id': channel_id, 'currentVersion': 1})
+
+        # assay manifests
+        level1 = []
+        file_number = 10**6
+        for m in range(n_manifests):
+            component = ASSAY_COMPONENTS[m % len(ASSAY_COMPONENTS)]
+            rows = []
+
+            for f in range(files_per_manifest):
+                file_number += 1
+                bios_id = rng.choice(bios_ids)
+                participant = bios_id.rsplit('_', 1)[0]
+                file_id = '%s_%d' % (participant, file_number)
+                entity_id = data.syn_id()
+
+                if rng.random() < error_rate:
+                    file_id = file_id.replace('_', '-')
+                if rng.random() < duplicate_rate and rows:
+                    file_id = rows[-1]['HTAN Data File ID']
+
+                row = {
+                    'Component': component,
+                    'Filename': 'data/%s/%s.%s' % (component, file_id, FILE_FORMATS[component]),
+                    'File Format': FILE_FORMATS[component],
+                    'HTAN Data File ID': file_id,
+                    'entityId': entity_id,
+                    'Id' if m % 2 else 'Uuid': str(uuid.UUID(int=rng.getrandbits(128)))
+                }
+
+                if component == 'ScRNA-seqLevel2':
+                    parent = rng.choice(level1) if level1 else (file_id, bios_id)
+                    if rng.random() < error_rate:
+                        parent = ('%s_0' % participant, bios_id)
+                    row['HTAN Parent Data File ID'] = parent[0]
+                    bios_id = parent[1]
+                else:
+                    row['HTAN Parent Biospecimen ID'] = bios_id
+                    level1.append((file_id, bios_id))
+
+                if component == 'ImagingLevel2':
+                    channel = rng.randrange(len(data.children[channel_folder]) + 1)
+                    row['Channel Metadata Filename'] = 'channels/channels_%d.csv' % channel
+                    row['MERFISH Positions File'] = None
+                    row['MERFISH Codebook File'] = None
+                    data.imaging.append({
+                        'entityId': entity_id,
+                        'Channel_Metadata_Filename': row['Channel Metadata Filename'],
+                        'HTAN_Center': center
+                    })
+
+                rows.append(row)
+
+                if rng.random() > error_rate:
+                    data.files.append({'id': entity_id, 'currentVersion': 1})
+                if rng.random() < released_rate:
+                    data.released.append({
+                        'entityId': entity_id, 'Data_Release': 'Release 1.0',
+                        'Id': row.get('Id'), 'type': 'file', 'Component': component
+                    })
+
+                data.id_prov.append({
+                    'entityId': entity_id,
+                    'HTAN_Data_File_ID': file_id,
+                    'HTAN_Participant_ID': participant,
+                    'HTAN_Assayed_Biospecimen_ID': bios_id,
+                    'Biospecimen_Path': '%s/%s' % (participant, bios_id)
+                })
+
+            data.add_manifest(project_id, rows)
+
+    return data
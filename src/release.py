@@ -11,208 +11,381 @@ from google.cloud import bigquery
 
 from validation.get_manifests import GetManifests
 from validation.list_files import FullFileList, GetParentIds
+from validation.list_files import REQUIRED_COLUMNS as FILE_LIST_COLUMNS
 
 from validation.file_validation import entity_exists, htan_id_regex, basename_regex, file_name_unique
 from validation.file_validation import htan_id_unique, adjacent_bios, unique_bios, unique_demographics
-from validation.file_validation import parents_exist, get_channel_files
+from validation.file_validation import parents_exist, get_channel_files, check_hash, check_alias
+from validation.file_validation import REQUIRED_COLUMNS as CHECK_COLUMNS
 from validation.generate_release_lists import bq_release_lists
+from validation.generate_release_lists import REQUIRED_COLUMNS as RELEASE_LIST_COLUMNS
+from validation.provenance import ProvenanceIndex
+from validation.fileview import FileviewSnapshot, FileviewReplica, manifest_rows
+from validation.bq_loader import BigQueryLoader
+from validation.synapse_paths import SynapsePathResolver
+from validation.stages import Stage, StageRunner
+from validation.checkpoint import CheckpointStore
+from validation.telemetry import RunMetrics
+from validation import ingest
+from validation.catalog import ReleaseCatalog, row_keys
+from validation.hashing import HashVerifier, SynapseFileStore
+from validation.file_handles import FileHandleFetcher
+from validation.errors import concat_errors, aggregate_errors, count_errors, CLIN_BIO_CODES
+
+BQ_DATASET = 'data_release'
+
+# Manifest and file exclusion list
+EXCLUDE_SHEET_ID = '1tUOd0kiQfW-cjnTbX24Tso5Gnq42k7sKQZLCLFLxBCA'
+EXCLUDE_SHEET_NAME = 'current'
+
+# Manifest columns used by any stage; all others are dropped at ingest
+MANIFEST_COLUMNS = sorted(set(
+   FILE_LIST_COLUMNS + CHECK_COLUMNS + RELEASE_LIST_COLUMNS))
+
+
+def get_id_provenance(client):
+   '''
+   Pull ID provenance table and index it by upstream ID
+   '''
+   id_prov = client.query("""
+      SELECT * FROM `htan-dcc.id_provenance.upstream_ids`
+   """).result().to_dataframe()
 
-def load_bq(client, project, dataset, table, data):
-    '''
-    Load dataframe to BigQuery
-    '''
-    print('Loading: '+dataset+'.'+table)
-    
-    table_bq = '%s.%s.%s' % (project, dataset, table)
-
-    # make column names bq friendly
-    data.columns = data.columns.str.replace(
-       '[^0-9a-zA-Z]+','_', regex=True
-    )
-    schema = [
-       bigquery.SchemaField(name, 'STRING') for name in data.columns
-    ]
-
-    job_config = bigquery.LoadJobConfig( 
-        write_disposition="WRITE_TRUNCATE",      
-        autodetect=False,
-        schema=schema,
-        source_format=bigquery.SourceFormat.CSV,
-        allow_jagged_rows=True,
-        allow_quoted_newlines=True
-    )
-    
-    job = client.load_table_from_dataframe(
-        data, table_bq, job_config=job_config
-    )
-
-
-def main():
+   return id_prov, ProvenanceIndex(id_prov)
 
-   bq_project = 'htan-dcc'
-   bq_dataset = 'data_release'
 
-   SYN_PAT = os.environ.get('SYNAPSE_AUTH_TOKEN')
+def get_exclusions():
+   '''
+   Get manifest and file exclusion list
+   '''
+   url = f'https://docs.google.com/spreadsheets/d/{EXCLUDE_SHEET_ID}/gviz/tq?tqx=out:csv&sheet={EXCLUDE_SHEET_NAME}'
 
-   #instantiate synapse client
-   syn = synapseclient.Synapse()
-
-   try:
-      syn.login(authToken=SYN_PAT)
-   except synapseclient.core.exceptions.SynapseNoCredentialsError:
-      print("Please fill in 'username' and 'password'/'api_key' values in .synapseConfig.")
-   except synapseclient.core.exceptions.SynapseAuthenticationError:
-      print("Please make sure the credentials in the .synapseConfig file are correct.")
-
-   # instantiate BigQuery client
-   client = bigquery.Client()
+   return ingest.read_csv(url)
 
-   with open('./config.yaml', 'r') as file:
-      config = yaml.safe_load(file)
-   
-   center_map = config['centers']
-   clinical = config['clinical_attributes']
-   biospecimen = config['biospecimen_attributes']
-   assay_files = config['files']
 
-   id_prov = client.query("""
-      SELECT * FROM `htan-dcc.id_provenance.upstream_ids`
+def get_released_entities(client):
+   '''
+   Get Synapse IDs of all released files
+   '''
+   return client.query("""
+      SELECT DISTINCT entityId FROM `htan-dcc.released.entities`
    """).result().to_dataframe()
 
-   # Get manifest and file exclusion list
-   SHEET_ID = '1tUOd0kiQfW-cjnTbX24Tso5Gnq42k7sKQZLCLFLxBCA'
-   SHEET_NAME = 'current'
-   url = f'https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet={SHEET_NAME}'
 
-   exclude = pd.read_csv(url)
-   exclude_files = list(exclude['file id'])
-   exclude_manifests = list(exclude['manifest id'])
+def get_manifests(syn, center_map, manifest_columns, fileview_rows):
+   '''
+   Download manifests, keeping only manifest_columns if given
+   '''
+   return GetManifests(syn, center_map, columns=manifest_columns,
+      manifests=manifest_rows(fileview_rows))
 
-   # Get Synapse IDs of all released files
-   released_entities = client.query("""
-      SELECT * FROM `htan-dcc.released.entities`
-   """).result().to_dataframe()
 
-   exclude_files = exclude_files + list(released_entities['entityId'])
+def get_fileview(syn):
+   '''
+   Refresh the local replica of the HTAN Fileview, excluding test 
+   center projects, and index its files
+   '''
+   fileview_rows = FileviewReplica(syn).refresh()
 
-   # Query HTAN Fileview excluding test center projects
-   fileview = syn.tableQuery("SELECT id, currentVersion\
-      FROM syn20446927 WHERE type = 'file' \
-      AND projectId NOT IN \
-      ('syn21989705','syn20977135','syn20687304','syn32596076','syn52929270')"
-      ).asDataFrame()
+   return fileview_rows, FileviewSnapshot(fileview_rows)
 
-   # Pull tables from Synapse
-   meta_map, extra_cols = GetManifests(syn, center_map)
-   parent_ids = GetParentIds(meta_map)
-   file_list = FullFileList(meta_map, assay_files)
 
-   # Filter out released files and those in datasets we will exclude from release
-   sub = 'entityId not in @exclude_files and Manifest_Id not in @exclude_manifests'
-   releasable = file_list.query(sub)
+def get_releasable(file_list, catalog):
+   '''
+   Filter out released files and those in datasets we will exclude from release
+   '''
+   rows = catalog.query("""
+      SELECT f._row FROM files f
+      LEFT JOIN (
+         SELECT DISTINCT id, true AS hit FROM (
+            SELECT entityId AS id FROM released
+            UNION ALL SELECT id FROM excluded_files)
+      ) x ON f.entityId IS NOT DISTINCT FROM x.id
+      LEFT JOIN (
+         SELECT DISTINCT id, true AS hit FROM excluded_manifests
+      ) m ON f.Manifest_Id IS NOT DISTINCT FROM m.id
+      WHERE x.hit IS NULL AND m.hit IS NULL
+      ORDER BY f._row
+   """, files=row_keys(file_list, ['entityId', 'Manifest_Id']))
 
-   # Validate files
-   print( '' )
-   print( ' Running validation checks ' )
-   print( '' )
+   return file_list.iloc[rows['_row']]
 
-   e_id_unique = htan_id_unique(file_list, releasable)
-   e_id_regex = htan_id_regex(releasable)
-   e_basename_regex = basename_regex(releasable)
-   e_exist_syn = entity_exists(fileview, releasable)
-   e_adj_bios = adjacent_bios(meta_map, id_prov)
-   e_unique_bios = unique_bios(meta_map, id_prov)
-   e_unique_demo = unique_demographics(meta_map, id_prov)
-   e_parents = parents_exist(releasable,parent_ids)
 
+def check_channel_files(syn, releasable, meta_map, center_map, resolver):
    img_new = releasable[releasable['Component'] == 'ImagingLevel2']
-   channel_aux_files, e_missing_channel = get_channel_files(
-      syn, img_new, meta_map['ImagingLevel2'], center_map
+
+   return get_channel_files(
+      syn, img_new, meta_map['ImagingLevel2'], center_map, resolver
    )
 
-   # alias and unique basename checks only for awareness
-   # not blockers for release
-   # e_alias = check_alias(syn, entities_to_release) 
-   # e_name_unique = file_name_unique(file_list, releasable)
 
-   # hash check currently not implemented- too computationally intensive
-   #e_hash = check_hash(syn, releasable) 
+def check_file_hashes(syn, releasable, file_handles):
+   return check_hash(
+      syn, releasable, HashVerifier(SynapseFileStore(syn, file_handles))
+   )
 
-   errors = [e_id_unique, e_id_regex, e_basename_regex, 
-      e_exist_syn, e_adj_bios, e_parents, e_missing_channel]
 
-   merged = {}
-   for d in errors:
-      for k, v in d.items():
-         if k not in merged:
-            merged[k] = []
-         merged[k].append(v)
+def merge_errors(releasable, e_id_unique, e_id_regex, e_basename_regex, 
+   e_exist_syn, e_adj_bios, e_parents, e_missing_channel,
+   e_unique_bios, e_unique_demo, w_alias, w_name_unique):
+   '''
+   Combine errors from all validation checks and attach the file errors
+   to releasable files. Warnings are kept in errors but not attached
+   '''
+   errors = concat_errors([e_id_unique, e_id_regex, e_basename_regex, 
+      e_exist_syn, e_adj_bios, e_parents, e_missing_channel,
+      e_unique_bios, e_unique_demo, w_alias, w_name_unique])
 
-   errors_all = pd.DataFrame(list(merged.items()),
-      columns=['entityId','Errors']
-   )
+   print('Entities with errors by check:')
+   print(count_errors(errors).to_string())
 
-   releasable = releasable.merge(errors_all, on='entityId', how='left')
+   validated = releasable.merge(aggregate_errors(errors), 
+      on='entityId', how='left')
 
-   print( '' )
-   print( ' Generating validation output lists ' )
-   print( '' )
+   return errors, validated
 
-   # generate output of non-data-model columns in current release manifests
+
+def load_extra_cols(loader, extra_cols):
+   '''
+   Generate output of non-data-model columns in current release manifests
+   '''
    records = []
    for key, value in extra_cols.items():
       for item in value:
          records.append({'Manifest_Id': key, 'column_name': item})
 
-   load_bq(client, bq_project, bq_dataset, 'extra_cols', pd.DataFrame(records))
+   loader.submit(BQ_DATASET, 'extra_cols', 
+      pd.DataFrame(records, columns=['Manifest_Id', 'column_name']))
+
 
-   # Subset releasable files with no errors
-   new_release = releasable[releasable['Errors'].isnull()].sort_values(
+def release_lists(client, syn, fileview, center_map, validated, meta_map, 
+   id_prov, clinical, biospecimen, resolver, loader):
+   '''
+   Subset releasable files with no errors and generate release lists
+   '''
+   new_release = validated[validated['Errors'].isnull()].sort_values(
       by=['HTAN Center','Component']).drop(columns=['Errors'], 
       axis=1)
    
    bq_release_lists(client, syn, fileview, center_map, new_release, 
-      meta_map, id_prov, clinical, biospecimen)
+      meta_map, id_prov, clinical, biospecimen, resolver, loader=loader)
 
-   # Create list of files with errors
-   error_list = releasable[~(releasable['Errors'].isnull())].sort_values(
+
+def load_errors(loader, validated):
+   '''
+   Create list of files with errors
+   '''
+   error_list = validated[~(validated['Errors'].isnull())].sort_values(
       by=['HTAN Center','Component'])
    
-   load_bq(client, bq_project, bq_dataset, 'errors', error_list)
+   loader.submit(BQ_DATASET, 'errors', error_list)
 
+   return error_list
 
-   # Generate list of errors containing duplicate bios/case IDs
-   dup_bios = pd.DataFrame(list(e_unique_bios.items()),
-      columns=['entityId','Errors'])
-   dup_demo = pd.DataFrame(list(e_unique_demo.items()),
-      columns=['entityId','Errors'])
 
-   df_cb_errors = pd.concat([dup_bios,dup_demo])
+def load_clin_bio_errors(loader, validated, errors):
+   '''
+   Generate list of errors containing duplicate bios/case IDs
+   '''
+   df_cb_errors = errors[errors['code'].isin(CLIN_BIO_CODES)]
 
-   subset_cb_errors = releasable[['entityId','HTAN Center']].merge(
-      df_cb_errors, on='entityId', how='inner')[['HTAN Center','Errors']]
+   subset_cb_errors = validated[['entityId','HTAN Center']].merge(
+      df_cb_errors[['entityId','message']].rename(columns={'message': 'Errors'}), 
+      on='entityId', how='inner')[['HTAN Center','Errors']]
 
    subset_cb_errors = subset_cb_errors.loc[
       subset_cb_errors.astype(str).drop_duplicates().index]
 
-   load_bq(client, bq_project, bq_dataset, 'clin_bio_errors', subset_cb_errors)
-   
-   # Create table showing release candidates and exclusions
-   man_rem_files = list(exclude['file id'])
-   man_rem_mani = list(exclude['manifest id'])
-   error_rem = list(error_list['entityId'])
-   clin_bio_rem = list(df_cb_errors['entityId'])
-   values = released_entities["entityId"]
-    
-   not_released = file_list.query("entityId not in @values") 
-   not_released["Exclusion_Reason"] = "Not Released; Candidate for Release"
-   not_released["Exclusion_Reason"] = not_released["Exclusion_Reason"].case_when([
-        (not_released['entityId'].isin(error_rem), "Automatically Excluded by Validation Checks, See: htan-dcc.data_release.errors"),
-        (not_released['entityId'].isin(clin_bio_rem), "Automatically Excluded As Clinical/Bio Error, See: htan-dcc.data_release.clin_bio_errors"),
-        (not_released['entityId'].isin(man_rem_files), "Manually Excluded File, See: https://docs.google.com/spreadsheets/d/1tUOd0kiQfW-cjnTbX24Tso5Gnq42k7sKQZLCLFLxBCA/edit#gid=688638089"), 
-        (not_released['Manifest_Id'].isin(man_rem_mani), "Manually Excluded Manifest, See: https://docs.google.com/spreadsheets/d/1tUOd0kiQfW-cjnTbX24Tso5Gnq42k7sKQZLCLFLxBCA/edit#gid=688638089")])
-
-   load_bq(client, bq_project, bq_dataset, 'not_released_or_excluded', not_released)
+   loader.submit(BQ_DATASET, 'clin_bio_errors', subset_cb_errors)
+
+   return df_cb_errors
+
+
+def load_warnings(loader, releasable, errors, w_hash):
+   '''
+   Create list of releasable files with warnings from the awareness checks
+   and the hash check
+   '''
+   warnings = concat_errors([errors, w_hash])
+   warnings = warnings[warnings['severity'] == 'warning']
+
+   warning_list = releasable[['entityId','HTAN Center','Component']].merge(
+      warnings[['entityId','code','message']].rename(
+         columns={'code': 'Check', 'message': 'Warning'}),
+      on='entityId', how='inner').sort_values(
+         by=['HTAN Center','Component'], kind='stable')
+
+   loader.submit(BQ_DATASET, 'warnings', warning_list)
+
+
+def load_not_released(loader, file_list, catalog, error_list, df_cb_errors):
+   '''
+   Create table showing release candidates and exclusions
+   '''
+   # reasons in order of precedence
+   not_released = catalog.query("""
+      SELECT f._row, CASE
+         WHEN e.hit THEN 'Automatically Excluded by Validation Checks, See: htan-dcc.data_release.errors'
+         WHEN c.hit THEN 'Automatically Excluded As Clinical/Bio Error, See: htan-dcc.data_release.clin_bio_errors'
+         WHEN x.hit THEN 'Manually Excluded File, See: https://docs.google.com/spreadsheets/d/1tUOd0kiQfW-cjnTbX24Tso5Gnq42k7sKQZLCLFLxBCA/edit#gid=688638089'
+         WHEN m.hit THEN 'Manually Excluded Manifest, See: https://docs.google.com/spreadsheets/d/1tUOd0kiQfW-cjnTbX24Tso5Gnq42k7sKQZLCLFLxBCA/edit#gid=688638089'
+         ELSE 'Not Released; Candidate for Release'
+      END AS Exclusion_Reason
+      FROM files f
+      LEFT JOIN (SELECT DISTINCT entityId AS id, true AS hit FROM released) r 
+         ON f.entityId IS NOT DISTINCT FROM r.id
+      LEFT JOIN (SELECT DISTINCT entityId AS id, true AS hit FROM errors) e 
+         ON f.entityId IS NOT DISTINCT FROM e.id
+      LEFT JOIN (SELECT DISTINCT entityId AS id, true AS hit FROM clin_bio) c 
+         ON f.entityId IS NOT DISTINCT FROM c.id
+      LEFT JOIN (SELECT DISTINCT id, true AS hit FROM excluded_files) x 
+         ON f.entityId IS NOT DISTINCT FROM x.id
+      LEFT JOIN (SELECT DISTINCT id, true AS hit FROM excluded_manifests) m 
+         ON f.Manifest_Id IS NOT DISTINCT FROM m.id
+      WHERE r.hit IS NULL
+      ORDER BY f._row
+   """, files=row_keys(file_list, ['entityId', 'Manifest_Id']),
+      errors=error_list[['entityId']], clin_bio=df_cb_errors[['entityId']])
+
+   not_released = file_list.iloc[not_released['_row']].assign(
+      Exclusion_Reason=not_released['Exclusion_Reason'].values)
+
+   loader.submit(BQ_DATASET, 'not_released_or_excluded', not_released)
+
+
+# Pipeline stages with declared inputs and outputs. Stages whose inputs
+# are available run concurrently, e.g. the Synapse and BigQuery fetches
+# overlap and the validation checks run side by side. Expensive stages
+# are checkpointed so a retried execution resumes after them.
+STAGES = [
+   Stage('id_provenance', get_id_provenance, ['client'], ['id_prov', 'prov_index']),
+   Stage('exclusions', get_exclusions, [], ['exclude']),
+   Stage('released_entities', get_released_entities, ['client'], ['released_entities']),
+   Stage('fileview', get_fileview, ['syn'], 
+      ['fileview_rows', 'fileview'], checkpoint=True),
+   Stage('manifests', get_manifests, 
+      ['syn', 'center_map', 'manifest_columns', 'fileview_rows'], 
+      ['meta_map', 'extra_cols'], checkpoint=True),
+   Stage('parent_ids', GetParentIds, ['meta_map'], ['parent_ids'], checkpoint=True),
+   Stage('file_list', FullFileList, 
+      ['meta_map', 'assay_files'], ['file_list'], checkpoint=True),
+   Stage('catalog', ReleaseCatalog, 
+      ['fileview_rows', 'released_entities', 'exclude', 'id_prov'], ['catalog']),
+   Stage('file_handles', FileHandleFetcher, ['syn', 'fileview_rows'], ['file_handles']),
+   Stage('releasable', get_releasable, 
+      ['file_list', 'catalog'], ['releasable'], checkpoint=True),
+
+   # validation checks
+   Stage('htan_id_unique', htan_id_unique, 
+      ['file_list', 'releasable'], ['e_id_unique'], checkpoint=True),
+   Stage('htan_id_regex', htan_id_regex, ['releasable'], ['e_id_regex'], checkpoint=True),
+   Stage('basename_regex', basename_regex, 
+      ['releasable'], ['e_basename_regex'], checkpoint=True),
+   Stage('entity_exists', entity_exists, 
+      ['fileview', 'releasable'], ['e_exist_syn'], checkpoint=True),
+   Stage('adjacent_bios', adjacent_bios, 
+      ['meta_map', 'prov_index'], ['e_adj_bios'], checkpoint=True),
+   Stage('unique_bios', unique_bios, 
+      ['meta_map', 'prov_index'], ['e_unique_bios'], checkpoint=True),
+   Stage('unique_demographics', unique_demographics,
+      ['meta_map', 'prov_index'], ['e_unique_demo'], checkpoint=True),
+   Stage('parents_exist', parents_exist, 
+      ['releasable', 'parent_ids'], ['e_parents'], checkpoint=True),
+   Stage('channel_files', check_channel_files, 
+      ['syn', 'releasable', 'meta_map', 'center_map', 'resolver'],
+      ['channel_aux_files', 'e_missing_channel'], checkpoint=True),
+
+   # alias and unique basename checks only for awareness
+   # not blockers for release
+   Stage('check_alias', check_alias, 
+      ['file_handles', 'releasable'], ['w_alias'], checkpoint=True),
+   Stage('file_name_unique', file_name_unique, 
+      ['file_list', 'releasable'], ['w_name_unique'], checkpoint=True),
+
+   # streams and hashes new file handles within a per-run budget;
+   # mismatches are warnings, so release lists do not wait for it
+   Stage('check_hash', check_file_hashes, 
+      ['syn', 'releasable', 'file_handles'], ['w_hash'], checkpoint=True),
+
+   Stage('merge_errors', merge_errors, 
+      ['releasable', 'e_id_unique', 'e_id_regex', 'e_basename_regex', 
+      'e_exist_syn', 'e_adj_bios', 'e_parents', 'e_missing_channel', 
+      'e_unique_bios', 'e_unique_demo', 'w_alias', 'w_name_unique'], 
+      ['errors', 'validated'], checkpoint=True),
+
+   # outputs
+   Stage('extra_cols', load_extra_cols, ['loader', 'extra_cols']),
+   Stage('release_lists', release_lists, 
+      ['client', 'syn', 'fileview', 'center_map', 'validated', 'meta_map', 
+      'id_prov', 'clinical', 'biospecimen', 'resolver', 'loader']),
+   Stage('errors', load_errors, ['loader', 'validated'], ['error_list']),
+   Stage('warnings', load_warnings, ['loader', 'releasable', 'errors', 'w_hash']),
+   Stage('clin_bio_errors', load_clin_bio_errors, 
+      ['loader', 'validated', 'errors'], ['df_cb_errors']),
+   Stage('not_released_or_excluded', load_not_released, 
+      ['loader', 'file_list', 'catalog', 'error_list', 'df_cb_errors'])
+]
+
+
+def main(args):
+
+   bq_project = 'htan-dcc'
+
+   SYN_PAT = os.environ.get('SYNAPSE_AUTH_TOKEN')
+
+   #instantiate synapse client
+   syn = synapseclient.Synapse()
+
+   try:
+      syn.login(authToken=SYN_PAT)
+   except synapseclient.core.exceptions.SynapseNoCredentialsError:
+      print("Please fill in 'username' and 'password'/'api_key' values in .synapseConfig.")
+   except synapseclient.core.exceptions.SynapseAuthenticationError:
+      print("Please make sure the credentials in the .synapseConfig file are correct.")
+
+   # instantiate BigQuery client
+   client = bigquery.Client()
+   loader = BigQueryLoader(client, bq_project)
+
+   with open('./config.yaml', 'r') as file:
+      config = yaml.safe_load(file)
+
+   metrics = RunMetrics()
+
+   context = {
+      'syn': syn,
+      'client': client,
+      'loader': loader,
+      # shared by channel file validation and release list generation
+      'resolver': SynapsePathResolver(syn),
+      'center_map': config['centers'],
+      'clinical': config['clinical_attributes'],
+      'biospecimen': config['biospecimen_attributes'],
+      'assay_files': config['files'],
+      'manifest_columns': None if args.full_manifests else MANIFEST_COLUMNS
+   }
+
+   checkpoints = CheckpointStore()
+   checkpoints.prune()
+   if args.no_resume:
+      checkpoints.clear()
+      checkpoints = CheckpointStore()
+
+   try:
+      StageRunner(STAGES, checkpoints=checkpoints, metrics=metrics).run(context)
+
+      # wait for all BigQuery loads; fails the job if any load failed
+      with metrics.stage('bq_loads') as counts:
+         counts['tables'] = len(loader.wait())
+   finally:
+      # stage metrics are loaded even if a stage failed, with their own
+      # loader so failed loads of other tables do not block them
+      metrics_loader = BigQueryLoader(client, bq_project)
+      metrics.load(metrics_loader)
+      metrics_loader.wait()
+
+   # run completed, a later execution today starts from scratch
+   checkpoints.clear()
 
    print( '' )
    print( ' Done ' )
@@ -220,4 +393,16 @@ def main():
 
 if __name__ == "__main__":
 
-   main()
+   parser = argparse.ArgumentParser()
+
+   parser.add_argument('--no-resume', 
+      action='store_true',
+      help = 'Ignore checkpoints from an earlier execution today and start from scratch')
+
+   parser.add_argument('--full-manifests', 
+      action='store_true',
+      help = 'Keep every manifest column in memory instead of only those used by the release stages')
+
+   args = parser.parse_args()
+
+   main(args)
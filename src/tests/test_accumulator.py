@@ -0,0 +1,52 @@
+import pandas as pd
+
+from validation.accumulator import ComponentAccumulator, compact, concat
+
+
+def test_components_are_concatenated_in_order_of_addition():
+
+    components = ComponentAccumulator()
+    components.add('Biospecimen', pd.DataFrame({'HTAN Biospecimen ID': ['a'], 'Manifest_Id': ['syn1']}))
+    components.add('Demographics', pd.DataFrame({'HTAN Participant ID': ['p']}))
+    components.add('Biospecimen', pd.DataFrame({'Storage Method': ['FFPE'],
+        'HTAN Biospecimen ID': ['b'], 'Manifest_Id': ['syn2']}))
+
+    assert 'Biospecimen' in components and 'Other' not in components
+
+    meta_map = components.to_dict()
+
+    assert list(meta_map) == ['Biospecimen', 'Demographics']
+    bios = meta_map['Biospecimen']
+    assert list(bios.columns) == ['HTAN Biospecimen ID', 'Manifest_Id', 'Storage Method']
+    assert bios['HTAN Biospecimen ID'].tolist() == ['a', 'b']
+    assert bios['Storage Method'].isna().tolist() == [True, False]
+    assert bios.index.tolist() == [0, 1]
+
+
+
+def test_categorical_columns_survive_concatenation():
+
+    first = compact(pd.DataFrame({'Component': ['Biospecimen'], 'HTAN Center': ['A']}))
+    second = compact(pd.DataFrame({'Component': ['Demographics'], 'Other': ['x']}))
+
+    combined = concat([first, second])
+
+    # pd.concat alone gives object columns for differing categories
+    assert pd.concat([first, second])['Component'].dtype == object
+    assert isinstance(combined['Component'].dtype, pd.CategoricalDtype)
+    assert isinstance(combined['HTAN Center'].dtype, pd.CategoricalDtype)
+    assert combined['Other'].dtype == object
+    assert combined['Component'].tolist() == ['Biospecimen', 'Demographics']
+
+
+def test_materialize_converts_listed_columns_only():
+
+    frame = pd.DataFrame({'Component': ['Biospecimen'], 'Filename': ['a.fastq']})
+    components = ComponentAccumulator(categorical=['Component', 'File Format'])
+    components.add('Biospecimen', frame)
+
+    bios = components.materialize('Biospecimen')
+
+    assert isinstance(bios['Component'].dtype, pd.CategoricalDtype)
+    assert bios['Filename'].dtype == object
+    assert frame['Component'].dtype == object
@@ -0,0 +1,51 @@
+import os
+import pandas as pd
+import pytest
+import yaml
+
+from types import SimpleNamespace
+from benchmarks.fakes import FakeBigQuery
+from benchmarks.run import run_scale
+from benchmarks.synthetic import generate
+
+
+@pytest.fixture(scope='module')
+def config():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.yaml'), 'r') as f:
+        return yaml.safe_load(f)
+
+
+def test_generate_is_reproducible_and_scales(config):
+
+    small = generate(config, 0.1, seed=1)
+    again = generate(config, 0.1, seed=1)
+    large = generate(config, 0.3, seed=1)
+
+    # manifest etags are random
+    assert small.fileview().drop(columns=['etag']).equals(again.fileview().drop(columns=['etag']))
+    assert len(small.manifests) < len(large.manifests)
+    assert small.fileview()['id'].is_unique
+    assert set(small.projects) == set(c['synapse_id'] for c in config['centers'].values())
+
+
+def test_fake_bigquery_serves_tables_by_reference(config):
+
+    client = FakeBigQuery(generate(config, 0.1).tables())
+
+    released = client.query('SELECT * FROM `htan-dcc.released.entities`').result().to_dataframe()
+    assert 'entityId' in released.columns
+
+    with pytest.raises(KeyError):
+        client.query('SELECT * FROM `htan-dcc.released.unknown`')
+
+
+def test_benchmark_runs_every_stage(config):
+
+    results = []
+    run_scale(config, 0.2, SimpleNamespace(manifests=20, files=10, biospecimens=100,
+        latency=0.0), results)
+
+    results = pd.DataFrame(results)
+    assert {'generate', 'GetManifests (cold)', 'GetManifests (warm)', 'check_hash (warm)',
+        'bq_release_lists'} <= set(results['stage'])
+    assert results['seconds'].notna().all()
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from benchmarks.fakes import FakeBigQuery
+from validation.bq_loader import BigQueryLoader
+
+
+class FailingBigQuery(FakeBigQuery):
+    """
+    Client whose loads to `failing` tables raise
+    """
+
+    def __init__(self, failing):
+        super().__init__({})
+        self.failing = failing
+
+
+    def load_table_from_dataframe(self, data, table_id, job_config=None):
+        if table_id in self.failing:
+            raise ValueError('403 Access Denied')
+        return super().load_table_from_dataframe(data, table_id, job_config)
+
+
+def test_wait_returns_metrics_of_every_load():
+
+    client = FakeBigQuery({})
+    loader = BigQueryLoader(client, workers=2)
+
+    loader.submit('data_release', 'errors', pd.DataFrame({
+        'HTAN Center': ['HTAN OHSU', 'HTAN HTAPP'], 'Manifest Version': ['1', None]}),
+        schema=[{'name': 'HTAN_Center', 'type': 'string'},
+            {'name': 'Manifest_Version', 'type': 'integer'}])
+    loader.submit('data_release', 'extra_cols', pd.DataFrame({'Manifest_Id': ['syn1']}))
+
+    metrics = loader.wait()
+
+    assert [(m['table'], m['rows'], m['error']) for m in metrics] == [
+        ('htan-dcc.data_release.errors', 2, None),
+        ('htan-dcc.data_release.extra_cols', 1, None)
+    ]
+    assert all(m['seconds'] is not None and m['bytes'] > 0 for m in metrics)
+
+    # columns are renamed for BigQuery and cast to the schema types
+    errors = client.loaded['htan-dcc.data_release.errors']
+    assert list(errors.columns) == ['HTAN_Center', 'Manifest_Version']
+    assert str(errors['Manifest_Version'].dtype) == 'Int64'
+    assert str(errors['HTAN_Center'].dtype) == 'string'
+
+    # nothing left to wait for
+    assert loader.wait() == []
+
+
+def test_wait_raises_after_all_loads_finish():
+
+    client = FailingBigQuery({'htan-dcc.data_release.errors'})
+    loader = BigQueryLoader(client)
+
+    loader.submit('data_release', 'errors', pd.DataFrame({'a': ['1']}))
+    loader.submit('data_release', 'shortlist', pd.DataFrame({'a': ['1']}))
+
+    with pytest.raises(RuntimeError, match='data_release.errors'):
+        loader.wait()
+
+    assert list(client.loaded) == ['htan-dcc.data_release.shortlist']
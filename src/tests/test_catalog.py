@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from release import get_releasable
+from validation.catalog import ReleaseCatalog
+
+
+FILES = pd.DataFrame({
+    'entityId': ['syn1', 'syn2', 'syn3', 'syn4'],
+    'Manifest_Id': ['syn10', 'syn10', 'syn20', 'syn20']
+})
+
+
+def catalog(exclude):
+    return ReleaseCatalog(pd.DataFrame({'id': ['syn1'], 'currentVersion': [1]}),
+        pd.DataFrame({'entityId': ['syn2']}), exclude,
+        pd.DataFrame({'id': [], 'upstream_ids': []}))
+
+
+@pytest.mark.parametrize('exclude, expected', [
+    # blank columns come back from the sheet as float64
+    (pd.DataFrame({'file id': [np.nan], 'manifest id': [np.nan]}), ['syn1', 'syn3', 'syn4']),
+    (pd.DataFrame({'file id': ['syn1', np.nan], 'manifest id': [np.nan, np.nan]}), ['syn3', 'syn4']),
+    (pd.DataFrame({'file id': [np.nan, np.nan], 'manifest id': ['syn20', np.nan]}), ['syn1']),
+])
+def test_blank_exclusion_columns(exclude, expected):
+
+    assert get_releasable(FILES, catalog(exclude))['entityId'].tolist() == expected
@@ -0,0 +1,54 @@
+import pytest
+
+from validation.checkpoint import CheckpointStore
+from validation.stages import Stage, StageRunner
+
+
+def stages(calls, fail):
+
+    def fileview():
+        calls.append('fileview')
+        return ['syn1', 'syn2']
+
+    def validate(ids):
+        calls.append('validate')
+        if fail:
+            raise RuntimeError('Synapse unavailable')
+        return len(ids)
+
+    return [
+        Stage('fileview', fileview, [], ['ids'], checkpoint=True),
+        Stage('validate', validate, ['ids'], ['n'], checkpoint=True)
+    ]
+
+
+def test_failed_run_resumes_from_checkpoint(tmp_path):
+
+    calls = []
+    with pytest.raises(RuntimeError):
+        StageRunner(stages(calls, fail=True),
+            checkpoints=CheckpointStore(str(tmp_path), '2024-01-01')).run({})
+
+    assert calls == ['fileview', 'validate']
+
+    # a retried execution on the same day skips the completed stage
+    calls = []
+    context = StageRunner(stages(calls, fail=False),
+        checkpoints=CheckpointStore(str(tmp_path), '2024-01-01')).run({})
+
+    assert calls == ['validate']
+    assert context['ids'] == ['syn1', 'syn2']
+    assert context['n'] == 2
+
+
+def test_checkpoints_of_other_days_are_not_used(tmp_path):
+
+    calls = []
+    StageRunner(stages(calls, fail=False),
+        checkpoints=CheckpointStore(str(tmp_path), '2024-01-01')).run({})
+
+    calls = []
+    StageRunner(stages(calls, fail=False),
+        checkpoints=CheckpointStore(str(tmp_path), '2024-01-02')).run({})
+
+    assert calls == ['fileview', 'validate']
@@ -0,0 +1,83 @@
+import os
+import time
+import pandas as pd
+import pytest
+
+from validation import descriptions
+from validation.descriptions import DescriptionCatalog, UNAVAILABLE, load_supplemental
+
+
+SHEET = pd.DataFrame({'Attribute': ['Manifest_Id'], 'Description': ['Synapse ID of the manifest']})
+
+
+@pytest.fixture
+def sheet(tmp_path, monkeypatch):
+    """
+    Serve the supplemental sheet locally, counting downloads; set
+    `available` to False to make downloads fail
+    """
+
+    read_csv = descriptions.ingest.read_csv
+    state = {'downloads': 0, 'available': True}
+
+    def fake_read_csv(source, backend=None):
+        if source != descriptions.SHEET_URL:
+            return read_csv(source, backend)
+        state['downloads'] += 1
+        if not state['available']:
+            raise ConnectionError('sheet unavailable')
+        return SHEET.copy()
+
+    monkeypatch.setattr(descriptions.ingest, 'read_csv', fake_read_csv)
+    monkeypatch.setenv('HTAN_DESCRIPTION_CACHE', str(tmp_path / 'cache' / 'descriptions.csv'))
+
+    return state
+
+
+def age(path, seconds):
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_fresh_copy_is_reused(sheet, tmp_path):
+
+    load_supplemental()
+    assert (tmp_path / 'cache' / 'descriptions.csv').exists()
+
+    supplemental = load_supplemental()
+
+    assert sheet['downloads'] == 1
+    assert supplemental['Attribute'].tolist() == ['Manifest_Id']
+
+
+def test_stale_copy_is_downloaded_again(sheet, tmp_path):
+
+    load_supplemental()
+    age(tmp_path / 'cache' / 'descriptions.csv', 2 * 86400)
+
+    load_supplemental()
+
+    assert sheet['downloads'] == 2
+
+
+def test_stale_copy_is_used_when_the_sheet_is_unavailable(sheet, tmp_path):
+
+    load_supplemental(ttl=0)
+    sheet['available'] = False
+
+    assert load_supplemental(ttl=0)['Attribute'].tolist() == ['Manifest_Id']
+
+    os.remove(tmp_path / 'cache' / 'descriptions.csv')
+    with pytest.raises(ConnectionError):
+        load_supplemental(ttl=0)
+
+
+def test_catalog_looks_up_data_model_then_supplemental_sheet(sheet):
+
+    catalog = DescriptionCatalog.from_sources(pd.DataFrame({
+        'Attribute': ['HTAN Center', 'Component'], 'Description': ['Center name', 'x' * 2000]}))
+
+    assert catalog.get('HTAN_Center') == 'Center name'
+    assert len(catalog.get('Component')) == 1024
+    assert catalog.get('Manifest_Id') == 'Synapse ID of the manifest'
+    assert catalog.get('Unknown') == UNAVAILABLE
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from validation.errors import ERROR_COLUMNS, aggregate_errors, concat_errors, count_errors, error_table
+
+
+def test_error_table_aligns_messages_with_entities():
+
+    errors = error_table(pd.Series(['syn1', 'syn2'], index=[5, 9]), 'code',
+        pd.Series(['a', 'b'], index=[0, 1]), context='shared')
+
+    assert list(errors.columns) == ERROR_COLUMNS
+    assert errors.values.tolist() == [
+        ['syn1', 'code', 'error', 'a', 'shared'],
+        ['syn2', 'code', 'error', 'b', 'shared']]
+
+
+def test_concat_errors_keeps_identical_errors_once():
+
+    errors = concat_errors([
+        error_table(['syn1', 'syn1'], 'a', 'same message'),
+        error_table(['syn1', 'syn2'], 'a', ['same message', 'same message'], context=['x', 'y']),
+        error_table(['syn1'], 'b', 'same message')
+    ])
+
+    assert errors[['entityId', 'code']].values.tolist() == [
+        ['syn1', 'a'], ['syn2', 'a'], ['syn1', 'b']]
+
+
+def test_concat_errors_of_nothing_has_error_columns():
+
+    assert list(concat_errors([]).columns) == ERROR_COLUMNS
+
+
+def test_aggregate_errors_keeps_every_message_in_order():
+
+    errors = concat_errors([
+        error_table(['syn1', 'syn2'], 'htan_id_format', ['first', 'other']),
+        error_table(['syn1'], 'basename_charset', 'second'),
+        error_table(['syn1'], 'basename_charset', 'third', severity='warning'),
+        error_table(['syn3'], 'unique_bios', 'clinical')
+    ])
+
+    aggregated = aggregate_errors(errors)
+
+    assert aggregated.values.tolist() == [['syn1', ['first', 'second']], ['syn2', ['other']]]
+    assert aggregate_errors(errors, severity='warning')['Errors'].tolist() == [['third']]
+    assert count_errors(errors).to_dict() == {
+        ('error', 'basename_charset'): 1, ('error', 'htan_id_format'): 2,
+        ('error', 'unique_bios'): 1, ('warning', 'basename_charset'): 1}
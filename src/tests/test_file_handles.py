@@ -0,0 +1,34 @@
+import pandas as pd
+
+from benchmarks.fakes import FakeSynapse
+from benchmarks.synthetic import SyntheticData
+from validation.file_handles import FileHandleFetcher
+from validation.fileview import FileviewReplica
+
+
+def test_handles_are_fetched_once_per_entity_version(tmp_path):
+
+    data = SyntheticData()
+    data.files = [{'id': 'syn%d' % i, 'currentVersion': 1} for i in range(100, 350)]
+    syn = FakeSynapse(data)
+    fileview = FileviewReplica(syn, str(tmp_path / 'fileview')).refresh()
+    cache_path = str(tmp_path / 'file_handles.parquet')
+
+    handles = FileHandleFetcher(syn, fileview, cache_path, batch_size=100).handles(
+        fileview['id'])
+
+    assert syn.calls['restPOST'] == 3
+    assert handles['fileName'].notna().all()
+
+    # a later run reads unchanged versions from the cache
+    syn.calls.clear()
+    cached = FileHandleFetcher(syn, fileview, cache_path).handles(fileview['id'])
+
+    assert syn.calls['restPOST'] == 0
+    pd.testing.assert_frame_equal(cached, handles, check_dtype=False)
+
+    # a new version is fetched again
+    fileview.loc[fileview['id'] == 'syn100', 'currentVersion'] = 2
+    FileHandleFetcher(syn, fileview, cache_path).handles(['syn100', 'syn101'])
+
+    assert syn.calls['restPOST'] == 1
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from benchmarks.fakes import FakeSynapse
+from benchmarks.synthetic import SyntheticData
+from validation.fileview import FileviewReplica, FileviewSnapshot, FILEVIEW_COLUMNS
+
+
+def synthetic():
+    data = SyntheticData()
+    data.add_manifest('syn1', {'Filename': ['a.fastq']})
+    data.files = [{'id': 'syn%d' % i, 'currentVersion': 1} for i in range(100, 105)]
+    return data
+
+
+def test_replica_holds_only_files_and_replicated_columns(tmp_path):
+
+    syn = FakeSynapse(synthetic())
+    frame = FileviewReplica(syn, str(tmp_path)).refresh()
+
+    assert list(frame.columns) == FILEVIEW_COLUMNS
+    assert len(frame) == 6
+    assert FileviewSnapshot(frame).versions_for(['syn100', 'syn999']).tolist() == [1, pd.NA]
+
+
+def test_incremental_sync_runs_only_the_watermark_query(tmp_path):
+
+    data = synthetic()
+    syn = FakeSynapse(data)
+    FileviewReplica(syn, str(tmp_path)).refresh()
+    data.files = [f for f in data.files if f['id'] != 'syn102']
+    syn.calls.clear()
+
+    frame = FileviewReplica(syn, str(tmp_path)).refresh()
+
+    # deleted entities are kept until the next reconcile
+    assert syn.calls['tableQuery'] == 1
+    assert 'syn102' in set(frame['id'])
+
+
+def test_reconcile_drops_deleted_files(tmp_path):
+
+    data = synthetic()
+    syn = FakeSynapse(data)
+    FileviewReplica(syn, str(tmp_path)).refresh()
+
+    # deleted entities never show up among the modified rows
+    data.files = [f for f in data.files if f['id'] != 'syn102']
+
+    replica = FileviewReplica(syn, str(tmp_path), reconcile_days=0)
+    last_full_sync = replica.state['last_full_sync']
+    frame = replica.refresh()
+
+    assert replica.state['last_full_sync'] == last_full_sync
+    assert sorted(frame['id']) == sorted(['syn100', 'syn101', 'syn103', 'syn104', data.manifest_rows[0]['id']])
@@ -0,0 +1,113 @@
+import time
+import pandas as pd
+import pytest
+
+from benchmarks.fakes import FakeSynapse
+from benchmarks.synthetic import SyntheticData
+from validation.get_manifests import GetManifests
+from validation.manifest_store import ManifestStore
+
+
+CENTER_MAP = {'HTAN Center': {'center_id': 'hta1'}}
+
+
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+
+    # manifests are downloaded below ./cache
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr('validation.parallel.time.sleep', lambda seconds: None)
+
+    data = SyntheticData()
+    data.projects['syn1'] = 'HTAN Center'
+    for i in range(4):
+        data.add_manifest('syn1', {
+            'Component': ['Biospecimen'] * 2,
+            'HTAN Biospecimen ID': ['HTA1_1_%d' % (2 * i), 'HTA1_1_%d' % (2 * i + 1)],
+            'Storage Method': ['Frozen', 'FFPE']
+        })
+    return data
+
+
+def get_manifests(syn, data, **kwargs):
+    return GetManifests(syn, CENTER_MAP, ManifestStore('store'), data.schema(),
+        manifests=data.manifest_view(), **kwargs)
+
+
+def test_manifests_are_merged_in_fileview_order(data):
+
+    syn = FakeSynapse(data)
+    get = syn.get
+
+    # the most recently modified manifest is fetched last
+    def get_slowly(entity, **kwargs):
+        if entity == data.manifest_rows[-1]['id'] and kwargs.get('downloadFile', True):
+            time.sleep(0.2)
+        return get(entity, **kwargs)
+
+    syn.get = get_slowly
+    meta_map, extra_cols = get_manifests(syn, data)
+
+    bios = meta_map['Biospecimen']
+    manifest_ids = [m['id'] for m in reversed(data.manifest_rows)]
+    assert bios['Manifest_Id'].unique().tolist() == manifest_ids
+    assert bios['HTAN Biospecimen ID'].tolist() == \
+        ['HTA1_1_%d' % i for m in (3, 2, 1, 0) for i in (2 * m, 2 * m + 1)]
+    assert bios['HTAN Center'].eq('HTAN Center').all()
+    assert extra_cols == {}
+
+
+def test_downloads_are_retried(data):
+
+    syn = FakeSynapse(data)
+    get = syn.get
+    failed = set()
+
+    def get_flaky(entity, **kwargs):
+        if kwargs.get('downloadFile', True) and entity not in failed:
+            failed.add(entity)
+            raise ConnectionError('throttled')
+        return get(entity, **kwargs)
+
+    syn.get = get_flaky
+    meta_map, extra_cols = get_manifests(syn, data)
+
+    assert len(failed) == 4
+    assert len(meta_map['Biospecimen']) == 8
+
+
+def test_manifests_failing_every_retry_are_skipped(data):
+
+    syn = FakeSynapse(data)
+    get = syn.get
+    broken = data.manifest_rows[0]['id']
+
+    def get_broken(entity, **kwargs):
+        if entity == broken and kwargs.get('downloadFile', True):
+            raise ConnectionError('throttled')
+        return get(entity, **kwargs)
+
+    syn.get = get_broken
+    meta_map, extra_cols = get_manifests(syn, data)
+
+    assert broken not in set(meta_map['Biospecimen']['Manifest_Id'])
+    assert len(meta_map['Biospecimen']) == 6
+
+
+def test_lean_ingest_keeps_requested_columns_as_categoricals(data):
+
+    syn = FakeSynapse(data)
+    meta_map, extra_cols = get_manifests(syn, data, columns=['HTAN Biospecimen ID'])
+
+    bios = meta_map['Biospecimen']
+    assert 'Storage Method' not in bios.columns
+    assert {'HTAN Biospecimen ID', 'Component', 'Manifest_Id', 'HTAN Center'} <= set(bios.columns)
+    for column in ['Component', 'Manifest_Id', 'HTAN Center']:
+        assert isinstance(bios[column].dtype, pd.CategoricalDtype)
+
+    # the store keeps every column, so a full run needs no downloads
+    syn.calls.clear()
+    meta_map, extra_cols = get_manifests(syn, data)
+
+    assert 'Storage Method' in meta_map['Biospecimen'].columns
+    assert syn.calls['get'] == 1
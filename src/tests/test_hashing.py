@@ -0,0 +1,82 @@
+import time
+
+from benchmarks.fakes import FakeFileStore
+from validation.hashing import HashVerifier, HashCache
+
+
+ENTITIES = ['syn%d' % i for i in range(60000000, 60000200)]
+
+
+class SlowFileStore(FakeFileStore):
+    """
+    File store taking `delay` seconds per chunk, recording which
+    streams were closed before the end
+    """
+
+    def __init__(self, delay, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.closed = []
+
+
+    def stream(self, entity_id, file_handle_id):
+        try:
+            for chunk in super().stream(entity_id, file_handle_id):
+                time.sleep(self.delay)
+                yield chunk
+        except GeneratorExit:
+            self.closed.append(entity_id)
+            raise
+
+
+def test_mismatches_are_warnings_and_hashes_are_cached(tmp_path):
+
+    store = FakeFileStore(corrupt_rate=0.05)
+    cache = HashCache(str(tmp_path / 'hashes.json'))
+
+    warnings = HashVerifier(store, cache, byte_budget=float('inf'),
+        time_budget=60).verify(ENTITIES)
+
+    corrupt = [e for e in ENTITIES if store._corrupt(e)]
+    assert corrupt
+    assert sorted(warnings['entityId']) == sorted(corrupt)
+    assert set(warnings['severity']) == {'warning'}
+    assert store.calls['stream'] == len(ENTITIES)
+
+    # a later run reads every result from the persisted cache
+    store.calls.clear()
+    again = HashVerifier(store, HashCache(str(tmp_path / 'hashes.json')),
+        byte_budget=float('inf'), time_budget=60).verify(ENTITIES)
+
+    assert store.calls['stream'] == 0
+    assert sorted(again['entityId']) == sorted(corrupt)
+
+
+def test_byte_budget_leaves_files_for_later_runs(tmp_path):
+
+    store = FakeFileStore(corrupt_rate=0)
+    path = str(tmp_path / 'hashes.json')
+
+    HashVerifier(store, HashCache(path), byte_budget=50 * store.size,
+        time_budget=60).verify(ENTITIES)
+    assert store.calls['stream'] == 50
+
+    HashVerifier(store, HashCache(path), byte_budget=500 * store.size,
+        time_budget=60).verify(ENTITIES)
+    assert store.calls['stream'] == len(ENTITIES)
+
+
+def test_time_budget_abandons_files_being_streamed(tmp_path):
+
+    # each file takes 4 chunks x 0.5s to stream
+    store = SlowFileStore(0.5, size=64 * 1024, chunk_size=16 * 1024, corrupt_rate=1)
+    cache = HashCache(str(tmp_path / 'hashes.json'))
+
+    start = time.time()
+    warnings = HashVerifier(store, cache, workers=4, byte_budget=float('inf'),
+        time_budget=0.6).verify(ENTITIES[:20])
+
+    assert time.time() - start < 1.5
+    assert len(warnings) == 0
+    assert len(store.closed) == 4
+    assert cache.results == {}
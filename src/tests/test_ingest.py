@@ -0,0 +1,42 @@
+import io
+import numpy as np
+import pandas as pd
+
+from validation.ingest import read_csv, read_parquet
+
+
+def test_arrow_reads_match_pandas_values():
+
+    text = 'Component,Date,Count,Flag,Empty,Note\n' \
+        'a,2024-01-02,1,True,,NA\nb,2024-02-03,2,false,,text\n'
+
+    arrow = read_csv(io.BytesIO(text.encode()), backend='pyarrow')
+    native = read_csv(io.BytesIO(text.encode()), backend='pandas')
+
+    # ISO dates are read again as text instead of Arrow timestamps
+    assert arrow['Date'].tolist() == ['2024-01-02', '2024-02-03']
+    assert str(arrow['Component'].dtype) == 'string'
+    assert arrow['Empty'].dtype == np.float64 and arrow['Empty'].isna().all()
+
+    # same values, with <NA> in Arrow string columns where pandas has NaN
+    assert arrow.astype(object).where(arrow.notna(), None).values.tolist() == \
+        native.astype(object).where(native.notna(), None).values.tolist()
+
+
+def test_ragged_rows_fall_back_to_pandas(tmp_path):
+
+    path = tmp_path / 'manifest.csv'
+    path.write_text('Component,Filename,entityId\na,x.fastq\nb,y.fastq,syn2\n')
+
+    data = read_csv(str(path), backend='pyarrow')
+
+    assert data['Filename'].tolist() == ['x.fastq', 'y.fastq']
+    assert data['entityId'].isna().tolist() == [True, False]
+
+
+def test_parquet_round_trip_keeps_string_types(tmp_path):
+
+    data = read_csv(io.BytesIO(b'Component,Count\na,1\nb,\n'), backend='pyarrow')
+    data.to_parquet(tmp_path / 'data.parquet', index=False)
+
+    pd.testing.assert_frame_equal(read_parquet(tmp_path / 'data.parquet', backend='pyarrow'), data)
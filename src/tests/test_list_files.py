@@ -0,0 +1,42 @@
+import pandas as pd
+
+from validation.list_files import GetParentIds
+
+
+def meta_map():
+    return {
+        'BulkWESLevel1': pd.DataFrame({
+            'HTAN Data File ID': ['HTA1_1_100', ' HTA1_1_101 ', 'HTA1_1_102'],
+            'HTAN Parent Biospecimen ID': ['HTA1_1_1, HTA1_1_2;HTA1_1_3', 'HTA1_1_1', None],
+            'entityId': ['syn1', 'syn2', 'syn3'],
+            'Component': 'BulkWESLevel1'
+        }),
+        'Biospecimen': pd.DataFrame({
+            'HTAN Biospecimen ID': ['HTA1_1_1', 'HTA1_1_2', 'HTA1_1_2'],
+            'HTAN Parent ID': ['HTA1_1', 'Not Applicable', 'HTA1_1'],
+            'Component': 'Biospecimen'
+        }),
+        # manifests without any ID columns are skipped
+        'Other': pd.DataFrame({'Filename': ['a.txt']})
+    }
+
+
+def test_parent_ids_split_multi_id_cells():
+
+    edges = GetParentIds(meta_map())
+
+    assert list(edges.columns) == ['primaryId', 'parentId', 'entityId', 'Component']
+    assert edges.loc[edges['entityId'] == 'syn1', 'parentId'].tolist() == \
+        ['HTA1_1_1', 'HTA1_1_2', 'HTA1_1_3']
+    assert edges.loc[edges['entityId'] == 'syn2', 'primaryId'].tolist() == ['HTA1_1_101']
+    assert 'syn3' not in set(edges['entityId'])
+
+
+def test_parent_ids_drop_not_applicable_and_duplicates():
+
+    edges = GetParentIds(meta_map())
+    bios = edges[edges['Component'] == 'Biospecimen']
+
+    assert bios[['primaryId', 'parentId']].values.tolist() == [
+        ['HTA1_1_1', 'HTA1_1'], ['HTA1_1_2', 'HTA1_1']]
+    assert bios['entityId'].isna().all()
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from validation.manifest_store import ManifestStore
+
+
+def test_store_persists_between_runs(tmp_path):
+
+    data = pd.DataFrame({'Filename': ['a.fastq', 'b.fastq'], 'Component': ['BulkWESLevel1'] * 2})
+
+    store = ManifestStore(str(tmp_path))
+    store.put('syn1', 3, 'etag-3', data)
+    store.save()
+
+    # a later run finds the manifest unless its version or etag changed
+    store = ManifestStore(str(tmp_path))
+    cached = store.get('syn1', 3, 'etag-3')
+
+    assert cached.astype(object).equals(data.astype(object))
+    assert store.get('syn1', 4, 'etag-4') is None
+    assert store.get('syn1', 3, 'etag-other') is None
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == '.tmp'] == []
+
+
+def test_replacing_a_version_removes_the_old_copy(tmp_path):
+
+    store = ManifestStore(str(tmp_path))
+    store.put('syn1', 1, 'etag-1', pd.DataFrame({'Filename': ['a']}))
+    store.put('syn1', 2, 'etag-2', pd.DataFrame({'Filename': ['b']}))
+
+    assert sorted(p.name for p in tmp_path.glob('*.parquet')) == ['syn1.v2.parquet']
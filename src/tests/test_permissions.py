@@ -0,0 +1,70 @@
+from benchmarks.fakes import FakePermissions
+from validation.permissions import AclPublisher, RELEASE_ACCESS
+
+
+ENTITIES = ['syn%d' % i for i in range(100, 140)]
+
+
+def publisher(syn, tmp_path):
+    return AclPublisher(syn, str(tmp_path / 'journal.jsonl'), workers=4, rate=10000)
+
+
+def test_plan_lists_only_permissions_to_change(tmp_path):
+
+    syn = FakePermissions(public_rate=0.5)
+    plan = publisher(syn, tmp_path).plan(ENTITIES + ENTITIES[:5])
+
+    assert len(plan) == len(ENTITIES) * len(RELEASE_ACCESS)
+    public = [e for e in ENTITIES if syn._initial(e, 'PUBLIC')]
+    assert sorted(plan.loc[~plan['change'], 'entityId'].unique()) == sorted(public)
+    assert syn.calls['setPermissions'] == 0
+
+    report = AclPublisher.report(plan)
+    assert report.loc['PUBLIC', 'unchanged'] == len(public)
+    assert report['error'].sum() == 0
+
+
+def test_apply_sets_changes_and_journals_every_pair(tmp_path):
+
+    syn = FakePermissions(public_rate=0.5)
+    acl = publisher(syn, tmp_path)
+    plan = acl.plan(ENTITIES)
+
+    counts = acl.apply(plan)
+
+    assert counts['applied'] == plan['change'].sum() == syn.calls['setPermissions']
+    assert counts['unchanged'] == (~plan['change']).sum()
+    assert all(syn.getPermissions(e, p) == sorted(a)
+        for e in ENTITIES for p, a in RELEASE_ACCESS.items())
+    assert len(acl.done()) == len(plan)
+
+    # nothing is left to check once everything is done
+    assert len(acl.plan(ENTITIES)) == 0
+
+
+def test_interrupted_run_resumes_and_retries_failures(tmp_path, monkeypatch):
+
+    # no retry backoff
+    monkeypatch.setattr('validation.parallel.time.sleep', lambda seconds: None)
+
+    syn = FakePermissions(public_rate=0.0, fail_rate=0.6)
+    acl = publisher(syn, tmp_path)
+    first = acl.apply(acl.plan(ENTITIES))
+
+    assert first.get('failed', 0) + first['unreadable'] > 0
+
+    # an entry cut short by a killed run is ignored
+    with open(acl.journal_path, 'a') as f:
+        f.write('{"entityId": "syn1')
+
+    syn.fail_rate = 0.0
+    plan = acl.plan(ENTITIES)
+    done_before = len(acl.done())
+
+    assert len(plan) == len(ENTITIES) * len(RELEASE_ACCESS) - done_before
+    acl.apply(plan)
+
+    assert len(acl.done()) == len(ENTITIES) * len(RELEASE_ACCESS)
+    assert all(syn.getPermissions(e, p) == sorted(a)
+        for e in ENTITIES for p, a in RELEASE_ACCESS.items())
+
@@ -0,0 +1,106 @@
+import importlib.util
+import os
+import pandas as pd
+
+from types import SimpleNamespace
+from benchmarks.fakes import DuckDBEngine, FakeBigQuery, FakeSynapse
+from benchmarks.synthetic import SyntheticData
+from validation.descriptions import DescriptionCatalog
+from validation.fileview import FileviewReplica
+from validation.promotion import ENTITY_COLUMNS, MANIFEST_VERSIONS_TABLE, promote_entities, promote_metadata
+
+
+DESCRIPTIONS = DescriptionCatalog(
+    pd.DataFrame({'Attribute': ['Component'], 'Description': ['Data type']}),
+    pd.DataFrame({'Attribute': [], 'Description': []}))
+
+
+def entity(entity_id, release):
+    return {'entityId': entity_id, 'Data_Release': release, 'Id': entity_id[3:],
+        'type': 'file', 'CDS_Release': None, 'IDC_Release': None,
+        'Component': 'BulkWESLevel1', 'channel_metadata_version': None,
+        'channel_metadata_synapseId': None}
+
+
+def tables():
+    shortlist = pd.DataFrame([entity('syn3', None), entity('syn4', None)])
+    return {
+        'released.entities': pd.DataFrame([entity('syn1', 'Release 4.0'),
+            entity('syn2', 'Release 4.0')], columns=ENTITY_COLUMNS).astype(str),
+        'data_release.shortlist': shortlist.drop(columns=['Data_Release']),
+        'released.metadata': pd.DataFrame({'Manifest_Id': ['syn10', 'syn11'],
+            'Manifest_Version': [1, 1]}),
+        'data_release.manifests': pd.DataFrame({'Manifest_Id': ['syn12', 'syn13'],
+            'Manifest_Version': [2, None]})
+    }
+
+
+def test_promote_entities_adds_release_without_bai_files():
+
+    engine = DuckDBEngine(tables())
+    promote_entities(engine, 'Release 5.0', ['syn4', 'syn2', None], DESCRIPTIONS)
+
+    entities = engine.fetch('released', 'entities').sort_values('entityId')
+
+    assert entities['entityId'].tolist() == ['syn1', 'syn3']
+    assert entities['Data_Release'].tolist() == ['Release 4.0', 'Release 5.0']
+    assert list(entities.columns) == ENTITY_COLUMNS
+    assert engine.fetch('released', 'entities_v5_0').shape == entities.shape
+    assert engine.descriptions[('released', 'entities')]['Component'] == 'Data type'
+
+
+def test_promote_metadata_sets_current_versions():
+
+    engine = DuckDBEngine(tables())
+
+    # syn11 is a released manifest that is not named synapse_storage_manifest
+    versions = pd.DataFrame({'id': ['syn10', 'syn11', 'syn12', 'syn99'],
+        'currentVersion': [3, 2, 2, 1]})
+    promote_metadata(engine, 'Release 5.0', versions, DESCRIPTIONS)
+
+    metadata = engine.fetch('released', 'metadata').sort_values('Manifest_Id')
+
+    assert metadata['Manifest_Id'].tolist() == ['syn10', 'syn11', 'syn12']
+    assert metadata['Manifest_Version'].tolist() == [3, 2, 2]
+
+    # only referenced manifests' versions leave the client
+    uploaded = engine.fetch('data_release', MANIFEST_VERSIONS_TABLE)
+    assert sorted(uploaded['id']) == ['syn10', 'syn11', 'syn12']
+
+
+def test_new_release_reads_the_fileview_replica(tmp_path, monkeypatch):
+
+    # supplemental descriptions and the fileview replica read from
+    # local copies
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('cache')
+    pd.DataFrame({'Attribute': [], 'Description': []}).to_csv(
+        'cache/descriptions.csv', index=False)
+
+    spec = importlib.util.spec_from_file_location('new_release', os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts', 'new_release.py'))
+    new_release = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(new_release)
+
+    data = SyntheticData()
+    data.files = [{'id': 'syn%d' % i, 'currentVersion': 4} for i in range(1, 14)]
+    data.files[3]['name'] = 'syn4.bam.bai'
+    syn = FakeSynapse(data)
+    FileviewReplica(syn).refresh()
+    syn.queries.clear()
+
+    client = FakeBigQuery({'metadata.data-model': pd.DataFrame({
+        'Attribute': ['Component'], 'Description': ['Data type']})})
+    engine = DuckDBEngine(tables())
+
+    new_release.main(SimpleNamespace(releaseVersion='release5.0'), client, syn, engine)
+
+    metadata = engine.fetch('released', 'metadata').sort_values('Manifest_Id')
+    assert metadata['Manifest_Version'].tolist() == [4, 4, 4]
+
+    entities = engine.fetch('released', 'entities').sort_values('entityId')
+    assert entities['entityId'].tolist() == ['syn1', 'syn2', 'syn3']
+
+    # only the replica's incremental query reaches the fileview
+    assert len(syn.queries) == 1
+    assert 'modifiedOn >=' in syn.queries[0]
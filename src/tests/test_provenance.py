@@ -0,0 +1,75 @@
+import copy
+import pandas as pd
+
+from validation.file_validation import adjacent_bios, unique_bios, unique_demographics
+from validation.provenance import ProvenanceIndex
+
+
+def index():
+    return ProvenanceIndex(pd.DataFrame({
+        'entityId': ['syn1', 'syn2', 'syn3', 'syn4'],
+        'Biospecimen_Path': ['HTA1_1/HTA1_1_1', 'HTA1_1/HTA1_1_10', 'HTA1_2 ; HTA1_2_5,HTA1_1_10', None]
+    }))
+
+
+def meta_map():
+    return {
+        'Biospecimen': pd.DataFrame({
+            'HTAN Biospecimen ID': ['HTA1_1_1', 'HTA1_1_10', 'HTA1_1_10', 'HTA1_2_5'],
+            'Adjacent Biospecimen IDs': ['HTA1_1_10; HTA1_1_99', None, 'nan', 'HTA1_1_1, HTA1_1_10'],
+            'Manifest_Id': ['syn10', 'syn10', 'syn11', 'syn11']
+        }),
+        'Demographics': pd.DataFrame({
+            'HTAN Participant ID': ['HTA1_1', 'HTA1_2'],
+            'Manifest_Id': ['syn12', 'syn12']
+        })
+    }
+
+
+def test_paths_split_on_every_separator():
+
+    edges = index().edges
+
+    assert sorted(edges.loc[edges['entityId'] == 'syn3', 'upstreamId']) == \
+        ['HTA1_1_10', 'HTA1_2', 'HTA1_2_5']
+    assert 'syn4' not in set(edges['entityId'])
+
+
+def test_ids_match_whole_path_components():
+
+    edges = index().edges
+
+    assert sorted(edges.loc[edges['upstreamId'] == 'HTA1_1_1', 'entityId']) == ['syn1']
+    assert sorted(edges.loc[edges['upstreamId'] == 'HTA1_1_10', 'entityId']) == ['syn2', 'syn3']
+
+
+def test_adjacent_bios_flags_files_downstream_of_missing_ids():
+
+    errors = adjacent_bios(meta_map(), index())
+
+    assert errors['entityId'].tolist() == ['syn1']
+    assert errors['context'].tolist() == ['HTA1_1_99']
+
+
+def test_unique_bios_flags_only_files_of_the_duplicated_id():
+
+    errors = unique_bios(meta_map(), index())
+
+    assert sorted(errors['entityId']) == ['syn2', 'syn3']
+    assert set(errors['context']) == {'HTA1_1_10'}
+    assert errors['message'].iloc[0] == \
+        "Multiple records found for parent biospecimen HTA1_1_10 in manifests ['syn10', 'syn11']"
+    assert unique_demographics(meta_map(), index()).empty
+
+
+def test_checks_leave_meta_map_unchanged():
+
+    data = meta_map()
+    before = copy.deepcopy(data)
+
+    adjacent_bios(data, index())
+    unique_bios(data, index())
+    unique_demographics(data, index())
+
+    for component, frame in before.items():
+        pd.testing.assert_frame_equal(data[component], frame)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from validation.rules import apply_rules, HTAN_ID_FORMAT, BASENAME_CHARSET
+
+
+@pytest.fixture(params=['object', 'string[pyarrow]'])
+def manifest(request):
+    return pd.DataFrame({
+        'entityId': ['syn1', 'syn2', 'syn3', 'syn4', 'syn5', 'syn6'],
+        'Component': ['BulkWESLevel1', 'BulkWESLevel1', 'AccessoryManifest',
+            'BulkWESLevel1', 'BulkWESLevel1', 'BulkWESLevel1'],
+        'HTAN Data File ID': ['HTA1_1_1', 'HTA1-1-2', 'bad', 'HTA1_EXT1-3', np.nan, 'HTA10_2_3'],
+        'Filename': ['dir/a.fastq', 'dir/b c.fastq', 'x y', 'EXT/d e.fastq', np.nan, '~/f.fastq']
+    }).astype(request.param)
+
+
+def test_htan_id_format_exempts_accessory_and_external_ids(manifest):
+
+    assert manifest.loc[HTAN_ID_FORMAT.failing(manifest), 'entityId'].tolist() == ['syn2']
+
+
+def test_basename_charset_checks_basenames_only(manifest):
+
+    # basenames are checked from their first character, so 'b c.fastq'
+    # passes and only the leading '~' of '~/f.fastq' is stripped
+    assert BASENAME_CHARSET.failing(manifest).tolist() == [False] * 6
+
+
+def test_missing_values_are_never_reported(manifest):
+
+    data = manifest.assign(**{'HTAN Data File ID': pd.NA, 'Filename': pd.NA})
+
+    assert apply_rules(data, [HTAN_ID_FORMAT, BASENAME_CHARSET]).empty
+
+
+def test_apply_rules_codes_errors_by_rule(manifest):
+
+    data = pd.concat([manifest, manifest.iloc[[0]].assign(
+        entityId='syn7', Filename='dir/ünïcode.fastq')], ignore_index=True)
+
+    errors = apply_rules(data, [HTAN_ID_FORMAT, BASENAME_CHARSET])
+
+    assert errors[['entityId', 'code']].values.tolist() == [
+        ['syn2', 'htan_id_format'], ['syn7', 'basename_charset']]
+    assert errors['context'].tolist() == ['HTA1-1-2', 'dir/ünïcode.fastq']
@@ -0,0 +1,49 @@
+import pytest
+
+from benchmarks.fakes import FakeSynapse
+from benchmarks.synthetic import SyntheticData
+from validation.synapse_paths import SynapsePathResolver
+
+
+def folders():
+    data = SyntheticData()
+    data.children = {
+        'syn1': [{'name': 'channels', 'id': 'syn2', 'type': 'folder'}],
+        'syn2': [
+            {'name': 'a.csv', 'id': 'syn3', 'type': 'file', 'versionNumber': 2},
+            {'name': 'a.csv', 'id': 'syn4', 'type': 'file', 'versionNumber': 1}
+        ]
+    }
+    return data
+
+
+def test_resolves_paths_listing_each_folder_once():
+
+    syn = FakeSynapse(folders())
+    resolver = SynapsePathResolver(syn)
+
+    resolved = resolver.resolve_many([('syn1', 'channels/a.csv'), ('syn1', 'channels/b.csv'),
+        ('syn1', 'missing/a.csv')])
+
+    assert resolved == {('syn1', 'channels/a.csv'): ('syn3', 2),
+        ('syn1', 'channels/b.csv'): None, ('syn1', 'missing/a.csv'): None}
+    assert resolver.resolve('syn1', 'channels/a.csv') == ('syn3', 2)
+    assert syn.calls['getChildren'] == 2
+
+
+def test_failed_listing_raises_and_is_not_cached(monkeypatch):
+
+    monkeypatch.setattr('validation.parallel.time.sleep', lambda seconds: None)
+
+    def throttled(*args, **kwargs):
+        raise ConnectionError('throttled')
+
+    syn = FakeSynapse(folders())
+    get_children, syn.getChildren = syn.getChildren, throttled
+    resolver = SynapsePathResolver(syn)
+
+    with pytest.raises(ConnectionError):
+        resolver.resolve('syn1', 'channels/a.csv')
+
+    syn.getChildren = get_children
+    assert resolver.resolve('syn1', 'channels/a.csv') == ('syn3', 2)
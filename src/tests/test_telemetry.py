@@ -0,0 +1,60 @@
+import json
+import pandas as pd
+import pytest
+
+from benchmarks.fakes import FakeBigQuery
+from validation.bq_loader import BigQueryLoader
+from validation.telemetry import RUN_METRICS_SCHEMA, RunMetrics, measure
+
+
+def test_stage_records_counts_and_memory():
+
+    metrics = RunMetrics('run1')
+
+    with metrics.stage('manifests') as counts:
+        counts.update({'meta_map': 10, 'extra_cols': 2, 'schema': None})
+
+    record, = metrics.records
+    assert record['run_id'] == 'run1' and record['stage'] == 'manifests'
+    assert record['rows'] == 12
+    assert json.loads(record['counts']) == {'meta_map': 10, 'extra_cols': 2, 'schema': None}
+    assert record['status'] == 'ok' and record['error'] is None
+    assert record['rss_start_mb'] > 0 and record['rss_end_mb'] > 0
+    assert record['peak_rss_mb'] is None
+
+
+def test_failed_stage_is_recorded_and_raised():
+
+    metrics = RunMetrics('run1')
+
+    with pytest.raises(KeyError):
+        with metrics.stage('release_lists'):
+            raise KeyError('Id')
+
+    record, = metrics.records
+    assert record['status'] == 'error'
+    assert record['error'] == "KeyError: 'Id'"
+
+    metrics.finish()
+    assert metrics.records[-1]['status'] == 'error'
+    assert metrics.records[-1]['error'] == 'Failed stages: release_lists'
+
+
+def test_load_appends_stage_and_run_rows():
+
+    metrics = RunMetrics('run1')
+    with measure(metrics, 'manifests') as counts:
+        counts['meta_map'] = 3
+    with measure(None, 'untracked') as counts:
+        counts['meta_map'] = 5
+
+    client = FakeBigQuery({})
+    loader = BigQueryLoader(client)
+    metrics.load(loader)
+    loader.wait()
+
+    loaded = client.loaded['htan-dcc.data_release.run_metrics']
+    assert list(loaded.columns) == [f['name'] for f in RUN_METRICS_SCHEMA]
+    assert loaded['stage'].tolist() == ['manifests', 'run']
+    assert loaded['status'].tolist() == ['ok', 'ok']
+    assert pd.isna(loaded['peak_rss_mb'].iloc[0]) and loaded['peak_rss_mb'].iloc[1] > 0
@@ -0,0 +1,73 @@
+import pandas as pd
+
+from benchmarks.fakes import FakeJira
+from validation.tickets import TicketSync
+
+
+# columns as read back from data_release.errors and clin_bio_errors
+ERRORS = pd.DataFrame({
+    'entityId': ['syn1', 'syn2', 'syn3'],
+    'Filename': ['a.fastq', 'b.fastq', 'c.tif'],
+    'HTAN_Center': ['HTAN OHSU', 'HTAN OHSU', 'HTAN HTAPP'],
+    'Component': ['BulkWESLevel1', 'BulkWESLevel1', 'ImagingLevel2'],
+    'Manifest_Id': ['syn10', 'syn10', 'syn20'],
+    'Manifest_Version': [1, 1, 2],
+    'Id': ['a', 'b', 'c'],
+    'Errors': ['HTAN ID not unique', 'HTAN ID not unique', 'Channel metadata file not found']
+})
+
+CB_ERRORS = pd.DataFrame({
+    'HTAN_Center': ['HTAN OHSU', 'HTAN OHSU'],
+    'Errors': ['Duplicate biospecimen HTA9_1_1', 'Duplicate participant HTA9_1']
+})
+
+
+def sync(jira):
+    return TicketSync(jira, 'Release 5.0', workers=2, rate=1000).sync(ERRORS, CB_ERRORS)
+
+
+def test_sync_creates_requests_and_links():
+
+    jira = FakeJira()
+    counts = sync(jira)
+
+    summaries = sorted(i['summary'] for i in jira.issues.values())
+    assert summaries == [
+        '[Release 5.0 Errors] HTAN HTAPP ImagingLevel2 syn20',
+        '[Release 5.0 Errors] HTAN OHSU BulkWESLevel1 syn10',
+        '[Release 5.0 HTAN Biospecimen/Participant ID Validation] HTAN OHSU',
+        '[Release 5.0] HTAN HTAPP Master Ticket',
+        '[Release 5.0] HTAN OHSU Master Ticket'
+    ]
+    assert counts == {'requests created': 5, 'requests existing': 0,
+        'requests failed': 0, 'links created': 2}
+    assert all(q.startswith('project = "HTAN" AND ') for q in jira.queries)
+
+
+def test_rerun_creates_only_missing_requests():
+
+    jira = FakeJira()
+    sync(jira)
+
+    # a request of another release whose summary contains this one's
+    jira.create_customer_request(fields={'requestFieldValues': {
+        'summary': '[Release 5.0.1 Errors] HTAN OHSU BulkWESLevel1 syn10'}})
+    deleted = [k for k, i in jira.issues.items() if 'HTAPP ImagingLevel2' in i['summary']][0]
+    del jira.issues[deleted]
+
+    counts = sync(jira)
+
+    assert counts == {'requests created': 1, 'requests existing': 4,
+        'requests failed': 0, 'links created': 1}
+    assert len(jira.issues) == 6
+
+
+def test_requests_of_other_projects_are_not_duplicates():
+
+    jira = FakeJira(project='HTAN')
+    sync(jira)
+
+    counts = TicketSync(jira, 'Release 5.0', workers=2, rate=1000,
+        project='OTHER').sync(ERRORS, CB_ERRORS)
+
+    assert counts['requests created'] == 5
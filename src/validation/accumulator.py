@@ -0,0 +1,76 @@
+import pandas as pd
+
+
+# low-cardinality manifest columns held as categoricals in lean ingest
+CATEGORICAL_COLUMNS = ['Component', 'HTAN Center', 'Manifest_Id', 'File Format']
+
+
+def compact(data, columns=CATEGORICAL_COLUMNS):
+    """
+    Convert the given columns, where present, to categoricals
+    """
+
+    for column in columns:
+        if column in data.columns:
+            data[column] = data[column].astype('category')
+
+    return data
+
+
+def concat(frames):
+    """
+    Concatenate frames, keeping columns categorical if they are
+    categorical in any input. pd.concat falls back to object columns
+    when the inputs' categories differ
+    """
+
+    categorical = [
+        column for column in dict.fromkeys(c for f in frames for c in f.columns)
+        if any(isinstance(f[column].dtype, pd.CategoricalDtype)
+            for f in frames if column in f.columns)
+    ]
+
+    return compact(pd.concat(frames, ignore_index=True, sort=False), categorical)
+
+
+class ComponentAccumulator:
+    """
+    Collect data frames by component and concatenate each component
+    once, rather than re-copying the accumulated frame on every append.
+    Columns listed in `categorical` are converted to categoricals
+    after concatenation
+    """
+
+    def __init__(self, categorical=()):
+        self.frames = {}
+        self.categorical = list(categorical)
+
+
+    def add(self, component, data):
+        self.frames.setdefault(component, []).append(data)
+
+
+    def __contains__(self, component):
+        return component in self.frames
+
+
+    def materialize(self, component):
+        """
+        Concatenate all frames added for a component, aligning columns
+        in order of first appearance
+        """
+
+        return compact(pd.concat(
+            self.frames[component], ignore_index=True, sort=False
+        ), self.categorical)
+
+
+    def to_dict(self):
+        """
+        Materialize every component into a {component: data frame} map
+        """
+
+        return {
+            component: self.materialize(component)
+            for component in self.frames
+        }
@@ -0,0 +1,144 @@
+import time
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from google.cloud import bigquery
+from validation.parallel import max_workers
+
+
+def bq_columns(columns):
+    """
+    Make column names BigQuery friendly
+    """
+
+    return pd.Index(columns).str.replace('[^0-9a-zA-Z]+', '_', regex=True)
+
+
+def _schema_field(field):
+    if isinstance(field, bigquery.SchemaField):
+        return field
+    field = dict(field, type=field['type'].upper())
+    return bigquery.SchemaField.from_api_repr(field)
+
+
+def _coerce(data, schema):
+    """
+    Cast columns to the types declared in the schema so they serialize
+    to matching Parquet types
+    """
+
+    data = data.copy()
+
+    for field in schema:
+        if field.name not in data.columns:
+            continue
+        if field.field_type in ('INTEGER', 'INT64'):
+            data[field.name] = pd.to_numeric(
+                data[field.name], errors='coerce').astype('Int64')
+        elif field.field_type in ('FLOAT', 'FLOAT64'):
+            data[field.name] = pd.to_numeric(
+                data[field.name], errors='coerce').astype('float64')
+        elif field.field_type == 'TIMESTAMP':
+            data[field.name] = pd.to_datetime(data[field.name], utc=True)
+        else:
+            data[field.name] = data[field.name].astype('string')
+
+    return data
+
+
+class BigQueryLoader:
+    """
+    Load data frames to BigQuery as Parquet, running loads concurrently.
+
+    submit() returns immediately; wait() blocks until every submitted
+    load job has finished, reports rows, bytes and duration per table,
+    and raises if any load failed. The client only needs to provide
+    load_table_from_dataframe() returning a job with result(), so a
+    local stand-in client can be used in place of bigquery.Client.
+    """
+
+    def __init__(self, client, project='htan-dcc', workers=None):
+        self.client = client
+        self.project = project
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers or max_workers('HTAN_BQ_WORKERS', 4))
+        self._futures = []
+
+
+    def submit(self, dataset, table, data, schema=None,
+        write_disposition='WRITE_TRUNCATE'):
+        """
+        Queue a data frame for loading to project.dataset.table. Without
+        a schema, every column is loaded as STRING
+        """
+
+        print('Loading %s.%s.%s to BigQuery' % (self.project, dataset, table))
+
+        data = data.copy()
+        data.columns = bq_columns(data.columns)
+
+        if schema is None:
+            schema = [{'name': name, 'type': 'STRING'} for name in data.columns]
+        schema = [_schema_field(f) for f in schema]
+
+        table_bq = '%s.%s.%s' % (self.project, dataset, table)
+
+        self._futures.append(self._pool.submit(
+            self._load, table_bq, _coerce(data, schema), schema, write_disposition))
+
+
+    def _load(self, table_bq, data, schema, write_disposition):
+
+        job_config = bigquery.LoadJobConfig(
+            schema=schema,
+            write_disposition=write_disposition,
+            autodetect=False,
+            source_format=bigquery.SourceFormat.PARQUET
+        )
+        if write_disposition == 'WRITE_APPEND':
+            # appended tables gain columns added to their schema
+            job_config.schema_update_options = [
+                bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION]
+
+        metrics = {
+            'table': table_bq,
+            'rows': len(data),
+            'bytes': int(data.memory_usage(deep=True).sum()),
+            'seconds': None,
+            'error': None
+        }
+
+        start = time.time()
+        try:
+            job = self.client.load_table_from_dataframe(
+                data, table_bq, job_config=job_config)
+            job.result()
+            metrics['rows'] = getattr(job, 'output_rows', None) or metrics['rows']
+            metrics['bytes'] = getattr(job, 'output_bytes', None) or metrics['bytes']
+        except Exception as e:
+            metrics['error'] = str(e)
+
+        metrics['seconds'] = round(time.time() - start, 2)
+
+        return metrics
+
+
+    def wait(self):
+        """
+        Wait for all submitted loads, print a summary and return the
+        per-table metrics. Raises RuntimeError if any load failed
+        """
+
+        results = [f.result() for f in self._futures]
+        self._futures = []
+
+        for m in results:
+            status = 'FAILED: %s' % m['error'] if m['error'] else 'ok'
+            print('  %s: %s rows, %s bytes, %ss %s' % (
+                m['table'], m['rows'], m['bytes'], m['seconds'], status))
+
+        failed = [m['table'] for m in results if m['error']]
+        if failed:
+            raise RuntimeError('BigQuery load failed for: %s' % ', '.join(failed))
+
+        return results
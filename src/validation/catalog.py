@@ -0,0 +1,88 @@
+import threading
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+
+class ReleaseCatalog:
+    """
+    Embedded DuckDB database of the tables release membership is
+    decided from:
+
+        fileview            HTAN fileview rows
+        released            entityId of every released entity
+        excluded_files      id of manually excluded files
+        excluded_manifests  id of manually excluded manifests
+        id_provenance       id_provenance.upstream_ids
+
+    Data frames are registered as views, not copied. Membership
+    questions are answered with hash joins in query(); join with
+    IS NOT DISTINCT FROM to match missing IDs the way pandas isin
+    does.
+    """
+
+    def __init__(self, fileview, released, exclude, id_prov):
+        self.con = duckdb.connect()
+        self._lock = threading.Lock()
+
+        self.register('fileview', fileview)
+        self.register('released', released[['entityId']])
+        # a sheet column with no IDs is read as float; cast so it still
+        # joins with the string IDs of files and manifests
+        self.register('excluded_files',
+            exclude[['file id']].rename(columns={'file id': 'id'}).astype('string'))
+        self.register('excluded_manifests',
+            exclude[['manifest id']].rename(columns={'manifest id': 'id'}).astype('string'))
+        self.register('id_provenance', id_prov)
+
+
+    def register(self, name, data):
+        """
+        Make a data frame queryable as table `name`
+        """
+
+        with self._lock:
+            self._register(name, data)
+
+
+    def _register(self, name, data):
+
+        try:
+            # Arrow tables are read without pandas conversion warnings
+            table = pa.Table.from_pandas(data, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # object columns holding mixed types
+            table = data
+
+        self.con.register(name, table)
+
+
+    def query(self, sql, **frames):
+        """
+        Run a query and return the result as a data frame. Keyword
+        data frames are registered for the duration of the query
+        """
+
+        with self._lock:
+            for name, data in frames.items():
+                self._register(name, data)
+
+            try:
+                return self.con.execute(sql).df()
+            finally:
+                for name in frames:
+                    self.con.unregister(name)
+
+
+def row_keys(data, columns):
+    """
+    Key columns of a data frame with its row positions in `_row`, for
+    selecting rows with a catalog query and taking them back in order
+    """
+
+    keys = {'_row': np.arange(len(data))}
+    for column in columns:
+        keys[column] = data[column].array
+
+    return pd.DataFrame(keys)
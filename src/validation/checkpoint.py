@@ -0,0 +1,64 @@
+import os
+import pickle
+import shutil
+
+from datetime import date
+
+
+class CheckpointStore:
+    """
+    Stage outputs saved to disk for one run date, so that a retried
+    execution on the same day can resume after the last completed
+    stage. The root directory can be a GCS-mounted volume, set with
+    HTAN_CHECKPOINT_DIR.
+    """
+
+    def __init__(self, root=None, run_date=None):
+        self.root = root or os.environ.get('HTAN_CHECKPOINT_DIR', './checkpoints')
+        self.run_date = run_date or date.today().isoformat()
+        self.path = os.path.join(self.root, self.run_date)
+
+        os.makedirs(self.path, exist_ok=True)
+
+
+    def _file(self, stage_name):
+        return os.path.join(self.path, stage_name + '.pkl')
+
+
+    def has(self, stage_name):
+        return os.path.exists(self._file(stage_name))
+
+
+    def load(self, stage_name):
+        with open(self._file(stage_name), 'rb') as f:
+            return pickle.load(f)
+
+
+    def save(self, stage_name, outputs):
+        """
+        Write stage outputs atomically, so an execution killed mid-write
+        never leaves a partial checkpoint behind
+        """
+
+        tmp = self._file(stage_name) + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(outputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._file(stage_name))
+
+
+    def clear(self):
+        """
+        Remove checkpoints for this run date
+        """
+
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+    def prune(self):
+        """
+        Remove checkpoints left over from earlier run dates
+        """
+
+        for run_date in os.listdir(self.root):
+            if run_date != self.run_date:
+                shutil.rmtree(os.path.join(self.root, run_date), ignore_errors=True)
@@ -0,0 +1,89 @@
+import os
+import time
+import pandas as pd
+
+from validation import ingest
+
+
+SHEET_ID = '1RpwQqY7xi-arWJMOMpF0EOhbXPCcQudv8RZ_fp0o_es'
+SHEET_NAME = 'Sheet1'
+SHEET_URL = f'https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet={SHEET_NAME}'
+
+UNAVAILABLE = 'Description unavailable. Contact DCC for more information'
+
+
+def load_supplemental(cache_path=None, ttl=86400):
+    """
+    Read the supplemental attribute description sheet, reusing a local
+    copy (HTAN_DESCRIPTION_CACHE) if it is younger than ttl seconds. A
+    stale copy is used if the sheet cannot be downloaded
+    """
+
+    cache_path = cache_path or os.environ.get(
+        'HTAN_DESCRIPTION_CACHE', './cache/descriptions.csv')
+
+    fresh = os.path.exists(cache_path) and \
+        time.time() - os.path.getmtime(cache_path) < ttl
+
+    if not fresh:
+        try:
+            sheet = ingest.read_csv(SHEET_URL)
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+            sheet.to_csv(cache_path, index=False)
+            return sheet
+        except Exception as e:
+            if not os.path.exists(cache_path):
+                raise
+            print('Using cached attribute descriptions: %s' % e)
+
+    return ingest.read_csv(cache_path)
+
+
+class DescriptionCatalog:
+    """
+    Attribute descriptions for BigQuery table schemas, from the HTAN
+    data model with a supplemental sheet for non-data-model columns
+    """
+
+    def __init__(self, data_model, supplemental):
+        self._model = self._to_dict(data_model)
+        self._supplemental = self._to_dict(supplemental)
+        self._reported = set()
+
+
+    @classmethod
+    def from_sources(cls, data_model, cache_path=None, ttl=86400):
+        """
+        Build a catalog from the data-model table and the supplemental
+        description sheet
+        """
+
+        return cls(data_model, load_supplemental(cache_path, ttl))
+
+
+    @staticmethod
+    def _to_dict(table):
+        table = table[['Attribute', 'Description']].dropna()
+        table = table.drop_duplicates('Attribute', keep='first')
+
+        return dict(zip(table['Attribute'], table['Description'].astype(str)))
+
+
+    def get(self, attribute):
+        """
+        Description of an attribute, truncated to BigQuery's 1024
+        character limit. BigQuery-style names (underscores in place
+        of spaces) are also matched against the data model
+        """
+
+        dsc = self._model.get(attribute) or \
+            self._model.get(attribute.replace('_', ' ')) or \
+            self._supplemental.get(attribute)
+
+        if dsc is None:
+            if attribute not in self._reported:
+                self._reported.add(attribute)
+                print('{} attribute not found in HTAN schema'.format(attribute))
+            return UNAVAILABLE
+
+        return dsc[:1024]
@@ -0,0 +1,66 @@
+import pandas as pd
+
+
+ERROR_COLUMNS = ['entityId', 'code', 'severity', 'message', 'context']
+
+# Errors of these checks are reported in clin_bio_errors instead of
+# being attached to the files in the errors table
+CLIN_BIO_CODES = ['unique_bios', 'unique_demographics']
+
+
+def error_table(entity_ids, code, message, context=None, severity='error'):
+    """
+    Error rows for one check. message and context may be single values
+    or sequences aligned with entity_ids
+    """
+
+    entity_ids = pd.Series(entity_ids, dtype=object).reset_index(drop=True)
+
+    def aligned(value):
+        if isinstance(value, (pd.Series, pd.Index, list, tuple)):
+            return pd.Series(value, dtype=object).reset_index(drop=True)
+        return value
+
+    return pd.DataFrame({
+        'entityId': entity_ids,
+        'code': code,
+        'severity': severity,
+        'message': aligned(message),
+        'context': aligned(context)
+    }, index=entity_ids.index, columns=ERROR_COLUMNS)
+
+
+def empty_errors():
+    return pd.DataFrame(columns=ERROR_COLUMNS, dtype=object)
+
+
+def concat_errors(tables):
+    """
+    Combine error tables from several checks. Identical errors reported
+    more than once for an entity are kept once
+    """
+
+    errors = pd.concat([empty_errors()] + list(tables), ignore_index=True)
+
+    return errors.drop_duplicates(['entityId', 'code', 'message'], ignore_index=True)
+
+
+def aggregate_errors(errors, exclude_codes=CLIN_BIO_CODES, severity='error'):
+    """
+    One row per entity with the list of its error messages, in the
+    order the errors were collected
+    """
+
+    errors = errors[errors['severity'].eq(severity)
+        & ~errors['code'].isin(exclude_codes)]
+
+    return errors.groupby('entityId', sort=False, dropna=False)['message'].agg(
+        list).rename('Errors').reset_index()
+
+
+def count_errors(errors):
+    """
+    Number of entities with errors by check code and severity
+    """
+
+    return errors.groupby(['severity', 'code'])['entityId'].nunique()
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from validation.parallel import retry, max_workers
+
+
+HANDLE_FIELDS = ['fileHandleId', 'fileName', 'key', 'contentMd5', 'contentSize']
+
+CACHE_COLUMNS = ['entityId', 'versionNumber'] + HANDLE_FIELDS
+
+
+def _handle_ids(values):
+    # fileview file handle IDs may come back as floats
+    return pd.to_numeric(values, errors='coerce').astype('Int64').astype(str)
+
+
+class FileHandleFetcher:
+    """
+    File handle records of fileview entities, fetched with
+    POST /fileHandle/batch for up to `batch_size` files per request,
+    several requests at a time (HTAN_SYNAPSE_WORKERS).
+
+    Entity names, versions and file handle IDs come from the fileview,
+    so no per-entity requests are made. Records are cached by entity
+    version in HTAN_FILE_HANDLE_CACHE (default
+    ./cache/file_handles.parquet); only new entity versions are fetched.
+    """
+
+    def __init__(self, syn, fileview, cache_path=None, workers=None, batch_size=100):
+        self.syn = syn
+        self.batch_size = batch_size
+        self.workers = workers or max_workers('HTAN_SYNAPSE_WORKERS', 8)
+        self.cache_path = cache_path or os.environ.get(
+            'HTAN_FILE_HANDLE_CACHE', './cache/file_handles.parquet')
+
+        files = fileview.dropna(subset=['dataFileHandleId'])
+        self.files = pd.DataFrame({
+            'entityId': files['id'].values,
+            'versionNumber': files['currentVersion'].astype('Int64').values,
+            'name': files['name'].values,
+            'dataFileHandleId': _handle_ids(files['dataFileHandleId']).values
+        }).drop_duplicates('entityId')
+
+        if os.path.exists(self.cache_path):
+            self.cache = pd.read_parquet(self.cache_path)
+        else:
+            self.cache = pd.DataFrame(columns=CACHE_COLUMNS)
+        self.cache['versionNumber'] = self.cache['versionNumber'].astype('Int64')
+
+        self._lock = threading.Lock()
+
+
+    def _fetch_batch(self, batch):
+        """
+        File handle records of a batch of (entityId, dataFileHandleId)
+        """
+
+        body = {
+            'includeFileHandles': True,
+            'includePreSignedURLs': False,
+            'includePreviewPreSignedURLs': False,
+            'requestedFiles': [
+                {
+                    'fileHandleId': handle_id,
+                    'associateObjectId': entity_id,
+                    'associateObjectType': 'FileEntity'
+                }
+                for entity_id, handle_id
+                in zip(batch['entityId'], batch['dataFileHandleId'])
+            ]
+        }
+
+        try:
+            response = retry(self.syn.restPOST, '/fileHandle/batch',
+                body=json.dumps(body), endpoint=self.syn.fileHandleEndpoint)
+        except Exception as e:
+            print('File handles of %d entities not retrieved: %s' % (len(batch), e))
+            return []
+
+        return [
+            {field: result['fileHandle'].get('id' if field == 'fileHandleId' else field)
+                for field in HANDLE_FIELDS}
+            for result in response['requestedFiles'] if 'fileHandle' in result
+        ]
+
+
+    def handles(self, entity_ids):
+        """
+        Name, version and file handle record of each entity's current
+        version. Entities that are not files in the fileview are left
+        out; fields are missing where the handle could not be fetched
+        """
+
+        start = time.time()
+
+        with self._lock:
+            wanted = self.files[self.files['entityId'].isin(pd.Index(entity_ids))]
+
+            known = wanted.merge(self.cache[['entityId', 'versionNumber']],
+                on=['entityId', 'versionNumber'], how='left', indicator=True)
+            missing = wanted[(known['_merge'] == 'left_only').values]
+
+            batches = [missing.iloc[i:i + self.batch_size]
+                for i in range(0, len(missing), self.batch_size)]
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                records = [r for batch in pool.map(self._fetch_batch, batches) for r in batch]
+
+            fetched = pd.DataFrame(records, columns=HANDLE_FIELDS).drop_duplicates('fileHandleId')
+            fetched = missing[['entityId', 'versionNumber', 'dataFileHandleId']].merge(
+                fetched, left_on='dataFileHandleId', right_on='fileHandleId'
+            )[CACHE_COLUMNS]
+
+            if len(fetched):
+                self.cache = pd.concat([self.cache, fetched], ignore_index=True)
+                self.save()
+
+            print('File handles: %d entities, %d cached, %d fetched in %d requests, %.1fs' % (
+                len(wanted), len(wanted) - len(missing), len(fetched), len(batches),
+                time.time() - start))
+
+            return wanted[['entityId', 'versionNumber', 'name']].merge(
+                self.cache, on=['entityId', 'versionNumber'], how='left')
+
+
+    def save(self):
+        """
+        Write the cache, keeping only current entity versions
+        """
+
+        current = self.cache.merge(self.files[['entityId', 'versionNumber']],
+            on=['entityId', 'versionNumber'], how='inner')
+        current = current.drop_duplicates(['entityId', 'versionNumber'], keep='last')
+
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        tmp = self.cache_path + '.tmp'
+        current.astype({'fileHandleId': str, 'contentSize': 'float64'}).to_parquet(tmp, index=False)
+        os.replace(tmp, self.cache_path)
@@ -1,123 +1,83 @@
-import hashlib
 import pandas as pd
 import synapseclient
 import re
 import json
 import os
 
+from validation.rules import apply_rules, basename, HTAN_ID_FORMAT, BASENAME_CHARSET
+from validation.errors import error_table
+from validation.synapse_paths import SynapsePathResolver
+from validation.hashing import HashVerifier, SynapseFileStore
+
+
+# manifest columns read by the biospecimen, demographics and
+# channel file checks
+REQUIRED_COLUMNS = [
+    'HTAN Biospecimen ID',
+    'HTAN Participant ID',
+    'Adjacent Biospecimen IDs',
+    'HTAN Data File ID',
+    'Channel Metadata Filename',
+    'MERFISH Positions File',
+    'MERFISH Codebook File',
+    'entityId'
+]
+
 
 def htan_id_unique(file_list, entities_to_release):
     """
     Check that HTAN Data File ID is unique
     """
     
-    error_list = {}
-    
-    file_ids = file_list[file_list.duplicated(
-        'HTAN Data File ID',keep=False)
-        ].sort_values(by=['HTAN Data File ID'])
-    
-    dup = file_ids.groupby('HTAN Data File ID')['entityId'].apply(
-        lambda g: g.values.tolist()
-        ).to_dict()
-    
-    for i,e in dup.items():
-        error_message = 'HTAN ID %s is used by entities %s' % (i,e)
-        for j in e:
-            error_list.update({j: error_message})
-    
-    return error_list
+    return _unique_values(file_list['HTAN Data File ID'], file_list['entityId'],
+        'htan_id_unique', 'HTAN ID %s is used by entities %s')
 
 
 
 def file_name_unique(file_list, entities_to_release):
     """
-    Check that HTAN filename is unique
+    Check that HTAN filename is unique. Shared names are reported as
+    warnings, not release blockers
     """
 
-    error_list = {}
-    file_list['Basename'] = [os.path.basename(x) for x in list(file_list['Filename'])]
-    
-    file_ids = file_list[file_list.duplicated(
-        'Basename',keep=False)
-        ].sort_values(by=['Basename'])
-   
-    dup = file_ids.groupby('Basename')['entityId'].apply(
-        lambda g: g.values.tolist()
-        ).to_dict()
-    
-    for i,e in dup.items():
-        error_message = 'Filename %s is used by entities %s' % (i,e)
-        for j in e:
-            error_list.update({j: error_message})
-    
-    return error_list
+    return _unique_values(basename(file_list['Filename']), file_list['entityId'],
+        'file_name_unique', 'Filename %s is used by entities %s', severity='warning')
 
 
 
-def htan_id_regex(entities_to_release):
+def _unique_values(values, entity_ids, code, message, severity='error'):
     """
-    Check that data file IDs conform to HTAN ID format
+    Flag entities sharing a value with other entities
     """
-    error_list = {}
-    
-    for i,r in entities_to_release.iterrows():
-        if r['Component'] == 'AccessoryManifest':
-            continue
 
-        if 'EXT' in r['HTAN Data File ID']:
-            continue
-        
-        try:
-            match = bool(re.match(
-                r'HTA\d{1,2}_\d+_\d+$|HTA\d{1,2}_EXT\d{1,2}_\d+$', 
-                r['HTAN Data File ID'])
-            )
-        except:
-            continue
-        
-        else:
-            if match == False:
-                error = {r['entityId']: 
-                    'HTAN ID does not match specified format'
-                }
+    data = pd.DataFrame({'value': values, 'entityId': entity_ids}).dropna(
+        subset=['value'])
+    dup = data[data.duplicated('value', keep=False)].sort_values(
+        by=['value'], kind='stable')
 
-                error_list.update(error)
-    
-    return error_list
+    shared = dup.groupby('value', sort=False)['entityId'].agg(list)
+    error_msg = dup['value'].map(
+        {value: message % (value, ids) for value, ids in shared.items()})
 
+    return error_table(dup['entityId'], code, error_msg, context=dup['value'],
+        severity=severity)
 
-def basename_regex(entities_to_release):
+
+
+def htan_id_regex(entities_to_release):
     """
     Check that data file IDs conform to HTAN ID format
     """
-    error_list = {}
     
-    for i,r in entities_to_release.iterrows():
-        if r['Component'] == 'AccessoryManifest':
-            continue
+    return apply_rules(entities_to_release, [HTAN_ID_FORMAT])
 
-        if 'EXT' in r['Filename']:
-            continue
-        
-        basename = os.path.basename(r['Filename'])
-        try:
-            match = bool(re.match(
-                r'[a-zA-Z0-9\-\.\_\/]', 
-                basename)
-            )
-        except:
-            continue
-        
-        else:
-            if match == False:
-                error = {r['entityId']: 
-                    'File basename contains unsupported characters (supported: alphanumeric (a-z,A-Z,0-9), dashes(-), periods(.), and underscores(_))'
-                }
 
-                error_list.update(error)
-    
-    return error_list
+def basename_regex(entities_to_release):
+    """
+    Check that file basenames contain only supported characters
+    """
+
+    return apply_rules(entities_to_release, [BASENAME_CHARSET])
 
 
 def entity_exists(fileview, entities_to_release):
@@ -129,171 +89,125 @@ def entity_exists(fileview, entities_to_release):
     # exclude accessory folders from check 
     entities_to_release = entities_to_release[~(entities_to_release['Component'] == 'AccessoryManifest')]
 
-    error_list = {}
-    not_found = list(set(entities_to_release['entityId']) - set(fileview['id']))
-    
-    for x in not_found:
-        error = {x: 'entity does not exist in Synapse'}
-        error_list.update(error)
+    not_found = fileview.missing(entities_to_release['entityId'])
     
-    return error_list
+    return error_table(not_found, 'entity_exists', 'entity does not exist in Synapse')
 
 
 
 
-def check_alias(syn, entities_to_release):
+def check_alias(file_handles, entities_to_release):
     """
-    Function to compare Synapse base filename to alias and bucket name
+    Function to compare Synapse base filename to alias and bucket name.
+    Inconsistencies are reported as warnings, not release blockers
     """
-    error_list = {}
 
-    for i,r in entities_to_release.iterrows():
-        syn_id = r['entityId']
+    handles = file_handles.handles(entities_to_release['entityId'])
 
-        try:
-            ent = syn.get(syn_id,downloadFile=False)
-        
-        except:
-            continue
-        
-        else:
-            alias = ent._file_handle['fileName']
-            syn_name = ent.file_handle['name']
-            bucket_name = os.path.basename(ent.file_handle['key'])
-
-            if alias == syn_name == bucket_name:
-                continue
-            else:
-                error = {syn_id: 
-                    'synapse name, bucket name, and alias are not consistent (%s,%s,%s)'
-                    % (syn_name,bucket_name,alias)
-                }
-                error_list.update(error)
-    
-    return error_list
+    # only files stored in a bucket have a key to compare
+    handles = handles.dropna(subset=['fileName', 'key'])
+    bucket_name = handles['key'].str.rsplit('/', n=1).str[-1]
 
+    inconsistent = (handles['fileName'] != handles['name']) | (handles['name'] != bucket_name)
+    handles = handles[inconsistent]
+    bucket_name = bucket_name[inconsistent]
 
+    error_msgs = [
+        'synapse name, bucket name, and alias are not consistent (%s,%s,%s)'
+        % (syn_name, bucket, alias)
+        for syn_name, bucket, alias
+        in zip(handles['name'], bucket_name, handles['fileName'])
+    ]
 
+    return error_table(handles['entityId'], 'check_alias', error_msgs,
+        context=handles['fileName'], severity='warning')
 
-def check_hash(syn, entities_to_release):
-    """
-    Check that hash of file matches that in Synapse file header
-    """
 
-    error_list = {}
 
-    for i,r in entities_to_release.iterrows():
-        syn_id = r['entityId']
-        try:
-            entity = syn.get(syn_id, downloadLocation = '.cache')
-        except:
-            continue
 
-        synapse_md5 = entity._file_handle.contentMd5
+def check_hash(syn, entities_to_release, verifier=None):
+    """
+    Check that hash of file matches that in Synapse file header
+    """
 
-        with open(entity.path,'rb') as f:
-            data = f.read()
-            md5_returned = hashlib.md5(data).hexdigest()
+    if verifier is None:
+        verifier = HashVerifier(SynapseFileStore(syn))
 
-        match = bool(re.match(synapse_md5, md5_returned))
-        
-        if match == False:
-            error = {syn_id: "File hash does not match provided md5"}
-            error_list.update(error)
+    # exclude accessory folders from check 
+    files = entities_to_release[~(entities_to_release['Component'] == 'AccessoryManifest')]
 
-    return error_list
+    return verifier.verify(files['entityId'])
 
 
 
 
-def adjacent_bios(meta_map,id_prov_table):
+def adjacent_bios(meta_map, prov_index):
     """
     Check adjacent biospecimens exist
     """
-    error_list = {}
 
     bios = meta_map['Biospecimen']
-    bios['Adjacent Biospecimen IDs'] = bios[
-        'Adjacent Biospecimen IDs'].astype(str)
-    
-    for i,r in bios.iterrows():
-        bios_id = r['HTAN Biospecimen ID']
-        adj_bios = r['Adjacent Biospecimen IDs']
-        
-        if pd.isna(adj_bios):
-            continue
-        if adj_bios == 'nan':
-            continue
-        else:
-            adj_bios = adj_bios.replace(';', ',').replace(' ','')
-            adj_ids = adj_bios.split(',')
-            
-            for id in adj_ids:
-                if id in list(meta_map['Biospecimen']['HTAN Biospecimen ID']):
-                    continue
-                
-                else:
-                    downstream_files = get_downstream_files(bios_id,id_prov_table)
-                    
-                    for i,r in downstream_files.iterrows():
-                        error_msg = 'Upstream biospecimen %s is missing adjacent biospecimen %s' % (
-                            bios_id, id)
-                        error_list.update({r['entityId']: error_msg})
+    known_ids = pd.Index(bios['HTAN Biospecimen ID'].dropna().unique())
+
+    # one row per (biospecimen, listed adjacent biospecimen)
+    adjacent = bios[['HTAN Biospecimen ID', 'Adjacent Biospecimen IDs']].dropna()
+    adjacent = adjacent.assign(adjacentId=adjacent['Adjacent Biospecimen IDs'].astype(str))
+    adjacent = adjacent[adjacent['adjacentId'] != 'nan']
+    adjacent = adjacent.assign(adjacentId=adjacent['adjacentId'].str.replace(
+        ';', ',').str.replace(' ', '').str.split(',')).explode('adjacentId')
+
+    missing = adjacent[~adjacent['adjacentId'].isin(known_ids)]
+
+    downstream = missing.merge(prov_index.edges, 
+        left_on='HTAN Biospecimen ID', right_on='upstreamId', how='inner')
+
+    error_msg = 'Upstream biospecimen ' + downstream['HTAN Biospecimen ID'].astype(str) + \
+        ' is missing adjacent biospecimen ' + downstream['adjacentId']
     
-    return error_list
+    return error_table(downstream['entityId'], 'adjacent_bios', error_msg, 
+        context=downstream['adjacentId'])
 
 
 
 
-def unique_bios(meta_map,id_prov_table):
+def unique_bios(meta_map, prov_index):
     """
-    Check adjacent biospecimens exist
+    Check biospecimen IDs are unique
     """
-    error_list = {}
     
-    bios = meta_map['Biospecimen']
-    dup_bios = bios[bios.duplicated(
-        'HTAN Biospecimen ID',keep=False)
-        ].sort_values(by=['HTAN Biospecimen ID'])
-
-    for i,r in dup_bios.iterrows():
-        bios_id = r['HTAN Biospecimen ID']
-        downstream_files = get_downstream_files(bios_id,id_prov_table)
-        manifest_list = list(dup_bios[dup_bios['HTAN Biospecimen ID']==bios_id]['Manifest_Id'])
-        
-        for i,r in downstream_files.iterrows():
-            error_msg = 'Multiple records found for parent biospecimen %s in manifests %s' % (
-                bios_id, manifest_list)
-            
-            error_list.update({r['entityId']: error_msg})
-    
-    return error_list
+    return _unique_upstream(meta_map['Biospecimen'], 'HTAN Biospecimen ID', 
+        prov_index, 'unique_bios', 'Multiple records found for parent biospecimen %s in manifests %s')
 
 
 
-def unique_demographics(meta_map,id_prov_table):
+def unique_demographics(meta_map, prov_index):
     """
-    Check adjacent biospecimens exist
+    Check participant IDs are unique within demographics manifests
     """
-    error_list = {}
     
-    bios = meta_map['Demographics']
-    dup_bios = bios[bios.duplicated(
-        'HTAN Participant ID',keep=False)
-        ].sort_values(by=['HTAN Participant ID'])
-    
-    for i,r in dup_bios.iterrows():
-        case_id = r['HTAN Participant ID']
-        downstream_files = get_downstream_files(case_id,id_prov_table)
-        manifest_list = list(dup_bios[dup_bios['HTAN Participant ID']==case_id]['Manifest_Id'])
-        
-        for i,r in downstream_files.iterrows():
-            error_msg = 'Multiple demographics records found for participant %s in manifests %s' % (
-                case_id, manifest_list)
-            
-            error_list.update({r['entityId']: error_msg})
+    return _unique_upstream(meta_map['Demographics'], 'HTAN Participant ID', 
+        prov_index, 'unique_demographics', 'Multiple demographics records found for participant %s in manifests %s')
+
+
+
+def _unique_upstream(data, id_col, prov_index, code, message):
+    """
+    Flag files downstream of IDs that appear in multiple records
+    """
+
+    dup = data[data.duplicated(id_col, keep=False)].sort_values(
+        by=[id_col], kind='stable')
+    manifests = dup.groupby(id_col, sort=True)['Manifest_Id'].agg(list)
+
+    upstream = pd.DataFrame({
+        'upstreamId': manifests.index,
+        'message': [message % (upstream_id, manifest_list) 
+            for upstream_id, manifest_list in manifests.items()]
+    })
+    downstream = upstream.merge(prov_index.edges, on='upstreamId', how='inner')
     
-    return error_list
+    return error_table(downstream['entityId'], code, downstream['message'], 
+        context=downstream['upstreamId'])
 
 
 
@@ -302,41 +216,24 @@ def parents_exist(entities_to_release,parent_id_map):
     Check all IDs in parentId column exist in primaryId column
     """
     
-    error_list = {}
-    
-    primary_ids = list(parent_id_map['primaryId'])
-    parent = list(parent_id_map['parentId'])
-    diff = list(set(parent).difference(primary_ids))
-
-    missing = parent_id_map[parent_id_map['parentId'].isin(diff)]
+    # anti-join of parent IDs against the primary IDs of all manifests
+    missing = parent_id_map[
+        ~parent_id_map['parentId'].isin(parent_id_map['primaryId'])
+    ]
     release_missing = missing[missing['primaryId'].isin(
         entities_to_release['HTAN Data File ID'])
     ]
     
-    for i,r in release_missing.iterrows():
-        error_msg = 'File %s is missing parent %s' % (r['primaryId'], r['parentId'])
-        error_list.update({r['entityId']: error_msg})
-    
-    return error_list
-
-
-
-def get_downstream_files(biospecimen_id, id_prov_table):
-    """
-    For a given HTAN Biospecimen ID, get all downstream files
-    """
-
-    id_prov_table = id_prov_table[~id_prov_table['Biospecimen_Path'].isna()]
-    files = id_prov_table[id_prov_table['Biospecimen_Path'].str.contains(biospecimen_id)]
+    error_msg = 'File ' + release_missing['primaryId'].astype(str) + \
+        ' is missing parent ' + release_missing['parentId'].astype(str)
     
-    return files
+    return error_table(release_missing['entityId'], 'parents_exist', error_msg, 
+        context=release_missing['parentId'])
 
 
 
+def get_channel_files(syn, new_release, imaging_all, center_map, resolver=None):
 
-def get_channel_files(syn, new_release, imaging_all, center_map):
-
-    error_list = {}
     new_img = imaging_all[imaging_all['entityId'].isin(new_release['entityId'])]
     
     # reference files that are pointed to from assay files, 
@@ -364,14 +261,13 @@ def get_channel_files(syn, new_release, imaging_all, center_map):
         ).unique().tolist() + channel_sub[
         'MERFISH Positions File'].dropna().unique().tolist()
     
-    missing = []
+    center_roots = {value['center_id']: value['synapse_id'] 
+        for value in center_map.values()}
+
+    channel_paths = []
 
-    # walk down provided Synapse path to get entityId of channel metadata file
     for i,r in channel_sub.iterrows():
         channel = r['Channel Metadata Filename']
-        #id = center_map[r['Center_ID']]['synapse_id']
-        id = next((value["synapse_id"] for key, value in center_map.items() if value.get(
-            "center_id") == r['Center_ID'].lower()), None)
         
         if pd.isna(channel) or channel == 'Not Applicable':
             continue
@@ -381,23 +277,22 @@ def get_channel_files(syn, new_release, imaging_all, center_map):
             aux_files.append(channel)
         
         else:
-            folders = channel.split('/')
-            
-            for f in folders:
-                children = list(syn.getChildren(id, includeTypes=['folder','file']))
-                record = [j for j in children if j['name'] == f]
-                if len(record) == 0:
-                    missing.append(channel)
-                    continue
-                else:
-                    id=record[0]['id']
-            
-            aux_files.append(id)
+            channel_paths.append(
+                (center_roots.get(r['Center_ID'].lower()), channel))
+
+    # walk down provided Synapse paths to get entityIds of channel metadata files
+    if resolver is None:
+        resolver = SynapsePathResolver(syn)
+
+    resolved = resolver.resolve_many(channel_paths)
+
+    missing = [path for (root, path), record in resolved.items() if record is None]
+    aux_files += [record[0] for record in resolved.values() if record is not None]
     
     release_missing = new_img[new_img['Channel Metadata Filename'].isin(missing)]
     
-    for i,r in release_missing.iterrows():
-        error_msg = 'Channel metadata file "%s" not found' % r['Channel Metadata Filename']
-        error_list.update({r['entityId']: error_msg})
+    error_msg = 'Channel metadata file "' + \
+        release_missing['Channel Metadata Filename'].astype(str) + '" not found'
     
-    return set(aux_files), error_list
+    return set(aux_files), error_table(release_missing['entityId'], 'channel_files', 
+        error_msg, context=release_missing['Channel Metadata Filename'])
@@ -0,0 +1,179 @@
+import json
+import os
+import time
+import pandas as pd
+
+
+class FileviewSnapshot:
+    """
+    HTAN fileview (syn20446927) rows indexed by Synapse ID.
+
+    Supports bulk version lookups and membership tests that are hash
+    lookups rather than boolean scans of the whole fileview.
+    """
+
+    def __init__(self, fileview):
+        self.frame = fileview
+        self._versions = fileview.drop_duplicates('id').set_index(
+            'id')['currentVersion'].astype('Int64')
+
+
+    def __len__(self):
+        return len(self._versions)
+
+
+    def __contains__(self, syn_id):
+        return syn_id in self._versions.index
+
+
+    def versions_for(self, ids):
+        """
+        Current versions of the given Synapse IDs, as a Series indexed by
+        ID in the order given. IDs missing from the fileview map to <NA>
+        """
+
+        return self._versions.reindex(pd.Index(ids).astype(object))
+
+
+    def missing(self, ids):
+        """
+        Distinct IDs that are not in the fileview
+        """
+
+        ids = pd.Index(ids).unique()
+        return list(ids[~ids.isin(self._versions.index)])
+
+
+FILEVIEW_ID = 'syn20446927'
+
+# test center A, B, C, HTAN HCA immune cells census and test center syn32596076
+EXCLUDED_PROJECTS = ('syn21989705','syn20977135','syn20687304','syn32596076','syn52929270')
+
+# fileview columns replicated: id and currentVersion for version
+# lookups, name through etag to pick and cache manifests, and
+# dataFileHandleId for file handle batches
+FILEVIEW_COLUMNS = [
+    'id', 'currentVersion', 'name', 'parentId', 'projectId',
+    'createdOn', 'modifiedOn', 'etag', 'dataFileHandleId'
+]
+
+
+class FileviewReplica:
+    """
+    Local Parquet copy of the files in the HTAN fileview, excluding
+    test projects.
+
+    refresh() only queries rows modified since the stored modifiedOn
+    watermark and replaces those rows by ID. Deleted entities, and
+    entities moved out of HTAN projects, do not show up in incremental
+    queries; every `reconcile_days` days (HTAN_FILEVIEW_RECONCILE_DAYS)
+    the IDs alone are queried and rows no longer in the view dropped.
+    The whole view is queried again every `full_sync_days` days
+    (HTAN_FILEVIEW_FULL_SYNC_DAYS), or whenever the replicated columns
+    change.
+    """
+
+    def __init__(self, syn, root=None, full_sync_days=None, reconcile_days=None):
+        self.syn = syn
+        self.root = root or os.environ.get('HTAN_FILEVIEW_CACHE', './cache/fileview')
+        self.full_sync_days = full_sync_days if full_sync_days is not None else \
+            float(os.environ.get('HTAN_FILEVIEW_FULL_SYNC_DAYS', 7))
+        self.reconcile_days = reconcile_days if reconcile_days is not None else \
+            float(os.environ.get('HTAN_FILEVIEW_RECONCILE_DAYS', 3))
+
+        self.path = os.path.join(self.root, 'fileview.parquet')
+        self.state_path = os.path.join(self.root, 'state.json')
+
+        os.makedirs(self.root, exist_ok=True)
+
+        if os.path.exists(self.path) and os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as f:
+                self.state = json.load(f)
+            self.frame = pd.read_parquet(self.path)
+        else:
+            self.state = {}
+            self.frame = None
+
+
+    def _query(self, columns=FILEVIEW_COLUMNS, where=''):
+        query = "SELECT %s FROM %s WHERE type = 'file' AND projectId NOT IN (%s)%s" % (
+            ', '.join(columns), FILEVIEW_ID,
+            ','.join("'%s'" % p for p in EXCLUDED_PROJECTS), where)
+
+        return self.syn.tableQuery(query).asDataFrame().reset_index(
+            drop=True).reindex(columns=columns)
+
+
+    def _needs_full_sync(self):
+        if self.frame is None or self.state.get('columns') != FILEVIEW_COLUMNS:
+            return True
+        age = time.time() - self.state.get('last_full_sync', 0)
+        return age > self.full_sync_days * 86400
+
+
+    def _needs_reconcile(self):
+        last = self.state.get('last_reconcile', self.state.get('last_full_sync', 0))
+        return time.time() - last > self.reconcile_days * 86400
+
+
+    def refresh(self, full=False):
+        """
+        Bring the replica up to date and return it
+        """
+
+        start = time.time()
+
+        if full or self._needs_full_sync():
+            self.frame = self._query()
+            self.state['last_full_sync'] = self.state['last_reconcile'] = time.time()
+            print('Fileview: full sync of %d rows' % len(self.frame))
+        else:
+            # >= so rows modified in the same millisecond as the
+            # watermark, but committed after the last query, are seen
+            changed = self._query(where=' AND modifiedOn >= %d' % self.state['watermark'])
+
+            unchanged = self.frame[~self.frame['id'].isin(changed['id'])]
+            self.frame = pd.concat([unchanged, changed], ignore_index=True)
+            print('Fileview: %d rows changed since last sync' % len(changed))
+
+            if self._needs_reconcile():
+                current = self._query(['id'])['id']
+                removed = ~self.frame['id'].isin(current)
+                self.frame = self.frame[~removed].reset_index(drop=True)
+                self.state['last_reconcile'] = time.time()
+                print('Fileview: %d rows removed since last reconcile' % removed.sum())
+
+        self.state['columns'] = FILEVIEW_COLUMNS
+        if len(self.frame):
+            self.state['watermark'] = int(self.frame['modifiedOn'].max())
+        else:
+            self.state.setdefault('watermark', 0)
+
+        self.save()
+        print('Fileview refreshed in %.1fs' % (time.time() - start))
+
+        return self.frame
+
+
+    def save(self):
+        """
+        Write the replica and its watermark atomically
+        """
+
+        tmp = self.path + '.tmp'
+        self.frame.to_parquet(tmp, index=False)
+        os.replace(tmp, self.path)
+
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.state_path)
+
+
+def manifest_rows(fileview):
+    """
+    Fileview rows of metadata manifests
+    """
+
+    return fileview[
+        fileview['name'].str.startswith('synapse_storage_manifest', na=False)]
@@ -4,67 +4,28 @@ import pandas as pd
 import synapseclient
 from google.cloud import bigquery
 
+from validation.synapse_paths import SynapsePathResolver
+from validation.descriptions import DescriptionCatalog
+from validation.bq_loader import BigQueryLoader
 
 
-def load_bq(client, project, dataset, table, data, schema):
-    '''
-    Load table and schema to BigQuery
-    '''
+# manifest columns read when collecting clinical and biospecimen
+# manifests of released files
+REQUIRED_COLUMNS = [
+    'HTAN Participant ID',
+    'HTAN Biospecimen ID'
+]
 
-    print( 'Loading %s.%s.%s to BigQuery' 
-        % (project, dataset, table))
-
-    table_bq = '%s.%s.%s' % (project, dataset, table)
-    job_config = bigquery.LoadJobConfig(
-        schema=schema, 
-        write_disposition="WRITE_TRUNCATE",
-        autodetect=False,
-        allow_jagged_rows=True,
-        allow_quoted_newlines=True,
-        source_format=bigquery.SourceFormat.CSV
-    )
-
-    job = client.load_table_from_dataframe(
-        data, table_bq, job_config=job_config
-    )
-
-
-def get_description(attribute, schema):
-    
-    SHEET_ID = '1RpwQqY7xi-arWJMOMpF0EOhbXPCcQudv8RZ_fp0o_es'
-    SHEET_NAME = 'Sheet1'
-    url = f'https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet={SHEET_NAME}'
-    
-    add_descriptions = pd.read_csv(url)
-    
-    try:
-        dsc = schema[schema['Attribute'] == attribute]['Description'].values[0]
-        description = (dsc[:1024]) if len(dsc) > 1024 else dsc
-
-    except:
-        try:
-            dsc = add_descriptions[
-                add_descriptions['Attribute'] == attribute
-            ]['Description'].values[0]
-            
-            description = (dsc[:1024]) if len(dsc) > 1024 else dsc
-        except:
-            description = 'Description unavailable. Contact DCC for more information'
-            print(
-                '{} attribute not found in HTAN schema'.format(
-                    attribute)
-            )
-
-    return description
-
-    
 
 def bq_release_lists(client, syn, fileview, center_map, entities, 
-    meta_map, id_prov, clinical, biospecimen):
+    meta_map, id_prov, clinical, biospecimen, resolver=None, descriptions=None,
+    loader=None):
 
-    schema = client.query("""
-        SELECT * FROM `htan-dcc.metadata.data-model`
-    """).result().to_dataframe()
+    if descriptions is None:
+        schema = client.query("""
+            SELECT * FROM `htan-dcc.metadata.data-model`
+        """).result().to_dataframe()
+        descriptions = DescriptionCatalog.from_sources(schema)
 
     entities_bq = client.query("""
         SELECT * EXCEPT(channel_metadata_version,
@@ -93,37 +54,44 @@ def bq_release_lists(client, syn, fileview, center_map, entities,
     channel_version = []
     channel_id = []
 
-    # walk down provided Synapse path to 
-    # get entityId of channel metadata file
+    # walk down provided Synapse paths to 
+    # get entityIds of channel metadata files
+    if resolver is None:
+        resolver = SynapsePathResolver(syn)
+
+    channel_paths = [
+        (center_map[center]['synapse_id'], channel) for channel, center 
+        in zip(channel_df['Channel_Metadata_Filename'], channel_df['HTAN_Center'])
+        if not re.search("^(syn)[0-9]{8}$", channel)
+    ]
+    resolved = resolver.resolve_many(channel_paths)
+
+    # current versions come from the fileview, both for Synapse IDs
+    # given directly and for resolved paths
+    versions = fileview.versions_for(list(dict.fromkeys(
+        [c for c in channel_df['Channel_Metadata_Filename']
+            if re.search("^(syn)[0-9]{8}$", c)] +
+        [r[0] for r in resolved.values() if r is not None])))
+
     for i,r in channel_df.iterrows():
         channel = r['Channel_Metadata_Filename']
-        id = center_map[r['HTAN_Center']]['synapse_id']      
         
         # Use Synapse ID directly if provided
         if bool(re.search("^(syn)[0-9]{8}$", channel)):
-            cv = fileview[fileview['id'] == channel]['currentVersion'].values[0]
-            channel_version.append(cv)
+            channel_version.append(versions[channel])
             channel_id.append(channel)
         
         else:
-            folders = channel.split('/')
-            for f in folders:
-                children = list(syn.getChildren(id, 
-                    includeTypes=['folder','file']))
-                record = [j for j in children if j['name'] == f]
+            record = resolved[(center_map[r['HTAN_Center']]['synapse_id'], channel)]
                 
-                if len(record) == 0:
-                    print('Channel metadata file %s not found' % channel)
-                    channel_version.append('Channel file not found')
-                    channel_id.append('Channel file not found')
-                    continue
-                
-                else:
-                    id=record[0]['id']
+            if record is None:
+                print('Channel metadata file %s not found' % channel)
+                channel_version.append('Channel file not found')
+                channel_id.append('Channel file not found')
             
-            cv = fileview[fileview['id'] == id]['currentVersion'].values[0]
-            channel_version.append(cv)
-            channel_id.append(id)
+            else:
+                channel_id.append(record[0])
+                channel_version.append(versions[record[0]])
 
     channel_df['channel_metadata_synapseId'] = channel_id
     channel_df['channel_metadata_version'] = channel_version
@@ -148,7 +116,7 @@ def bq_release_lists(client, syn, fileview, center_map, entities,
                 'name': re.sub('[^0-9a-zA-Z]+', '_', column_name),
                 'type': default_type if column_name not in 
                     ['Manifest_Version'] else 'integer',
-                'description': get_description(column_name, schema)
+                'description': descriptions.get(column_name)
             }
         )
 
@@ -156,7 +124,13 @@ def bq_release_lists(client, syn, fileview, center_map, entities,
         '[^0-9a-zA-Z]+','_', regex=True
     )
 
-    load_bq(client, 'htan-dcc', 'data_release', 'shortlist', 
+    if loader is None:
+        loader = BigQueryLoader(client)
+        wait = True
+    else:
+        wait = False
+
+    loader.submit('data_release', 'shortlist', 
         entities.drop_duplicates(), ent_schema
     )
 
@@ -209,11 +183,8 @@ def bq_release_lists(client, syn, fileview, center_map, entities,
 
     metadata.dropna(subset=['Manifest_Id'],inplace=True)
 
-    metadata = metadata.merge(fileview,how='left',
-        left_on='Manifest_Id',right_on='id')
-
-    metadata = metadata[['Manifest_Id','currentVersion']].rename(
-        columns={'currentVersion': 'Manifest_Version'}
+    metadata = metadata[['Manifest_Id']].assign(
+        Manifest_Version=fileview.versions_for(metadata['Manifest_Id']).values
     )
 
     met_schema = []
@@ -225,12 +196,14 @@ def bq_release_lists(client, syn, fileview, center_map, entities,
                 'name': re.sub('[^0-9a-zA-Z]+', '_', column_name),
                 'type': default_type if column_name not in 
                     ['Manifest_Version'] else 'integer',
-                'description': get_description(column_name, schema)
+                'description': descriptions.get(column_name)
             }
         )
 
     # load to BQ
-    load_bq(client, 
-        'htan-dcc', 'data_release', 'manifests',
+    loader.submit('data_release', 'manifests',
         metadata.drop_duplicates(), met_schema
     )
+
+    if wait:
+        loader.wait()
@@ -2,21 +2,47 @@ import glob
 import pandas as pd
 import os
 import json
+import time
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from validation.manifest_validation import check_attributes, extra_columns
-
-def GetManifests(syn, center_map):
-
-    url = 'https://raw.githubusercontent.com/ncihtan/data-models/main/HTAN.model.csv'
-    schema = pd.read_csv(url)
-
-    # Exclude test center A, B, C and HTAN HCA immune cells census and test center syn32596076
-    manifests = syn.tableQuery("SELECT * FROM syn20446927 \
-        WHERE name LIKE 'synapse_storage_manifest%'  \
-        AND projectId NOT IN \
-        ('syn21989705','syn20977135','syn20687304','syn32596076','syn52929270')"
-        ).asDataFrame()
+from validation.manifest_store import ManifestStore
+from validation.accumulator import ComponentAccumulator, CATEGORICAL_COLUMNS
+from validation.parallel import retry, max_workers
+from validation import ingest
+
+def GetManifests(syn, center_map, store=None, schema=None, columns=None,
+    manifests=None):
+    """
+    Download latest metadata manifests and merge them by component.
+    Manifests whose version and etag are unchanged since the last run
+    are served from the local manifest store.
+
+    If columns is given, only those columns are kept (lean ingest) and
+    low-cardinality columns are stored as categoricals. Attribute and
+    extra-column checks always see the full manifest header.
+
+    manifests are the fileview rows of manifest files, e.g. from
+    fileview.manifest_rows(); the fileview is queried if not given
+    """
+
+    if store is None:
+        store = ManifestStore()
+
+    if schema is None:
+        url = 'https://raw.githubusercontent.com/ncihtan/data-models/main/HTAN.model.csv'
+        schema = ingest.read_csv(url)
+
+    if manifests is None:
+        # Exclude test center A, B, C and HTAN HCA immune cells census and test center syn32596076
+        manifests = syn.tableQuery("SELECT * FROM syn20446927 \
+            WHERE name LIKE 'synapse_storage_manifest%'  \
+            AND projectId NOT IN \
+            ('syn21989705','syn20977135','syn20687304','syn32596076','syn52929270')"
+            ).asDataFrame()
+    else:
+        manifests = manifests.copy()
 
     manifests['modifiedDate'] = pd.to_datetime(manifests['modifiedOn'], unit = 'ms').dt.date
     manifests['createdDate'] = pd.to_datetime(manifests['createdOn'], unit = 'ms').dt.date
@@ -36,9 +62,16 @@ def GetManifests(syn, center_map):
     metadata_manifests = manifest_latest.groupby(['projectId'])
 
     # --------------------------------------------------------------------------
-    meta_map = {}
+    if columns is not None:
+        # columns GetManifests itself needs
+        columns = set(columns) | {'Component', 'File Format'}
+        components = ComponentAccumulator(categorical=CATEGORICAL_COLUMNS)
+    else:
+        components = ComponentAccumulator()
     extra_cols = {}
 
+    tasks = []
+
     for project_id, dataset_group in metadata_manifests:
 
         center = syn.get(project_id[0], downloadFile = False).name
@@ -49,21 +82,31 @@ def GetManifests(syn, center_map):
 
         center_id = center_map[center]['center_id']
 
-        datasets = dataset_group.to_dict("records")
+        for dataset in dataset_group.to_dict("records"):
+            tasks.append((center, center_id, dataset))
+
+    # download and parse manifests concurrently; results are consumed
+    # in submission order so meta_map is assembled deterministically
+    start = time.time()
+    fetch_time = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers('HTAN_MANIFEST_WORKERS', 8)) as pool:
 
-        for dataset in datasets:
-            manifest_location = './cache/' + center_id + "/" + dataset["id"] + "/"
-            manifest_path = manifest_location + "synapse_storage_manifest.csv"
+        futures = [
+            pool.submit(_fetch_manifest, syn, store, center_id, dataset, columns)
+            for center, center_id, dataset in tasks
+        ]
+
+        for (center, center_id, dataset), future in zip(tasks, futures):
 
             manifest_id = dataset["id"]
+            fetched = future.result()
 
-            try:
-                manifest = syn.get(manifest_id, downloadLocation=manifest_location, ifcollision='overwrite.local')
-                os.rename(glob.glob(manifest_location + "*.csv")[0], manifest_path)
-            except:
+            if fetched is None:
                 continue
 
-            manifest_data = pd.read_csv(manifest_path)
+            manifest_data, header, manifest_version, seconds = fetched
+            fetch_time[center] = fetch_time.get(center, 0) + seconds
 
             # Exclude bai files from release
             if 'File Format' in manifest_data.columns:
@@ -76,22 +119,71 @@ def GetManifests(syn, center_map):
                 continue
 
             # check that manifest contains mandatory DependsOn attributes
-            check_attributes(manifest_data, component, manifest_id)
+            check_attributes(header, component, manifest_id)
 
             # check whether manifests contain non-data-model columns
-            extra_cols = extra_columns(list(manifest_data.columns), 
+            extra_cols = extra_columns(header, 
                 component.lower(), schema, extra_cols, manifest_id)
 
             # add in manifest id and center name columns
             manifest_data['Manifest_Id'] = manifest_id
             manifest_data['HTAN Center'] = center
-            manifest_data['Manifest_Version'] = manifest.versionNumber
+            manifest_data['Manifest_Version'] = manifest_version
+
+            # collect manifests by component; each component is
+            # concatenated once below
+            components.add(component, manifest_data)
+
+    meta_map = components.to_dict()
 
-            # create metadata map by merging manifests by component
-            if component in meta_map:
-                meta_map[component] = pd.concat(
-                    [meta_map[component],manifest_data]).reset_index(drop=True)
-            else:
-                meta_map[component] = manifest_data
+    store.prune(manifest_latest['id'])
+    store.save()
+
+    print('Manifest store: %d unchanged, %d downloaded' % (store.hits, store.misses))
+    print('Fetched %d manifests in %.1fs' % (len(tasks), time.time() - start))
+    for center, seconds in sorted(fetch_time.items(), key=lambda x: -x[1]):
+        print('  %s: %.1fs' % (center, seconds))
 
     return meta_map, extra_cols
+
+
+def _fetch_manifest(syn, store, center_id, dataset, columns=None):
+    """
+    Get parsed manifest data and its full column header from the
+    manifest store, downloading it from Synapse if it is new or has
+    changed. The store always keeps every column; only `columns` are
+    returned when given. Returns None if the manifest could not be
+    downloaded
+    """
+
+    start = time.time()
+
+    manifest_id = dataset["id"]
+    manifest_version = int(dataset["currentVersion"])
+    manifest_etag = str(dataset.get("etag"))
+
+    manifest_data = store.get(manifest_id, manifest_version, manifest_etag, columns)
+
+    if manifest_data is None:
+        manifest_location = './cache/' + center_id + "/" + manifest_id + "/"
+        manifest_path = manifest_location + "synapse_storage_manifest.csv"
+
+        try:
+            manifest = retry(syn.get, manifest_id,
+                downloadLocation=manifest_location, ifcollision='overwrite.local')
+            os.rename(glob.glob(manifest_location + "*.csv")[0], manifest_path)
+        except Exception as e:
+            print('Manifest %s could not be downloaded: %s' % (manifest_id, e))
+            return None
+
+        manifest_version = manifest.versionNumber
+        manifest_data = ingest.read_csv(manifest_path)
+        store.put(manifest_id, manifest_version, manifest_etag, manifest_data)
+        header = list(manifest_data.columns)
+
+        if columns is not None:
+            manifest_data = manifest_data[[c for c in header if c in columns]]
+    else:
+        header = store.header(manifest_id)
+
+    return manifest_data, header, manifest_version, time.time() - start
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import pandas as pd
+import requests
+
+from concurrent.futures import ThreadPoolExecutor
+from validation.errors import error_table
+from validation.parallel import retry, max_workers
+
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+HANDLE_COLUMNS = ['entityId', 'fileHandleId', 'contentMd5', 'contentSize']
+
+
+class SynapseFileStore:
+    """
+    File handle records and file contents of Synapse file entities.
+    Contents are streamed from pre-signed URLs in chunks and never
+    written to disk.
+
+    A file store provides handles(entity_ids), returning HANDLE_COLUMNS,
+    and stream(entity_id, file_handle_id), yielding the file's bytes in
+    chunks; benchmarks.fakes.FakeFileStore is a local stand-in.
+
+    With a FileHandleFetcher, handles are looked up in batches from the
+    fileview's file handle IDs instead of one entity at a time.
+    """
+
+    def __init__(self, syn, fetcher=None, workers=None, chunk_size=CHUNK_SIZE):
+        self.syn = syn
+        self.fetcher = fetcher
+        self.workers = workers or max_workers('HTAN_SYNAPSE_WORKERS', 8)
+        self.chunk_size = chunk_size
+
+
+    def _handle(self, entity_id):
+        try:
+            entity = retry(self.syn.get, entity_id, downloadFile=False)
+        except Exception as e:
+            print('File handle of %s not retrieved: %s' % (entity_id, e))
+            return None
+
+        handle = entity._file_handle
+        return {
+            'entityId': entity_id,
+            'fileHandleId': handle.get('id'),
+            'contentMd5': handle.get('contentMd5'),
+            'contentSize': handle.get('contentSize')
+        }
+
+
+    def handles(self, entity_ids):
+        """
+        File handle ID, MD5 and size of each entity's current version.
+        Entities whose handle cannot be retrieved are left out
+        """
+
+        if self.fetcher is not None:
+            handles = self.fetcher.handles(entity_ids)
+            return handles.dropna(subset=['fileHandleId'])[HANDLE_COLUMNS]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            records = [r for r in pool.map(self._handle, entity_ids) if r is not None]
+
+        return pd.DataFrame(records, columns=HANDLE_COLUMNS)
+
+
+    def stream(self, entity_id, file_handle_id):
+        body = {
+            'includeFileHandles': False,
+            'includePreSignedURLs': True,
+            'requestedFiles': [{
+                'fileHandleId': file_handle_id,
+                'associateObjectId': entity_id,
+                'associateObjectType': 'FileEntity'
+            }]
+        }
+        result = self.syn.restPOST('/fileHandle/batch', body=json.dumps(body),
+            endpoint=self.syn.fileHandleEndpoint)['requestedFiles'][0]
+
+        if 'preSignedURL' not in result:
+            raise RuntimeError(result.get('failureCode', 'no download URL'))
+
+        with requests.get(result['preSignedURL'], stream=True, timeout=60) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                yield chunk
+
+
+class HashCache:
+    """
+    Persistent MD5 results keyed by (file handle ID, contentMd5). File
+    handles are immutable, so a handle is only ever hashed once
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get('HTAN_HASH_CACHE', './cache/hashes.json')
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                self.results = json.load(f)
+        else:
+            self.results = {}
+
+
+    @staticmethod
+    def _key(file_handle_id, content_md5):
+        return '%s:%s' % (file_handle_id, content_md5)
+
+
+    def get(self, file_handle_id, content_md5):
+        """
+        MD5 computed for a file handle, or None if not hashed yet
+        """
+
+        return self.results.get(self._key(file_handle_id, content_md5))
+
+
+    def put(self, file_handle_id, content_md5, md5):
+        with self._lock:
+            self.results[self._key(file_handle_id, content_md5)] = md5
+
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        with self._lock:
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(self.results, f)
+            os.replace(tmp, self.path)
+
+
+class HashVerifier:
+    """
+    Compare file contents with the MD5 recorded in their file handles.
+
+    Files are streamed and hashed chunk by chunk, several at a time.
+    Each run hashes at most `byte_budget` bytes (HTAN_HASH_BUDGET_GB,
+    default 10) and stops after `time_budget` seconds
+    (HTAN_HASH_BUDGET_SECONDS, default 300), abandoning files still
+    being streamed; files left over are picked up by later runs, as
+    results are kept in the hash cache.
+
+    Mismatches are reported as warnings; they do not block release.
+    """
+
+    def __init__(self, store, cache=None, workers=None, byte_budget=None,
+        time_budget=None):
+
+        self.store = store
+        self.cache = cache or HashCache()
+        self.workers = workers or max_workers('HTAN_HASH_WORKERS', 4)
+        self.byte_budget = byte_budget if byte_budget is not None else \
+            float(os.environ.get('HTAN_HASH_BUDGET_GB', 10)) * 1024**3
+        self.time_budget = time_budget if time_budget is not None else \
+            float(os.environ.get('HTAN_HASH_BUDGET_SECONDS', 300))
+
+
+    def _hash(self, entity_id, file_handle_id, content_md5, deadline):
+
+        if time.time() > deadline:
+            return None
+
+        stream = self.store.stream(entity_id, file_handle_id)
+        try:
+            md5 = hashlib.md5()
+            for chunk in stream:
+                if time.time() > deadline:
+                    # out of time; the file is hashed by a later run
+                    return None
+                md5.update(chunk)
+        except Exception as e:
+            print('File %s not hashed: %s' % (entity_id, e))
+            return None
+        finally:
+            stream.close()
+
+        digest = md5.hexdigest()
+        self.cache.put(file_handle_id, content_md5, digest)
+
+        return digest
+
+
+    def verify(self, entity_ids):
+        """
+        Warnings for entities whose contents do not match their
+        recorded MD5
+        """
+
+        start = time.time()
+
+        handles = self.store.handles(pd.Index(entity_ids).dropna().unique())
+        handles = handles.dropna(subset=['fileHandleId', 'contentMd5'])
+
+        handles['md5'] = [self.cache.get(h, m) for h, m
+            in zip(handles['fileHandleId'], handles['contentMd5'])]
+        handles['contentSize'] = pd.to_numeric(handles['contentSize'], errors='coerce')
+        from_cache = handles['md5'].notna().sum()
+
+        # hash new file handles, smallest first, within the byte budget
+        todo = handles[handles['md5'].isna()].drop_duplicates('fileHandleId')
+        todo = todo.sort_values('contentSize', kind='stable')
+        todo = todo[todo['contentSize'].fillna(0).cumsum() <= self.byte_budget]
+
+        deadline = start + self.time_budget
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                hashed = dict(zip(todo['fileHandleId'], pool.map(
+                    self._hash, todo['entityId'], todo['fileHandleId'],
+                    todo['contentMd5'], [deadline] * len(todo))))
+        finally:
+            self.cache.save()
+
+        hashed = {h: md5 for h, md5 in hashed.items() if md5 is not None}
+        handles['md5'] = handles['md5'].mask(handles['md5'].isna(),
+            handles['fileHandleId'].map(hashed))
+
+        checked = handles.dropna(subset=['md5'])
+        mismatch = checked[checked['md5'] != checked['contentMd5']]
+
+        hashed_bytes = todo.loc[todo['fileHandleId'].isin(list(hashed)), 'contentSize'].sum()
+        print('Hash check: %d files, %d from cache, %d hashed (%.1f GB), '
+            '%d not checked, %d mismatches in %.1fs' % (
+            len(handles), from_cache, len(hashed), hashed_bytes / 1024**3,
+            len(handles) - len(checked), len(mismatch), time.time() - start))
+
+        return error_table(mismatch['entityId'], 'check_hash',
+            'File hash does not match provided md5', context=mismatch['md5'],
+            severity='warning')
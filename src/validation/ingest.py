@@ -0,0 +1,122 @@
+import io
+import os
+import urllib.request
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as csv
+import pyarrow.parquet as pq
+
+
+# Values read as missing, matching the pandas C parser defaults
+NULL_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null'
+]
+
+_STRING_TYPES = {
+    pa.string(): pd.StringDtype('pyarrow'),
+    pa.large_string(): pd.StringDtype('pyarrow')
+}
+
+
+def csv_backend():
+    """
+    CSV parser used for manifests, the data model and Google Sheets:
+    'pyarrow' (default) or 'pandas' for the pandas C parser. Set with
+    HTAN_CSV_BACKEND
+    """
+
+    return os.environ.get('HTAN_CSV_BACKEND', 'pyarrow').lower()
+
+
+def read_csv(source, backend=None):
+    """
+    Read a CSV file or URL into a data frame.
+
+    With the pyarrow backend the file is parsed by Arrow's multithreaded
+    reader and string columns are kept Arrow-backed (string[pyarrow]).
+    Values are typed as the pandas C parser would type them: dates and
+    times stay strings and all-empty columns are float NaN. Files Arrow
+    cannot parse, e.g. rows with a missing trailing field, are read
+    again with the pandas C parser.
+    """
+
+    backend = backend or csv_backend()
+
+    if backend != 'pyarrow':
+        return pd.read_csv(source)
+
+    if isinstance(source, str) and source.startswith(('http://', 'https://')):
+        with urllib.request.urlopen(source) as response:
+            source = io.BytesIO(response.read())
+
+    try:
+        return _read_arrow(source)
+    except (pa.ArrowInvalid, ValueError) as e:
+        print('Arrow could not parse %s, using pandas parser: %s' % (
+            source if isinstance(source, str) else 'CSV', str(e).splitlines()[0]))
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    return pd.read_csv(source)
+
+
+def _read_arrow(source, column_types=None):
+
+    table = csv.read_csv(
+        source,
+        parse_options=csv.ParseOptions(newlines_in_values=True),
+        convert_options=csv.ConvertOptions(
+            column_types=column_types,
+            null_values=NULL_VALUES,
+            strings_can_be_null=True,
+            true_values=['True', 'TRUE', 'true'],
+            false_values=['False', 'FALSE', 'false']
+        )
+    )
+
+    names = table.column_names
+    if len(set(names)) != len(names) or '' in names:
+        # pandas renames blank and duplicate headers
+        raise ValueError('blank or duplicate column names')
+
+    # Arrow infers ISO dates and times; keep them as text like pandas
+    temporal = {
+        field.name: pa.string() for field in table.schema
+        if pa.types.is_temporal(field.type)
+    }
+    if temporal and column_types is None:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return _read_arrow(source, temporal)
+
+    return to_pandas(table)
+
+
+def to_pandas(table):
+    """
+    Convert an Arrow table keeping string columns Arrow-backed
+    """
+
+    data = table.to_pandas(types_mapper=_STRING_TYPES.get)
+
+    for field in table.schema:
+        if pa.types.is_null(field.type):
+            data[field.name] = np.nan
+
+    return data
+
+
+def read_parquet(path, columns=None, backend=None):
+    """
+    Read a Parquet file written from data read by read_csv, with the
+    same string column types
+    """
+
+    if (backend or csv_backend()) != 'pyarrow':
+        return pd.read_parquet(path, columns=columns)
+
+    return to_pandas(pq.read_table(path, columns=columns))
@@ -1,9 +1,29 @@
 import pandas as pd
 
+from validation.accumulator import concat
+
+
+# manifest columns read by GetParentIds and FullFileList
+REQUIRED_COLUMNS = [
+    'HTAN Data File ID',
+    'HTAN Biospecimen ID',
+    'HTAN Parent Data File ID',
+    'HTAN Parent Biospecimen ID',
+    'HTAN Parent ID',
+    'Filename',
+    'entityId',
+    'Id',
+    'Uuid',
+    'Accessory Synapse ID',
+    'Component'
+]
 
 def GetParentIds(meta_map):
     """
-    Create table containing primary and parent IDs from all manifests
+    Create deduplicated edge table of (primaryId, parentId, entityId,
+    Component) from all manifests. Parent ID cells may list several
+    IDs separated by ',' or ';'. Rows without a parent ID are dropped;
+    rows without a primary ID are kept with a missing primaryId
     """
     
     primary_cols = [
@@ -18,32 +38,58 @@ def GetParentIds(meta_map):
     ]
 
     all_cols = primary_cols + parent_cols + ['entityId','Component']
-    id_list = pd.DataFrame(columns=all_cols)
-        
-    for component in meta_map:
-        data = meta_map[component]
-        id_list = pd.concat(
-            [id_list,data],axis=0
-        ).reset_index(drop=True)[all_cols]
-    
-    id_list['primaryId'] = [[e for e in row if e==e] for row 
-        in id_list[primary_cols].values.tolist()]
-    id_list['parentId'] = [[e for e in row if e==e] for row 
-        in id_list[parent_cols].values.tolist()]
-        
-    id_list = id_list[[
-        'primaryId','parentId','entityId','Component']].explode(
-        'primaryId').explode('parentId')
-        
-    id_list = id_list.assign(parentId = \
-        id_list.parentId.str.split("[,;]")).explode('parentId')
 
-    id_list = id_list[id_list['parentId'].str.contains('Not') == False]
-    id_list = id_list.applymap(
-        lambda x: x.strip() if isinstance(x, str) else x
-    ).drop_duplicates()
-        
-    return id_list
+    # select the ID columns of every component and concatenate once
+    id_list = pd.concat(
+        [data[data.columns.intersection(all_cols)] for data in meta_map.values()],
+        axis=0, ignore_index=True
+    ).reindex(columns=all_cols)
+    id_list.index.name = 'row'
+
+    # one row per (manifest row, non-missing ID), in manifest row order
+    primary = _melt_ids(id_list, primary_cols, 'primaryId')
+
+    parent = _melt_ids(id_list, parent_cols, 'parentId')
+    parent['parentId'] = parent['parentId'].str.split('[,;]', regex=True)
+    parent = parent.explode('parentId')
+    parent = parent[~parent['parentId'].str.contains('Not', na=True)]
+
+    edges = id_list[['entityId','Component']].join(primary, how='left')
+    edges = edges.join(parent, how='inner')
+
+    edges = edges[['primaryId','parentId','entityId','Component']]
+    for column in edges.columns:
+        edges[column] = _strip(edges[column])
+
+    edges = edges.drop_duplicates().reset_index(drop=True)
+    edges['Component'] = edges['Component'].astype('category')
+
+    return edges
+
+
+def _melt_ids(id_list, columns, name):
+    """
+    Stack the given ID columns into a single column indexed by row,
+    dropping missing values
+    """
+
+    ids = id_list[columns].melt(value_name=name, ignore_index=False)
+    ids = ids.dropna(subset=[name])
+
+    ids[name] = ids[name].astype(object)
+
+    return ids[[name]].sort_index(kind='stable')
+
+
+def _strip(values):
+    """
+    Strip whitespace from string values, leaving other values as is
+    """
+
+    values = values.astype(object)
+    stripped = values.str.strip()
+
+    return stripped.where(stripped.notna(), values)
 
 
 
@@ -53,7 +99,7 @@ def FullFileList(meta_map, files):
     Get table listing of all HTAN files
     """
     
-    file_list = pd.DataFrame()
+    file_lists = [pd.DataFrame()]
     
     for comp in meta_map:
         if any(s in comp for s in files):
@@ -81,10 +127,9 @@ def FullFileList(meta_map, files):
             if comp != 'AccessoryManifest' and comp != 'Biospecimen' and comp != 'SRRSBiospecimen':
                 if 'entityId' not in df.columns:
                     continue
-            file_list = pd.concat([file_list,df[cols]], 
-                axis=0, ignore_index=True
-            )
+            file_lists.append(df[cols])
     
+    file_list = concat(file_lists)
     file_list['Id'] = file_list['Id'].fillna(file_list['Uuid'])
     file_list.drop(columns=['Uuid'],inplace=True)
     
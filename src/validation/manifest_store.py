@@ -0,0 +1,134 @@
+import json
+import os
+import pyarrow.parquet as pq
+import threading
+
+from validation import ingest
+
+
+class ManifestStore:
+    """
+    Persistent store of parsed metadata manifests keyed by
+    (manifest id, version, etag).
+
+    Parsed manifests are kept as Parquet files under `root` alongside
+    an index recording the version and etag each copy was made from.
+    A manifest is only downloaded again when the fileview reports a
+    different version or etag.
+    """
+
+    def __init__(self, root=None):
+
+        self.root = root or os.environ.get(
+            'HTAN_MANIFEST_CACHE', './cache/manifests')
+        self.index_path = os.path.join(self.root, 'index.json')
+
+        os.makedirs(self.root, exist_ok=True)
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+
+    def _path(self, manifest_id, version):
+        return os.path.join(self.root, '%s.v%s.parquet' % (manifest_id, version))
+
+
+    def get(self, manifest_id, version, etag, columns=None):
+        """
+        Return cached manifest data, or None if the cached copy
+        is missing or stale. If columns is given, only those of them
+        present in the manifest are read
+        """
+
+        with self._lock:
+            record = self.index.get(manifest_id)
+
+            if record is None or record['version'] != str(int(version)) \
+                or record['etag'] != etag or not os.path.exists(record['path']):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        if columns is not None:
+            header = self.header(manifest_id)
+            columns = [c for c in header if c in set(columns)]
+
+        return ingest.read_parquet(record['path'], columns=columns)
+
+
+    def header(self, manifest_id):
+        """
+        Column names of a cached manifest, without reading its data
+        """
+
+        with self._lock:
+            record = self.index[manifest_id]
+
+            if 'columns' not in record:
+                # index written before headers were recorded
+                record['columns'] = pq.read_schema(record['path']).names
+
+            return record['columns']
+
+
+    def put(self, manifest_id, version, etag, data):
+        """
+        Store parsed manifest data, replacing any older version
+        """
+
+        path = self._path(manifest_id, version)
+
+        # written atomically, as the store outlives the run
+        tmp = path + '.tmp'
+        try:
+            data.to_parquet(tmp, index=False)
+        except Exception as e:
+            # manifests with mixed-type columns cannot be written
+            # as Parquet; these are simply downloaded again next run
+            print('Manifest %s not cached: %s' % (manifest_id, e))
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        os.replace(tmp, path)
+
+        with self._lock:
+            old = self.index.get(manifest_id)
+            if old is not None and old['path'] != path and os.path.exists(old['path']):
+                os.remove(old['path'])
+
+            self.index[manifest_id] = {
+                'version': str(int(version)),
+                'etag': etag,
+                'path': path,
+                'columns': list(data.columns)
+            }
+
+
+    def prune(self, manifest_ids):
+        """
+        Drop cached manifests that are no longer current
+        """
+
+        for manifest_id in set(self.index) - set(manifest_ids):
+            path = self.index.pop(manifest_id)['path']
+            if os.path.exists(path):
+                os.remove(path)
+
+
+    def save(self):
+        """
+        Write the store index to disk
+        """
+
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
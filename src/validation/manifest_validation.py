@@ -1,9 +1,9 @@
 import pandas as pd
 import sys
 
-def check_attributes(manifest, component, manifest_id):
+def check_attributes(columns, component, manifest_id):
 
-    cols = list(manifest.columns)
+    cols = list(columns)
 
     l1_required = ['Component', 'Filename', 'File Format', 'HTAN Parent Biospecimen ID', 'HTAN Data File ID']
     l234_required = ['Component', 'Filename', 'File Format', 'HTAN Parent Data File ID', 'HTAN Data File ID']
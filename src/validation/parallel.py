@@ -0,0 +1,54 @@
+import os
+import random
+import threading
+import time
+
+
+def retry(func, *args, attempts=3, backoff=2.0, **kwargs):
+    """
+    Call func, retrying with exponential backoff and jitter on failure.
+    The last exception is raised once all attempts are used up
+    """
+
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(backoff ** attempt + random.uniform(0, 1))
+
+
+def max_workers(env_var, default):
+    """
+    Worker count for a thread pool, overridable from the environment
+    """
+
+    return max(1, int(os.environ.get(env_var, default)))
+
+
+class RateLimiter:
+    """
+    Space out calls made from several threads to at most `rate` per
+    second. A rate of 0 or None does not limit
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+
+    def wait(self):
+        with self._lock:
+            slot = max(time.monotonic(), self._next)
+            self._next = slot + self.interval
+
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+    def call(self, func, *args, **kwargs):
+        self.wait()
+        return func(*args, **kwargs)
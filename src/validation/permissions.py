@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from validation.parallel import retry, max_workers, RateLimiter
+
+
+# access granted to released entities: registered Synapse users
+# (273948) may download, anyone may read
+RELEASE_ACCESS = {
+    '273948': ['DOWNLOAD', 'READ'],
+    'PUBLIC': ['READ']
+}
+
+PLAN_COLUMNS = ['entityId', 'principalId', 'current', 'desired', 'change', 'error']
+
+# journal statuses of permissions that need no further work
+DONE = ('applied', 'unchanged')
+
+
+class AclPublisher:
+    """
+    Grant release access to Synapse entities.
+
+    plan() reads the current permissions of every (entity, principal)
+    pair and lists the changes needed; apply() makes only those. Calls
+    run several at a time (HTAN_SYNAPSE_WORKERS) under a shared rate
+    limit of `rate` calls per second.
+
+    Every pair applied or found already correct is appended to a JSONL
+    journal. Pairs in the journal are left out of later plans, so an
+    interrupted run resumes where it stopped; failed pairs are retried.
+    """
+
+    def __init__(self, syn, journal_path, access=RELEASE_ACCESS, workers=None, rate=10):
+        self.syn = syn
+        self.journal_path = journal_path
+        self.access = {p: sorted(a) for p, a in access.items()}
+        self.workers = workers or max_workers('HTAN_SYNAPSE_WORKERS', 8)
+        self.limiter = RateLimiter(rate)
+        self._lock = threading.Lock()
+
+
+    def done(self):
+        """
+        (entityId, principalId) pairs the journal records as done
+        """
+
+        pairs = set()
+        if not os.path.exists(self.journal_path):
+            return pairs
+
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # line cut short by an interrupted run
+                    continue
+                if entry['status'] in DONE:
+                    pairs.add((entry['entityId'], entry['principalId']))
+
+        return pairs
+
+
+    def _read(self, entity_id, principal_id):
+        desired = self.access[principal_id]
+
+        try:
+            current = sorted(retry(self.limiter.call, self.syn.getPermissions,
+                entity_id, principal_id))
+        except Exception as e:
+            return [entity_id, principal_id, None, desired, False, str(e)]
+
+        return [entity_id, principal_id, current, desired, current != desired, None]
+
+
+    def plan(self, entity_ids):
+        """
+        Current and desired access of each (entity, principal) pair not
+        yet done. `change` marks the pairs apply() will set; `error`
+        holds the reason permissions could not be read
+        """
+
+        done = self.done()
+        pairs = [(e, p) for e in dict.fromkeys(entity_ids) for p in self.access
+            if (e, p) not in done]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            rows = list(pool.map(lambda pair: self._read(*pair), pairs))
+
+        print('ACL plan: %d entities, %d permissions already done, %d to check' % (
+            len(dict.fromkeys(entity_ids)), len(done), len(pairs)))
+
+        return pd.DataFrame(rows, columns=PLAN_COLUMNS).astype({'change': bool})
+
+
+    @staticmethod
+    def report(plan):
+        """
+        Number of permissions to change, already correct and unreadable
+        by principal
+        """
+
+        status = pd.Series('unchanged', index=plan.index, name='status')
+        status[plan['change']] = 'change'
+        status[plan['error'].notna()] = 'error'
+
+        return pd.crosstab(plan['principalId'], status).reindex(
+            columns=['change', 'unchanged', 'error'], fill_value=0)
+
+
+    def _record(self, journal, entity_id, principal_id, status, error=None):
+        entry = {'entityId': entity_id, 'principalId': principal_id, 'status': status}
+        if error is not None:
+            entry['error'] = error
+
+        with self._lock:
+            journal.write(json.dumps(entry) + '\n')
+            journal.flush()
+
+
+    def _apply(self, journal, entity_id, principal_id, desired):
+        try:
+            retry(self.limiter.call, self.syn.setPermissions, entity_id,
+                principalId=principal_id, accessType=desired)
+        except Exception as e:
+            self._record(journal, entity_id, principal_id, 'failed', str(e))
+            return 'failed'
+
+        self._record(journal, entity_id, principal_id, 'applied')
+        return 'applied'
+
+
+    def apply(self, plan):
+        """
+        Set the permissions marked for change and journal every pair of
+        the plan. Returns the number of pairs by status
+        """
+
+        os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+
+        changes = plan[plan['change']]
+        unchanged = plan[~plan['change'] & plan['error'].isna()]
+
+        with open(self.journal_path, 'a+') as journal:
+            # start on a new line after an entry cut short by an
+            # interrupted run
+            if journal.tell() > 0:
+                journal.seek(journal.tell() - 1)
+                if journal.read(1) != '\n':
+                    journal.write('\n')
+
+            for entity_id, principal_id in zip(unchanged['entityId'], unchanged['principalId']):
+                self._record(journal, entity_id, principal_id, 'unchanged')
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                statuses = list(pool.map(
+                    lambda row: self._apply(journal, *row),
+                    zip(changes['entityId'], changes['principalId'], changes['desired'])))
+
+        counts = pd.Series(statuses, dtype=object).value_counts().to_dict()
+        counts['unchanged'] = len(unchanged)
+        counts['unreadable'] = int(plan['error'].notna().sum())
+        print('ACL changes: %s' % ', '.join('%s %d' % kv for kv in counts.items()))
+
+        return counts
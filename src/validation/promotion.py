@@ -0,0 +1,181 @@
+import re
+import pandas as pd
+
+from google.cloud import bigquery
+from validation.bq_loader import BigQueryLoader
+
+
+# columns of released.entities, all STRING
+ENTITY_COLUMNS = [
+    'entityId', 'Data_Release', 'Id', 'type', 'CDS_Release', 'IDC_Release',
+    'Component', 'channel_metadata_version', 'channel_metadata_synapseId'
+]
+
+# small tables loaded for promotion; the shortlist, manifests and
+# released tables never leave the warehouse
+BAI_FILES_TABLE = 'bai_files'
+MANIFEST_VERSIONS_TABLE = 'manifest_versions'
+
+
+class BigQueryEngine:
+    """
+    Runs promotion statements in BigQuery. An engine provides
+    table(dataset, table), execute(sql, params), query(sql, params),
+    load(dataset, table, data), copy(dataset, source, destination) and
+    describe(dataset, table, descriptions);
+    benchmarks.fakes.DuckDBEngine runs the same statements locally.
+
+    Statements use BigQuery syntax with @name string parameters.
+    """
+
+    def __init__(self, client, project='htan-dcc'):
+        self.client = client
+        self.project = project
+
+
+    def table(self, dataset, table):
+        return '`%s.%s.%s`' % (self.project, dataset, table)
+
+
+    def execute(self, sql, params=None):
+        self._run(sql, params)
+
+
+    def query(self, sql, params=None):
+        """
+        Run a statement and return its rows as a data frame
+        """
+
+        return self._run(sql, params).to_dataframe()
+
+
+    def _run(self, sql, params):
+        job_config = bigquery.QueryJobConfig()
+        job_config.query_parameters = [
+            bigquery.ScalarQueryParameter(name, 'STRING', value)
+            for name, value in (params or {}).items()
+        ]
+
+        return self.client.query(sql, job_config=job_config).result()
+
+
+    def load(self, dataset, table, data):
+        loader = BigQueryLoader(self.client, self.project)
+        loader.submit(dataset, table, data, schema=[
+            {'name': column, 'type': 'integer' if pd.api.types.is_integer_dtype(dtype) else 'string'}
+            for column, dtype in data.dtypes.items()
+        ])
+        loader.wait()
+
+
+    def copy(self, dataset, source, destination):
+        """
+        Replace table `destination` with a copy of `source`; no data is
+        moved through the client
+        """
+
+        job_config = bigquery.CopyJobConfig(write_disposition='WRITE_TRUNCATE')
+        self.client.copy_table('%s.%s.%s' % (self.project, dataset, source),
+            '%s.%s.%s' % (self.project, dataset, destination),
+            job_config=job_config).result()
+
+
+    def describe(self, dataset, table, descriptions):
+        """
+        Set column descriptions looked up with descriptions.get(column)
+        """
+
+        table = self.client.get_table('%s.%s.%s' % (self.project, dataset, table))
+
+        schema = []
+        for field in table.schema:
+            field = field.to_api_repr()
+            description = descriptions.get(field['name'])
+            if description:
+                field['description'] = description
+            schema.append(bigquery.SchemaField.from_api_repr(field))
+
+        table.schema = schema
+        self.client.update_table(table, ['schema'])
+
+
+def versioned(table, htan_release):
+    """
+    Name of a table's snapshot for a release, e.g. entities_v5_0
+    """
+
+    return table + '_v' + re.sub(
+        r'[^a-zA-Z0-9_]', '_', htan_release.replace('Release ', '')).lower()
+
+
+def promote_entities(engine, htan_release, bai_ids, descriptions):
+    """
+    Add the shortlist to released.entities as a new release, leaving
+    out BAI files. The release snapshot entities_v<N> is built in the
+    warehouse and copied over released.entities
+    """
+
+    engine.load('data_release', BAI_FILES_TABLE,
+        pd.DataFrame({'id': pd.Series(bai_ids, dtype=object).dropna().unique()}))
+
+    snapshot = versioned('entities', htan_release)
+    columns = ', '.join('CAST(e.%s AS STRING) AS %s' % (c, c) for c in ENTITY_COLUMNS)
+
+    engine.execute("""
+        CREATE OR REPLACE TABLE %s AS
+        SELECT DISTINCT %s
+        FROM (
+            SELECT entityId, @htan_release AS Data_Release, Id, type, CDS_Release,
+            IDC_Release, Component, channel_metadata_version, channel_metadata_synapseId
+            FROM %s
+            UNION ALL
+            SELECT %s FROM %s
+        ) AS e
+        LEFT JOIN %s AS b ON e.entityId = b.id
+        WHERE b.id IS NULL
+    """ % (engine.table('released', snapshot), columns,
+        engine.table('data_release', 'shortlist'),
+        ', '.join(ENTITY_COLUMNS), engine.table('released', 'entities'),
+        engine.table('data_release', BAI_FILES_TABLE)),
+        {'htan_release': htan_release})
+
+    engine.describe('released', snapshot, descriptions)
+    engine.copy('released', snapshot, 'entities')
+
+
+def promote_metadata(engine, htan_release, manifest_versions, descriptions):
+    """
+    Add the release's manifests to released.metadata, with every
+    manifest at its current version. manifest_versions holds id and
+    currentVersion of the fileview files; only the versions of manifests
+    in released.metadata or the release's manifests are uploaded, and
+    manifests not among them get no version
+    """
+
+    manifests = """
+        SELECT Manifest_Id FROM %s
+        UNION ALL
+        SELECT Manifest_Id FROM %s
+        WHERE Manifest_Version IS NOT NULL
+    """ % (engine.table('released', 'metadata'),
+        engine.table('data_release', 'manifests'))
+
+    manifest_ids = engine.query('SELECT DISTINCT Manifest_Id FROM (%s) AS m' % manifests)
+
+    versions = manifest_versions[manifest_versions['id'].isin(manifest_ids['Manifest_Id'])]
+    engine.load('data_release', MANIFEST_VERSIONS_TABLE,
+        versions[['id', 'currentVersion']].drop_duplicates('id').astype(
+            {'currentVersion': 'Int64'}))
+
+    snapshot = versioned('metadata', htan_release)
+
+    engine.execute("""
+        CREATE OR REPLACE TABLE %s AS
+        SELECT DISTINCT m.Manifest_Id, CAST(v.currentVersion AS INT64) AS Manifest_Version
+        FROM (%s) AS m
+        LEFT JOIN %s AS v ON m.Manifest_Id = v.id
+    """ % (engine.table('released', snapshot), manifests,
+        engine.table('data_release', MANIFEST_VERSIONS_TABLE)))
+
+    engine.describe('released', snapshot, descriptions)
+    engine.copy('released', snapshot, 'metadata')
@@ -0,0 +1,30 @@
+import pandas as pd
+
+
+# characters separating biospecimen/participant IDs in Biospecimen_Path
+PATH_SEPARATOR = r'[^A-Za-z0-9_\-\.]+'
+
+
+class ProvenanceIndex:
+    """
+    Edges from each upstream ID (participant or biospecimen) appearing
+    in an id_provenance Biospecimen_Path to the entityIds of the files
+    derived from it; checks join their upstream IDs against `edges`.
+
+    IDs are matched as whole path components, so HTA1_1_1 does not
+    match files derived from HTA1_1_10.
+    """
+
+    def __init__(self, id_prov_table):
+
+        paths = id_prov_table[['Biospecimen_Path', 'entityId']].dropna()
+
+        edges = paths.assign(
+            upstreamId=paths['Biospecimen_Path'].astype(str).str.split(
+                PATH_SEPARATOR, regex=True)
+        ).explode('upstreamId')
+
+        self.edges = edges.loc[
+            edges['upstreamId'].astype(bool), ['upstreamId', 'entityId']
+        ].drop_duplicates().reset_index(drop=True)
+
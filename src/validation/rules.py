@@ -0,0 +1,94 @@
+import pandas as pd
+
+from validation.errors import error_table, concat_errors
+
+
+class Rule:
+    """
+    Row-level check evaluated column-wise over a whole data frame.
+
+    A row fails when the (optionally transformed) value in `column` is a
+    string that does not match `pattern` from its start. Rows for which
+    any `exempt` function returns True, and rows with missing or
+    non-string values, are never reported. `pattern` is kept as a
+    string, since Arrow-backed string columns only match string
+    patterns.
+    """
+
+    def __init__(self, name, column, pattern, message, transform=None, exempt=()):
+        self.name = name
+        self.column = column
+        self.pattern = pattern
+        self.message = message
+        self.transform = transform
+        self.exempt = exempt
+
+
+    def failing(self, data):
+        """
+        Boolean mask of rows that fail the rule
+        """
+
+        values = data[self.column]
+        if self.transform is not None:
+            values = self.transform(values)
+
+        mask = values.str.match(self.pattern).eq(False)
+
+        for exempt in self.exempt:
+            mask &= ~exempt(data)
+
+        return mask.fillna(False).astype(bool)
+
+
+def component_is(component):
+    return lambda data: data['Component'] == component
+
+
+def column_contains(column, text):
+    return lambda data: data[column].str.contains(
+        text, regex=False, na=False).astype(bool)
+
+
+def basename(values):
+    return values.str.replace(r'^.*/', '', regex=True)
+
+
+HTAN_ID_FORMAT = Rule(
+    'htan_id_format',
+    'HTAN Data File ID',
+    r'HTA\d{1,2}_\d+_\d+$|HTA\d{1,2}_EXT\d{1,2}_\d+$',
+    'HTAN ID does not match specified format',
+    exempt=(
+        component_is('AccessoryManifest'),
+        column_contains('HTAN Data File ID', 'EXT')
+    )
+)
+
+BASENAME_CHARSET = Rule(
+    'basename_charset',
+    'Filename',
+    r'[a-zA-Z0-9\-\.\_\/]',
+    'File basename contains unsupported characters (supported: alphanumeric (a-z,A-Z,0-9), dashes(-), periods(.), and underscores(_))',
+    transform=basename,
+    exempt=(
+        component_is('AccessoryManifest'),
+        column_contains('Filename', 'EXT')
+    )
+)
+
+
+def apply_rules(data, rules):
+    """
+    Evaluate rules over a data frame and return an error table with a
+    row for every failing row of each rule, coded by rule name
+    """
+
+    tables = []
+
+    for rule in rules:
+        failed = data[rule.failing(data)]
+        tables.append(error_table(failed['entityId'], rule.name, 
+            rule.message, context=failed[rule.column]))
+
+    return concat_errors(tables)
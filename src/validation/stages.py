@@ -0,0 +1,147 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from validation.parallel import max_workers
+from validation.telemetry import measure, size
+
+
+class Stage:
+    """
+    Named pipeline step. func is called with the declared inputs as
+    positional arguments, in order, and returns nothing, a single
+    output, or a tuple of outputs in the order declared. Outputs of
+    stages marked with checkpoint are saved after they complete
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), checkpoint=False):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.checkpoint = checkpoint
+
+
+    def run(self, context):
+
+        result = self.func(*[context[i] for i in self.inputs])
+
+        if len(self.outputs) == 0:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        return dict(zip(self.outputs, result))
+
+
+class StageRunner:
+    """
+    Run stages as a dependency graph. A stage starts as soon as all of
+    its inputs are available, and independent stages run concurrently
+    on a thread pool. Wall time is recorded for every stage.
+
+    With a CheckpointStore, checkpointed stages that already completed
+    for this run date are loaded from disk instead of being run again.
+    With RunMetrics, CPU time, peak RSS and output row counts are also
+    recorded for each stage.
+    """
+
+    def __init__(self, stages, workers=None, checkpoints=None, metrics=None):
+        self.stages = stages
+        self.workers = workers or max_workers('HTAN_STAGE_WORKERS', 6)
+        self.checkpoints = checkpoints
+        self.metrics = metrics
+        self.timings = {}
+
+        outputs = [o for s in stages for o in s.outputs]
+        duplicated = set(o for o in outputs if outputs.count(o) > 1)
+        if duplicated:
+            raise ValueError('Outputs produced by more than one stage: %s' % duplicated)
+
+
+    def _timed(self, stage, context, start):
+        begin = time.time()
+
+        checkpointed = stage.checkpoint and self.checkpoints is not None
+
+        with measure(self.metrics, stage.name) as counts:
+            if checkpointed and self.checkpoints.has(stage.name):
+                print('Resuming %s from checkpoint' % stage.name)
+                outputs = self.checkpoints.load(stage.name)
+            else:
+                outputs = stage.run(context)
+                if checkpointed:
+                    self.checkpoints.save(stage.name, outputs)
+
+            counts.update({name: size(value) for name, value in outputs.items()})
+
+        self.timings[stage.name] = (begin - start, time.time() - start)
+        return outputs
+
+
+    def run(self, context):
+        """
+        Run all stages, adding their outputs to context
+        """
+
+        context = dict(context)
+        pending = list(self.stages)
+        running = {}
+        start = time.time()
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+
+        try:
+            while pending or running:
+
+                ready = [s for s in pending if all(i in context for i in s.inputs)]
+
+                for stage in ready:
+                    pending.remove(stage)
+                    running[pool.submit(self._timed, stage, dict(context), start)] = stage
+
+                if not running:
+                    missing = {s.name: [i for i in s.inputs if i not in context]
+                        for s in pending}
+                    raise ValueError('Stages have unsatisfied inputs: %s' % missing)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    running.pop(future)
+                    context.update(future.result())
+
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+        pool.shutdown()
+        self.report()
+
+        return context
+
+
+    def critical_path(self):
+        """
+        Chain of stages ending with the last stage to finish, following
+        at each step the input that became available last
+        """
+
+        producer = {o: s for s in self.stages for o in s.outputs}
+        stage = max(self.stages, key=lambda s: self.timings[s.name][1], default=None)
+        path = []
+
+        while stage is not None:
+            path.insert(0, stage.name)
+            upstream = [producer[i] for i in stage.inputs if i in producer]
+            stage = max(upstream, key=lambda s: self.timings[s.name][1], default=None)
+
+        return path
+
+
+    def report(self):
+
+        print('')
+        print(' Stage timings ')
+        for name, (begin, end) in sorted(self.timings.items(), key=lambda x: x[1]):
+            print('  %-28s %8.1fs  (%.1fs - %.1fs)' % (name, end - begin, begin, end))
+        print('  critical path: %s' % ' -> '.join(self.critical_path()))
+        print('')
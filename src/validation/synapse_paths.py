@@ -0,0 +1,100 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from validation.parallel import retry, max_workers
+
+
+class SynapsePathResolver:
+    """
+    Resolve folder/file paths relative to a Synapse container to
+    (synId, version) pairs.
+
+    Folder listings are cached, so each folder is listed at most once
+    per run no matter how many paths pass through it. A single resolver
+    is meant to be shared by every stage that walks Synapse paths.
+    """
+
+    def __init__(self, syn):
+        self.syn = syn
+        self._children = {}
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+
+    def _list(self, folder_id):
+        """
+        List a folder as {name: (synId, version)}, keeping the first
+        child returned for duplicated names. Errors left after retries
+        are raised, so a failed listing is never cached
+        """
+
+        children = retry(lambda: list(self.syn.getChildren(
+            folder_id, includeTypes=['folder', 'file'])))
+
+        listing = {}
+        for child in children:
+            listing.setdefault(child['name'],
+                (child['id'], child.get('versionNumber')))
+
+        return listing
+
+
+    def _fetch_listings(self, folder_ids):
+        """
+        List any folders that are not cached yet, concurrently
+        """
+
+        with self._lock:
+            new = [f for f in set(folder_ids) if f not in self._children]
+
+        if not new:
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers('HTAN_SYNAPSE_WORKERS', 8)) as pool:
+            listings = dict(zip(new, pool.map(self._list, new)))
+
+        with self._lock:
+            self._children.update(listings)
+
+
+    def resolve_many(self, paths):
+        """
+        Resolve (root synId, path) pairs and return a map from each pair
+        to (synId, version), or to None if any path segment is missing.
+
+        Paths are walked together one level at a time, so folders
+        shared by many paths are listed once and folders at the same
+        depth are listed concurrently.
+        """
+
+        with self._lock:
+            pending = {p: (p[0], p[1].split('/')) for p in set(paths)
+                if p not in self._resolved}
+
+        while pending:
+            self._fetch_listings(node for node, segments in pending.values())
+
+            remaining = {}
+            with self._lock:
+                for key, (node, segments) in pending.items():
+                    child = self._children[node].get(segments[0])
+
+                    if child is None:
+                        self._resolved[key] = None
+                    elif len(segments) == 1:
+                        self._resolved[key] = child
+                    else:
+                        remaining[key] = (child[0], segments[1:])
+
+            pending = remaining
+
+        with self._lock:
+            return {p: self._resolved[p] for p in paths}
+
+
+    def resolve(self, root_id, path):
+        """
+        Resolve a single path below root_id
+        """
+
+        return self.resolve_many([(root_id, path)])[(root_id, path)]
@@ -0,0 +1,189 @@
+import json
+import resource
+import threading
+import time
+import pandas as pd
+
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+
+
+RUN_METRICS_SCHEMA = [
+    {'name': 'run_id', 'type': 'STRING'},
+    {'name': 'stage', 'type': 'STRING'},
+    {'name': 'started_at', 'type': 'TIMESTAMP'},
+    {'name': 'wall_seconds', 'type': 'FLOAT'},
+    {'name': 'cpu_seconds', 'type': 'FLOAT'},
+    {'name': 'process_cpu_seconds', 'type': 'FLOAT'},
+    {'name': 'peak_rss_mb', 'type': 'FLOAT'},
+    {'name': 'rows', 'type': 'INTEGER'},
+    {'name': 'counts', 'type': 'STRING'},
+    {'name': 'status', 'type': 'STRING'},
+    {'name': 'error', 'type': 'STRING'},
+    {'name': 'rss_start_mb', 'type': 'FLOAT'},
+    {'name': 'rss_end_mb', 'type': 'FLOAT'}
+]
+
+
+def size(value):
+    """
+    Row count of a stage output: rows of a data frame, total rows of a
+    {component: data frame} map, or the length of other collections
+    """
+
+    if isinstance(value, dict) and value and \
+        all(isinstance(v, pd.DataFrame) for v in value.values()):
+        return sum(len(v) for v in value.values())
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rss_mb():
+    """
+    Current resident set size of the process, or None where
+    /proc/self/statm is not available
+    """
+
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return round(pages * resource.getpagesize() / 2**20, 1)
+
+
+class RunMetrics:
+    """
+    Per-stage wall time, CPU time and row counts for one run.
+
+    Each measured stage is logged as a structured JSON line, and all
+    stages can be appended to the data_release.run_metrics table.
+    cpu_seconds is CPU used by the stage's own thread; work the stage
+    hands to thread pools shows up in process_cpu_seconds, which also
+    includes any stages running concurrently.
+
+    Peak RSS is a process-wide high-water mark that concurrent stages
+    share, so it is recorded once, on the 'run' row added by load().
+    Each stage records the current RSS when it starts and ends instead.
+    A stage that raises is still recorded, with status 'error' and the
+    exception in `error`.
+    """
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        self.records = []
+        self._lock = threading.Lock()
+        self._started_at = datetime.now(timezone.utc)
+        self._wall = time.time()
+        self._process_cpu = time.process_time()
+        self._rss = _rss_mb()
+
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Measure the enclosed block. Yields a dict the caller can fill
+        with row counts
+        """
+
+        counts = {}
+        status, error = 'error', None
+        started_at = datetime.now(timezone.utc)
+        wall = time.time()
+        cpu = time.thread_time()
+        process_cpu = time.process_time()
+        rss = _rss_mb()
+
+        try:
+            yield counts
+            status = 'ok'
+        except Exception as e:
+            error = '%s: %s' % (type(e).__name__, e)
+            raise
+        finally:
+            record = {
+                'run_id': self.run_id,
+                'stage': name,
+                'started_at': started_at,
+                'wall_seconds': round(time.time() - wall, 3),
+                'cpu_seconds': round(time.thread_time() - cpu, 3),
+                'process_cpu_seconds': round(time.process_time() - process_cpu, 3),
+                'peak_rss_mb': None,
+                'rows': sum(c for c in counts.values() if c is not None),
+                'counts': json.dumps(counts),
+                'status': status,
+                'error': error,
+                'rss_start_mb': rss,
+                'rss_end_mb': _rss_mb()
+            }
+
+            self._record(record, counts)
+
+
+    def _record(self, record, counts):
+        with self._lock:
+            self.records.append(record)
+
+        print(json.dumps(dict(record,
+            started_at=record['started_at'].isoformat(), counts=counts,
+            severity='INFO', message='stage_metrics')))
+
+
+    def finish(self):
+        """
+        Record the whole run: wall and process CPU time since this
+        RunMetrics was created, and the peak RSS of the process. The
+        run's status is 'error' if any stage failed
+        """
+
+        with self._lock:
+            failed = [r['stage'] for r in self.records if r['status'] == 'error']
+
+        self._record({
+            'run_id': self.run_id,
+            'stage': 'run',
+            'started_at': self._started_at,
+            'wall_seconds': round(time.time() - self._wall, 3),
+            'cpu_seconds': None,
+            'process_cpu_seconds': round(time.process_time() - self._process_cpu, 3),
+            'peak_rss_mb': round(_peak_rss_mb(), 1),
+            'rows': None,
+            'counts': json.dumps({}),
+            'status': 'error' if failed else 'ok',
+            'error': 'Failed stages: %s' % ', '.join(failed) if failed else None,
+            'rss_start_mb': self._rss,
+            'rss_end_mb': _rss_mb()
+        }, {})
+
+
+    def to_frame(self):
+        return pd.DataFrame(self.records,
+            columns=[f['name'] for f in RUN_METRICS_SCHEMA])
+
+
+    def load(self, loader, dataset='data_release', table='run_metrics'):
+        """
+        Append this run's stage metrics and the run row to BigQuery
+        """
+
+        self.finish()
+        loader.submit(dataset, table, self.to_frame(), RUN_METRICS_SCHEMA,
+            write_disposition='WRITE_APPEND')
+
+
+def measure(metrics, name):
+    """
+    metrics.stage(name), or a no-op when no RunMetrics is in use
+    """
+
+    if metrics is None:
+        return nullcontext({})
+    return metrics.stage(name)
@@ -0,0 +1,246 @@
+import os
+import re
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from validation.parallel import retry, max_workers, RateLimiter
+
+
+# Jira limits descriptions to 32,767 characters; longer tables are
+# attached as CSV
+DESCRIPTION_LIMIT = 32000
+
+# errors table columns not shown in manifest tickets
+ERROR_GROUP_COLUMNS = ['Manifest_Id', 'Manifest_Version', 'Id', 'HTAN_Center', 'Component']
+
+
+def render_table(data):
+    """
+    Data frame as a pipe table without the alignment row
+    """
+
+    table = data.to_markdown(index=False, tablefmt='pipe').split('\n')
+    table.pop(1)
+
+    return '\n'.join(line.replace('|:', '|') for line in table)
+
+
+class TicketSync:
+    """
+    Create the Jira service desk requests of a data release: one per
+    (center, component, manifest) with validation errors, a master
+    request per center linked to those, and one per center with
+    clinical/biospecimen ID errors.
+
+    A request's summary is its stable key. Requests in the service
+    desk's project with exactly that summary are not submitted again and
+    existing links are not recreated, so a rerun only creates what is
+    missing. Tables are rendered in separate
+    processes; requests are made several at a time (HTAN_JIRA_WORKERS)
+    under a shared rate limit of `rate` requests per second.
+    """
+
+    def __init__(self, jira, release, service_desk_id='1', request_type='Other questions',
+        workers=None, rate=5, attachment_dir='./tmp', project=None):
+
+        self.jira = jira
+        self.release = release
+        self.service_desk_id = service_desk_id
+        self.project = project
+        self.request_type = request_type
+        self.workers = workers or max_workers('HTAN_JIRA_WORKERS', 4)
+        self.limiter = RateLimiter(rate)
+        self.attachment_dir = attachment_dir
+
+
+    def _call(self, func, *args, **kwargs):
+        return retry(self.limiter.call, func, *args, **kwargs)
+
+
+    def existing(self, titles):
+        """
+        Keys of the requests already in Jira whose summary is one of
+        titles, by summary
+        """
+
+        if self.project is None:
+            self.project = self._call(self.jira.service_desk, self.service_desk_id).projectKey
+
+        # summary ~ is a text search; it narrows the results, which are
+        # then matched exactly
+        issues = self._call(self.jira.search_issues,
+            'project = "%s" AND summary ~ "\\"%s\\""' % (self.project, self.release),
+            maxResults=False, fields='summary')
+
+        titles = set(titles)
+        return {issue.fields.summary: issue.key for issue in issues
+            if issue.fields.summary in titles}
+
+
+    def error_tickets(self, errors):
+        """
+        Requests for the errors of each (center, component, manifest)
+        """
+
+        tickets = []
+        for (center, component, manifest_id), data in errors.groupby(
+            ['HTAN_Center', 'Component', 'Manifest_Id']):
+
+            tickets.append({
+                'title': '[%s Errors] %s %s %s' % (self.release, center, component, manifest_id),
+                'center': center,
+                'data': data.drop(columns=ERROR_GROUP_COLUMNS, errors='ignore'),
+                'intro': 'Errors pertaining to manifest %s' % manifest_id,
+                'csv': 'release%s_%s_%s.csv' % (
+                    re.sub(r'[^0-9a-zA-Z]+', '_', self.release.replace('Release ', '')),
+                    center.replace(' ', ''), manifest_id)
+            })
+
+        return tickets
+
+
+    def clin_bio_tickets(self, cb_errors):
+        """
+        Requests for the duplicate biospecimen and participant IDs of
+        each center
+        """
+
+        tickets = []
+        for center, data in cb_errors.groupby('HTAN_Center'):
+            tickets.append({
+                'title': '[%s HTAN Biospecimen/Participant ID Validation] %s' % (
+                    self.release, center),
+                'center': None,
+                'data': data,
+                'intro': "The table below contains biospecimen and participant IDs that "
+                    "were identified in multiple rows within %s's Biospecimen and/or "
+                    "Demographics manifests respectively" % center,
+                'csv': None
+            })
+
+        return tickets
+
+
+    def _master_title(self, center):
+        return '[%s] %s Master Ticket' % (self.release, center)
+
+
+    def _create(self, title, description):
+        data = {
+            'serviceDeskId': self.service_desk_id,
+            'requestTypeId': self.request_type,
+            'requestFieldValues': {
+                'summary': title,
+                'description': description
+            }
+        }
+
+        return self._call(self.jira.create_customer_request, fields=data).key
+
+
+    def _submit(self, ticket, table):
+        try:
+            if len(table) > DESCRIPTION_LIMIT and ticket['csv']:
+                key = self._create(ticket['title'], '%s attached as csv' % ticket['intro'])
+
+                os.makedirs(self.attachment_dir, exist_ok=True)
+                csv_path = os.path.join(self.attachment_dir, ticket['csv'])
+                ticket['data'].to_csv(csv_path, index=False)
+                self._call(self.jira.add_attachment, issue=key, attachment=csv_path)
+            elif table:
+                key = self._create(ticket['title'], '%s \n %s' % (ticket['intro'], table))
+            else:
+                key = self._create(ticket['title'], ticket['intro'])
+
+        except Exception as e:
+            print('Request "%s" not created: %s' % (ticket['title'], e))
+            return None
+
+        return key
+
+
+    def _linked(self, key):
+        """
+        Keys of issues already linked to an issue
+        """
+
+        issue = self._call(self.jira.issue, key, fields='issuelinks')
+
+        linked = set()
+        for link in issue.fields.issuelinks:
+            for side in ('inwardIssue', 'outwardIssue'):
+                if hasattr(link, side):
+                    linked.add(getattr(link, side).key)
+
+        return linked
+
+
+    def _link(self, master_key, issue_key):
+        try:
+            self._call(self.jira.create_issue_link, type='split to',
+                inwardIssue=master_key, outwardIssue=issue_key)
+        except Exception as e:
+            print('%s not linked to %s: %s' % (issue_key, master_key, e))
+            return False
+
+        return True
+
+
+    def sync(self, errors, cb_errors):
+        """
+        Create missing requests and links. Returns the number created
+        and already present
+        """
+
+        tickets = self.error_tickets(errors) + self.clin_bio_tickets(cb_errors)
+
+        keys = self.existing([t['title'] for t in tickets] + [self._master_title(t['center'])
+            for t in tickets if t['center'] is not None])
+        new = [t for t in tickets if t['title'] not in keys]
+
+        with ProcessPoolExecutor(max_workers=max_workers(
+            'HTAN_RENDER_WORKERS', os.cpu_count() or 1)) as pool:
+            tables = list(pool.map(render_table, [t['data'] for t in new]))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            created = list(pool.map(self._submit, new, tables))
+        keys.update({t['title']: k for t, k in zip(new, created) if k is not None})
+
+        # master requests grouped by center
+        issues = {}
+        for ticket in tickets:
+            if ticket['center'] is not None and ticket['title'] in keys:
+                issues.setdefault(ticket['center'], []).append(keys[ticket['title']])
+
+        masters = {center: self._master_title(center) for center in issues}
+        new_masters = [c for c, title in masters.items() if title not in keys]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            master_keys = list(pool.map(lambda center: self._submit({
+                'title': masters[center],
+                'intro': 'Master issue to manage %s errors from %s pre-release checks' % (
+                    center, self.release),
+                'csv': None
+            }, ''), new_masters))
+        keys.update({masters[c]: k for c, k in zip(new_masters, master_keys) if k is not None})
+
+        # links missing from masters that existed before this run
+        links = []
+        for center, issue_keys in issues.items():
+            master_key = keys.get(masters[center])
+            if master_key is None:
+                continue
+            linked = set() if center in new_masters else self._linked(master_key)
+            links += [(master_key, k) for k in issue_keys if k not in linked]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            linked = list(pool.map(lambda link: self._link(*link), links))
+
+        counts = {
+            'requests created': sum(k is not None for k in created + master_keys),
+            'requests existing': len(tickets) + len(masters) - len(new) - len(new_masters),
+            'requests failed': sum(k is None for k in created + master_keys),
+            'links created': sum(linked)
+        }
+        print('Jira sync: %s' % ', '.join('%s %d' % kv for kv in counts.items()))
+
+        return counts
@@ -62,4 +62,9 @@ variable "region" {
 variable "secret_id" {
   type        = string
   description = "Name of secret in secret manager containing Synapse auth token"
+}
+
+variable "cache_bucket" {
+  type        = string
+  description = "Name of Cloud Storage bucket mounted by the job to persist checkpoints and caches between executions"
 }
\ No newline at end of file
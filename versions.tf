@@ -3,7 +3,7 @@ terraform {
   required_providers {
     google = {
       source  = "hashicorp/google"
-      version = ">= 4.23, < 6"
+      version = ">= 5.12, < 6"
     }
     random = {
       source  = "hashicorp/random"